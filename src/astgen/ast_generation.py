@@ -4,7 +4,6 @@ This module contains the ASTGeneration class that converts parse trees
 into Abstract Syntax Trees using the visitor pattern.
 """
 
-from functools import reduce
 from build.OPLangVisitor import OPLangVisitor
 from build.OPLangParser import OPLangParser
 from src.utils.nodes import *
@@ -17,11 +16,9 @@ class ASTGeneration(OPLangVisitor):
     def visitProgram(self, ctx:OPLangParser.ProgramContext):
         return Program(self.visit(ctx.classdecllist()))
 
-    # classdecllist: classdecl classdecllist | classdecl;
+    # classdecllist: classdecl+;
     def visitClassdecllist(self, ctx:OPLangParser.ClassdecllistContext):
-        if ctx.getChildCount() == 1:
-            return [self.visit(ctx.classdecl())]
-        return [self.visit(ctx.classdecl())] + self.visit(ctx.classdecllist())
+        return [self.visit(decl) for decl in ctx.classdecl()]
 
 
     # classdecl: CLASS ID classextends classbody;
@@ -40,11 +37,12 @@ class ASTGeneration(OPLangVisitor):
     def visitClassbody(self, ctx:OPLangParser.ClassbodyContext):
         return self.visit(ctx.classmemlist())
 
-    # classmemlist: classmem classmemlist | ;
+    # classmemlist: classmem*;
     def visitClassmemlist(self, ctx:OPLangParser.ClassmemlistContext):
-        if ctx.getChildCount() == 0:
-            return []
-        return self.visit(ctx.classmem()) + self.visit(ctx.classmemlist())
+        members = []
+        for mem in ctx.classmem():
+            members.extend(self.visit(mem))
+        return members
 
     # classmem: attrdecl | methoddecl;
     def visitClassmem(self, ctx:OPLangParser.ClassmemContext):
@@ -125,11 +123,12 @@ class ASTGeneration(OPLangVisitor):
         return self.visit(ctx.paramprime()) if ctx.paramprime() else []
 
 
-    # paramprime: param SEMICOLON paramprime | param;
+    # paramprime: (param SEMICOLON)* param;
     def visitParamprime(self, ctx:OPLangParser.ParamprimeContext):
-        if ctx.getChildCount() == 1:
-            return self.visit(ctx.param())
-        return self.visit(ctx.param()) + self.visit(ctx.paramprime())
+        params = []
+        for param in ctx.param():
+            params.extend(self.visit(param))
+        return params
 
 
     # param: typ AMPERSAND? idlist;
@@ -141,18 +140,17 @@ class ASTGeneration(OPLangVisitor):
         return [Parameter(typ, id) for id in ids]
 
 
-    # idlist: ID COMMA idlist | ID;
+    # idlist: ID (COMMA ID)*;
     def visitIdlist(self, ctx:OPLangParser.IdlistContext):
-        if ctx.getChildCount() == 1:
-            return [(ctx.ID().getText())]
-        return [(ctx.ID().getText())] + self.visit(ctx.idlist())
+        return [id.getText() for id in ctx.ID()]
 
 
-    # attrdecllist: attrdecl attrdecllist | attrdecl;
+    # attrdecllist: attrdecl+;
     def visitAttrdecllist(self, ctx:OPLangParser.AttrdecllistContext):
-        if ctx.getChildCount() == 1:
-            return self.visit(ctx.attrdecl())
-        return self.visit(ctx.attrdecl()) + self.visit(ctx.attrdecllist())
+        decls = []
+        for decl in ctx.attrdecl():
+            decls.extend(self.visit(decl))
+        return decls
 
 
     # attrdecl: mutattr | immutattr;
@@ -191,12 +189,9 @@ class ASTGeneration(OPLangVisitor):
                     all_attrs.append(Attribute(id_name))
         return [AttributeDecl(is_static, True, typ, all_attrs)]
 
-    # attrlist: attrmem COMMA attrlist | attrmem;
+    # attrlist: attrmem (COMMA attrmem)*;
     def visitAttrlist(self, ctx:OPLangParser.AttrlistContext):
-        if ctx.getChildCount() > 1:
-            return [self.visit(ctx.attrmem())] + self.visit(ctx.attrlist())
-        else:
-            return [self.visit(ctx.attrmem())]
+        return [self.visit(mem) for mem in ctx.attrmem()]
 
     # attrmem: idlist attrinit;
     def visitAttrmem(self, ctx:OPLangParser.AttrmemContext):
@@ -209,11 +204,12 @@ class ASTGeneration(OPLangVisitor):
     def visitAttrinit(self, ctx:OPLangParser.AttrinitContext):
         return self.visit(ctx.expr()) if ctx.expr() else None
 
-    # vardecllist: vardecl vardecllist | vardecl;
+    # vardecllist: vardecl+;
     def visitVardecllist(self, ctx:OPLangParser.VardecllistContext):
-        if ctx.getChildCount() > 1:
-            return self.visit(ctx.vardecl()) + self.visit(ctx.vardecllist())
-        return self.visit(ctx.vardecl())
+        decls = []
+        for decl in ctx.vardecl():
+            decls.extend(self.visit(decl))
+        return decls
     
     # vardecl: mutvar | immutvar;
     def visitVardecl(self, ctx:OPLangParser.VardeclContext):
@@ -256,11 +252,9 @@ class ASTGeneration(OPLangVisitor):
 
         return [VariableDecl(True, typ, all_vars)]
     
-    # varlist: varmem COMMA varlist | varmem;
+    # varlist: varmem (COMMA varmem)*;
     def visitVarlist(self, ctx:OPLangParser.VarlistContext):
-        if ctx.getChildCount() > 1:
-            return [self.visit(ctx.varmem())] + self.visit(ctx.varlist())
-        return [self.visit(ctx.varmem())]
+        return [self.visit(mem) for mem in ctx.varmem()]
 
     # varmem: idlist varinit;
     def visitVarmem(self, ctx:OPLangParser.VarmemContext):
@@ -278,13 +272,9 @@ class ASTGeneration(OPLangVisitor):
         elements = self.visit(ctx.arraymemlist()) if ctx.arraymemlist() else []
         return ArrayLiteral(elements)
 
-    # arraymemlist: arraymem COMMA arraymemlist | arraymem | ;
+    # arraymemlist: (arraymem (COMMA arraymem)* COMMA?)?;
     def visitArraymemlist(self, ctx: OPLangParser.ArraymemlistContext):
-        if ctx.getChildCount() == 0:
-            return []
-        if ctx.getChildCount() == 1:
-            return [self.visit(ctx.arraymem())]
-        return [self.visit(ctx.arraymem())] + self.visit(ctx.arraymemlist()) 
+        return [self.visit(mem) for mem in ctx.arraymem()]
 
     # arraymem: INTLIT | FLOATLIT | STRINGLIT | booleanlit | NEW ID LB argnullist RB;
     def visitArraymem(self, ctx):
@@ -309,119 +299,76 @@ class ASTGeneration(OPLangVisitor):
 
 
     # Visit a parse tree produced by OPLangParser#exprlist.
-    # exprlist: expr COMMA exprlist | expr;
+    # exprlist: expr (COMMA expr)*;
     def visitExprlist(self, ctx:OPLangParser.ExprlistContext):
-        return [self.visit(ctx.expr())] + self.visit(ctx.exprlist()) if ctx.getChildCount() > 1 else [self.visit(ctx.expr())]
+        return [self.visit(expr) for expr in ctx.expr()]
 
 
     # Visit a parse tree produced by OPLangParser#expr.
-    # expr: expr1 (GREATER_EQ | LESS_EQ | GREATER | LESS) expr1 | expr1;
+    # expr: expr1 ((EQ | NEQ) expr1)? ((GREATER_EQ | LESS_EQ | GREATER | LESS) expr1 ((EQ | NEQ) expr1)?)?;
     def visitExpr(self, ctx:OPLangParser.ExprContext):
-        if ctx.getChildCount() == 1:
-            return self.visit(ctx.expr1(0))
-        left = self.visit(ctx.expr1(0))
-        operator = ctx.getChild(1).getText()
-        right = self.visit(ctx.expr1(1))
+        # children are operand (op operand)*; equality binds tighter than
+        # the (single) relational operator
+        children = ctx.children
+        sides = [[self.visit(children[0])]]
+        for i in range(1, len(children), 2):
+            operator = children[i].getText()
+            right = self.visit(children[i + 1])
+            if operator in ("==", "!="):
+                sides[-1][0] = BinaryOp(sides[-1][0], operator, right)
+            else:
+                sides[-1].append(operator)
+                sides.append([right])
+        if len(sides) == 1:
+            return sides[0][0]
+        (left, operator), (right,) = sides
         return BinaryOp(left, operator, right)
 
 
     # Visit a parse tree produced by OPLangParser#expr1.
-    # expr1: expr2 (EQ | NEQ) expr2 | expr2;
+    # expr1: expr1 CONCAT expr1 | expr1 (MUL | DIV_I | DIV_F | MOD) expr1
+    #      | expr1 (ADD | SUB) expr1 | expr1 (AND | OR) expr1 | expr2;
     def visitExpr1(self, ctx:OPLangParser.Expr1Context):
-        if ctx.getChildCount() == 1:
-            return self.visit(ctx.expr2(0))
-        left = self.visit(ctx.expr2(0))
-        operator = ctx.getChild(1).getText()
-        right = self.visit(ctx.expr2(1))
-        return BinaryOp(left, operator, right)
+        # walk down the left spine instead of recursing into it
+        rights = []
+        while ctx.expr2() is None:
+            rights.append((ctx.getChild(1).getText(), ctx.expr1(1)))
+            ctx = ctx.expr1(0)
+        result = self.visit(ctx.expr2())
+        for operator, right in reversed(rights):
+            result = BinaryOp(result, operator, self.visit(right))
+        return result
 
 
     # Visit a parse tree produced by OPLangParser#expr2.
-    # expr2: expr2 (AND | OR) expr3 | expr3;
+    # expr2: NOT* (ADD | SUB)* expr3 (LSB expr RSB | DOT ID (LB argnullist RB)?)*;
     def visitExpr2(self, ctx:OPLangParser.Expr2Context):
-        if ctx.getChildCount() == 1:
-            return self.visit(ctx.expr3())
-        left = self.visit(ctx.expr2())
-        operator = ctx.getChild(1).getText()
-        right = self.visit(ctx.expr3())
-        return BinaryOp(left, operator, right)
-
-
-    # Visit a parse tree produced by OPLangParser#expr3.
-    # expr3: expr3 (ADD | SUB) expr4 | expr4;
-    def visitExpr3(self, ctx:OPLangParser.Expr3Context):
-        if ctx.getChildCount() == 1:
-            return self.visit(ctx.expr4())
-        left = self.visit(ctx.expr3())
-        operator = ctx.getChild(1).getText()
-        right = self.visit(ctx.expr4())
-        return BinaryOp(left, operator, right)
-
-
-    # Visit a parse tree produced by OPLangParser#expr4.
-    # expr4: expr4 (MUL | DIV_I | DIV_F | MOD) expr5 | expr5;
-    def visitExpr4(self, ctx:OPLangParser.Expr4Context):
-        if ctx.getChildCount() == 1:
-            return self.visit(ctx.expr5())
-        left = self.visit(ctx.expr4())
-        operator = ctx.getChild(1).getText()
-        right = self.visit(ctx.expr5())
-        return BinaryOp(left, operator, right)
-
-
-    # Visit a parse tree produced by OPLangParser#expr5.
-    # expr5: expr5 CONCAT expr6 | expr6;
-    def visitExpr5(self, ctx:OPLangParser.Expr5Context):
-        if ctx.getChildCount() == 1:
-            return self.visit(ctx.expr6())
-        left = self.visit(ctx.expr5())
-        operator = ctx.CONCAT().getText()
-        right = self.visit(ctx.expr6())
-        return BinaryOp(left, operator, right)
-
-
-    # Visit a parse tree produced by OPLangParser#expr6.
-    # expr6: (NOT) expr6 | expr7;
-    def visitExpr6(self, ctx:OPLangParser.Expr6Context):
-        if ctx.getChildCount() == 1:
-            return self.visit(ctx.expr7())
-        operator = ctx.getChild(0).getText()
-        operand = self.visit(ctx.expr6())
-        return UnaryOp(operator, operand)
-
-
-    # Visit a parse tree produced by OPLangParser#expr7.
-    # expr7: (ADD | SUB) expr7 | expr8;
-    def visitExpr7(self, ctx:OPLangParser.Expr7Context):
-        if ctx.getChildCount() == 1:
-            return self.visit(ctx.expr8())
-        operator = ctx.getChild(0).getText()
-        operand = self.visit(ctx.expr7())
-        return UnaryOp(operator, operand)
-
-
-    # Visit a parse tree produced by OPLangParser#expr8.
-    # expr8: expr9 postfixlist;
-    def visitExpr8(self, ctx: OPLangParser.Expr8Context):
-        base = self.visit(ctx.expr9())
-        postfixes = self.visit(ctx.postfixlist())
-        if not postfixes:
-            return base
-        def apply_postfix(acc, postfix):
-            return PostfixExpression(acc, [postfix])
+        children = ctx.children
+        start = children.index(ctx.expr3())
+        result = self.visit(children[start])
+        # each postfix wraps the expression built so far
+        i = start + 1
+        while i < len(children):
+            if children[i].getText() == "[":
+                postfix = ArrayAccess(self.visit(children[i + 1]))
+                i += 3
+            elif i + 2 < len(children) and children[i + 2].getText() == "(":
+                postfix = MethodCall(children[i + 1].getText(), self.visit(children[i + 3]))
+                i += 5
+            else:
+                postfix = MemberAccess(children[i + 1].getText())
+                i += 2
+            result = PostfixExpression(result, [postfix])
+        for operator in reversed(children[:start]):
+            result = UnaryOp(operator.getText(), result)
+        return result
 
-        return reduce(apply_postfix, postfixes, base)
 
     # Visit a parse tree produced by OPLangParser#postfixlist.
-    # postfixlist: postfix postfixlist | ;
+    # postfixlist: postfix*;
     def visitPostfixlist(self, ctx: OPLangParser.PostfixlistContext):
-        if ctx.getChildCount() == 0:
-            return []
-        if ctx.postfix():
-            first = self.visit(ctx.postfix())
-            rest = self.visit(ctx.postfixlist()) if ctx.postfixlist() else []
-            return ([first] if first is not None else []) + [p for p in rest if p is not None]
-        return []
+        postfixes = (self.visit(postfix) for postfix in ctx.postfix())
+        return [p for p in postfixes if p is not None]
 
     # Visit a parse tree produced by OPLangParser#postfix.
     # postfix : LSB expr RSB | DOT ID | DOT ID LB argnullist RB ;
@@ -435,28 +382,29 @@ class ASTGeneration(OPLangVisitor):
             return MemberAccess(ctx.ID().getText())
 
 
-    # Visit a parse tree produced by OPLangParser#expr9.
-    # expr9: NEW ID LB argnullist RB | expr10 ;
-    def visitExpr9(self, ctx:OPLangParser.Expr9Context):
-        if ctx.getChildCount() == 1:
-            return self.visit(ctx.expr10())
-        return ObjectCreation(ctx.ID().getText(), self.visit(ctx.argnullist()) if ctx.argnullist() else [])
-
-
-    # Visit a parse tree produced by OPLangParser#expr10.
-    # expr10: THIS | ID | NIL | primitivelit | arraylit | subexpr;
-    def visitExpr10(self, ctx:OPLangParser.Expr10Context):
-        if ctx.THIS():
+    # Visit a parse tree produced by OPLangParser#expr3.
+    # expr3: NEW ID LB argnullist RB | THIS | ID | NIL
+    #      | INTLIT | FLOATLIT | STRINGLIT | booleanlit | arraylit | LB expr RB;
+    def visitExpr3(self, ctx:OPLangParser.Expr3Context):
+        if ctx.NEW():
+            return ObjectCreation(ctx.ID().getText(), self.visit(ctx.argnullist()) if ctx.argnullist() else [])
+        elif ctx.THIS():
             return ThisExpression()
         elif ctx.ID():
             return Identifier(ctx.ID().getText())
         elif ctx.NIL():
             return NilLiteral()
-        elif ctx.primitivelit():
-            return self.visit(ctx.primitivelit())
+        elif ctx.INTLIT():
+            return IntLiteral(int(ctx.INTLIT().getText()))
+        elif ctx.FLOATLIT():
+            return FloatLiteral(float(ctx.FLOATLIT().getText()))
+        elif ctx.STRINGLIT():
+            return StringLiteral(ctx.STRINGLIT().getText())
+        elif ctx.booleanlit():
+            return self.visit(ctx.booleanlit())
         elif ctx.arraylit():
             return self.visit(ctx.arraylit())
-        return self.visit(ctx.subexpr())
+        return ParenthesizedExpression(self.visit(ctx.expr()))
 
 
     # Visit a parse tree produced by OPLangParser#argnullist.
@@ -466,36 +414,15 @@ class ASTGeneration(OPLangVisitor):
 
 
     # Visit a parse tree produced by OPLangParser#argprime.
-    # argprime: expr COMMA argprime | expr;
+    # argprime: expr (COMMA expr)*;
     def visitArgprime(self, ctx:OPLangParser.ArgprimeContext):
-        if ctx.getChildCount() == 1:
-            return [self.visit(ctx.expr())]
-        return [self.visit(ctx.expr())] + self.visit(ctx.argprime())
-
-
-    # Visit a parse tree produced by OPLangParser#primitivelit.
-    # primitivelit: INTLIT | FLOATLIT | STRINGLIT | booleanlit;
-    def visitPrimitivelit(self, ctx:OPLangParser.PrimitivelitContext):
-        if ctx.INTLIT():
-            return IntLiteral(int(ctx.INTLIT().getText()))
-        elif ctx.FLOATLIT():
-            return FloatLiteral(float(ctx.FLOATLIT().getText()))
-        elif ctx.STRINGLIT():
-            return StringLiteral(ctx.STRINGLIT().getText())
-        elif ctx.booleanlit():
-            return self.visit(ctx.booleanlit())
-
-    # Visit a parse tree produced by OPLangParser#subexpr.
-    # subexpr: LB expr RB;
-    def visitSubexpr(self, ctx:OPLangParser.SubexprContext):
-        inner_expr = self.visit(ctx.expr())
-        return ParenthesizedExpression(inner_expr)
+        return [self.visit(expr) for expr in ctx.expr()]
 
 
     # Visit a parse tree produced by OPLangParser#stmtlist.
-    # stmtlist: stmt stmtlist | ;
+    # stmtlist: stmt*;
     def visitStmtlist(self, ctx:OPLangParser.StmtlistContext):
-        return [self.visitStmt(ctx.stmt())] + self.visitStmtlist(ctx.stmtlist()) if ctx.stmt() else []
+        return [self.visitStmt(stmt) for stmt in ctx.stmt()]
 
 
     # Visit a parse tree produced by OPLangParser#stmt.
@@ -536,9 +463,9 @@ class ASTGeneration(OPLangVisitor):
 
 
     # Visit a parse tree produced by OPLangParser#stmtlist_no_return.
-    # stmtlist_no_return: stmt_no_return stmtlist_no_return | ;
+    # stmtlist_no_return: stmt_no_return*;
     def visitStmtlist_no_return(self, ctx:OPLangParser.Stmtlist_no_returnContext):
-        return [self.visitStmt_no_return(ctx.stmt_no_return())] + self.visitStmtlist_no_return(ctx.stmtlist_no_return()) if ctx.stmt_no_return() else []
+        return [self.visitStmt_no_return(stmt) for stmt in ctx.stmt_no_return()]
 
 
     # Visit a parse tree produced by OPLangParser#stmt_no_return.
@@ -569,12 +496,12 @@ class ASTGeneration(OPLangVisitor):
 
 
     # Visit a parse tree produced by OPLangParser#lhs.
-    # lhs: ID | expr9 postfix postfixlist;
+    # lhs: ID | expr3 postfix postfixlist;
     def visitLhs(self, ctx: OPLangParser.LhsContext):
         if ctx.ID():
             return IdLHS(ctx.ID().getText())
 
-        base = self.visit(ctx.expr9())
+        base = self.visit(ctx.expr3())
         postfixes = []
 
         if ctx.postfix():
@@ -626,7 +553,7 @@ class ASTGeneration(OPLangVisitor):
 
 
     def visitMethodinstmt(self, ctx: OPLangParser.MethodinstmtContext):
-        primary = self.visit(ctx.expr9())  # ThisExpression, Identifier, ObjectCreation, ...
+        primary = self.visit(ctx.expr3())  # ThisExpression, Identifier, ObjectCreation, ...
         postfixes = []
         if ctx.postfix():
             postfixes.append(self.visit(ctx.postfix()))
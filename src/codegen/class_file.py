@@ -0,0 +1,470 @@
+"""
+Class file backend for OPLang code generation.
+This module turns the instruction stream built by the Emitter (one JasminCode
+directive or instruction per line) straight into JVM .class bytes, so no
+jasmin.jar step is needed to run the generated program.
+"""
+
+import struct
+from typing import Dict, List, Optional, Tuple
+from .error import IllegalOperandException, IllegalRuntimeException
+
+
+# Class files below version 50 are checked by the type-inferencing verifier,
+# so methods need no StackMapTable.
+MAJOR_VERSION = 49
+MINOR_VERSION = 0
+
+ACC_PUBLIC = 0x0001
+ACC_PRIVATE = 0x0002
+ACC_PROTECTED = 0x0004
+ACC_STATIC = 0x0008
+ACC_FINAL = 0x0010
+ACC_SUPER = 0x0020
+ACC_ABSTRACT = 0x0400
+
+ACCESS_FLAGS = {
+    "public": ACC_PUBLIC,
+    "private": ACC_PRIVATE,
+    "protected": ACC_PROTECTED,
+    "static": ACC_STATIC,
+    "final": ACC_FINAL,
+    "abstract": ACC_ABSTRACT,
+}
+
+# Instructions without operands
+SIMPLE_OPCODES = {
+    "nop": 0x00, "aconst_null": 0x01,
+    "iconst_m1": 0x02, "iconst_0": 0x03, "iconst_1": 0x04, "iconst_2": 0x05,
+    "iconst_3": 0x06, "iconst_4": 0x07, "iconst_5": 0x08,
+    "fconst_0": 0x0B, "fconst_1": 0x0C, "fconst_2": 0x0D,
+    "iload_0": 0x1A, "iload_1": 0x1B, "iload_2": 0x1C, "iload_3": 0x1D,
+    "fload_0": 0x22, "fload_1": 0x23, "fload_2": 0x24, "fload_3": 0x25,
+    "aload_0": 0x2A, "aload_1": 0x2B, "aload_2": 0x2C, "aload_3": 0x2D,
+    "iaload": 0x2E, "faload": 0x30, "aaload": 0x32, "baload": 0x33,
+    "istore_0": 0x3B, "istore_1": 0x3C, "istore_2": 0x3D, "istore_3": 0x3E,
+    "fstore_0": 0x43, "fstore_1": 0x44, "fstore_2": 0x45, "fstore_3": 0x46,
+    "astore_0": 0x4B, "astore_1": 0x4C, "astore_2": 0x4D, "astore_3": 0x4E,
+    "iastore": 0x4F, "fastore": 0x51, "aastore": 0x53, "bastore": 0x54,
+    "pop": 0x57, "pop2": 0x58, "dup": 0x59, "dup_x1": 0x5A, "dup_x2": 0x5B,
+    "dup2": 0x5C, "dup2_x1": 0x5D, "dup2_x2": 0x5E, "swap": 0x5F,
+    "iadd": 0x60, "fadd": 0x62, "isub": 0x64, "fsub": 0x66,
+    "imul": 0x68, "fmul": 0x6A, "idiv": 0x6C, "fdiv": 0x6E,
+    "irem": 0x70, "frem": 0x72, "ineg": 0x74, "fneg": 0x76,
+    "iand": 0x7E, "ior": 0x80, "ixor": 0x82,
+    "i2f": 0x86, "f2i": 0x8B, "fcmpl": 0x95, "fcmpg": 0x96,
+    "ireturn": 0xAC, "freturn": 0xAE, "areturn": 0xB0, "return": 0xB1,
+    "arraylength": 0xBE, "athrow": 0xBF,
+}
+
+LOCAL_OPCODES = {
+    "iload": 0x15, "fload": 0x17, "aload": 0x19,
+    "istore": 0x36, "fstore": 0x38, "astore": 0x3A,
+}
+
+BRANCH_OPCODES = {
+    "ifeq": 0x99, "ifne": 0x9A, "iflt": 0x9B, "ifge": 0x9C, "ifgt": 0x9D, "ifle": 0x9E,
+    "if_icmpeq": 0x9F, "if_icmpne": 0xA0, "if_icmplt": 0xA1,
+    "if_icmpge": 0xA2, "if_icmpgt": 0xA3, "if_icmple": 0xA4,
+    "if_acmpeq": 0xA5, "if_acmpne": 0xA6, "goto": 0xA7,
+    "ifnull": 0xC6, "ifnonnull": 0xC7,
+}
+
+FIELD_OPCODES = {"getstatic": 0xB2, "putstatic": 0xB3, "getfield": 0xB4, "putfield": 0xB5}
+
+INVOKE_OPCODES = {"invokevirtual": 0xB6, "invokespecial": 0xB7, "invokestatic": 0xB8}
+
+CLASS_OPCODES = {"new": 0xBB, "anewarray": 0xBD, "checkcast": 0xC0, "instanceof": 0xC1}
+
+NEWARRAY_TYPES = {
+    "boolean": 4, "char": 5, "float": 6, "double": 7,
+    "byte": 8, "short": 9, "int": 10, "long": 11,
+}
+
+OP_BIPUSH = 0x10
+OP_SIPUSH = 0x11
+OP_LDC = 0x12
+OP_LDC_W = 0x13
+OP_IINC = 0x84
+OP_NEWARRAY = 0xBC
+OP_WIDE = 0xC4
+OP_MULTIANEWARRAY = 0xC5
+
+ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f", '"': '"', "'": "'", "\\": "\\"}
+
+
+def encode_utf8(value: str) -> bytes:
+    """Encode a string in the JVM's modified UTF-8."""
+    result = bytearray()
+    for ch in value:
+        code = ord(ch)
+        if code > 0xFFFF:
+            # Supplementary characters are stored as a surrogate pair
+            code -= 0x10000
+            units = [0xD800 + (code >> 10), 0xDC00 + (code & 0x3FF)]
+        else:
+            units = [code]
+        for unit in units:
+            if 0 < unit < 0x80:
+                result.append(unit)
+            elif unit < 0x800:
+                result += bytes([0xC0 | (unit >> 6), 0x80 | (unit & 0x3F)])
+            else:
+                result += bytes([0xE0 | (unit >> 12), 0x80 | ((unit >> 6) & 0x3F), 0x80 | (unit & 0x3F)])
+    return bytes(result)
+
+
+def unquote(literal: str) -> str:
+    """Decode a quoted Jasmin string operand, e.g. "a\\tb"."""
+    if len(literal) < 2 or literal[0] != '"' or literal[-1] != '"':
+        raise IllegalOperandException(literal)
+    body = literal[1:-1]
+    result = []
+    i = 0
+    while i < len(body):
+        ch = body[i]
+        if ch != "\\" or i + 1 == len(body):
+            result.append(ch)
+            i += 1
+            continue
+        nxt = body[i + 1]
+        if nxt in ESCAPES:
+            result.append(ESCAPES[nxt])
+            i += 2
+        elif nxt == "u" and i + 6 <= len(body):
+            result.append(chr(int(body[i + 2:i + 6], 16)))
+            i += 6
+        elif nxt in "01234567":
+            j = i + 1
+            while j < len(body) and j < i + 4 and body[j] in "01234567":
+                j += 1
+            result.append(chr(int(body[i + 1:j], 8)))
+            i = j
+        else:
+            result.append(nxt)
+            i += 2
+    return "".join(result)
+
+
+def has_open_string(line: str) -> bool:
+    """Whether line ends inside a string constant."""
+    quoted = False
+    i = 0
+    while i < len(line):
+        if line[i] == "\\" and quoted:
+            i += 2
+            continue
+        if line[i] == '"':
+            quoted = not quoted
+        i += 1
+    return quoted
+
+
+def split_member(lexeme: str) -> Tuple[str, str]:
+    """Split "owner/name" into ("owner", "name")."""
+    idx = lexeme.rfind("/")
+    if idx <= 0:
+        raise IllegalOperandException(lexeme)
+    return lexeme[:idx], lexeme[idx + 1:]
+
+
+class ConstantPool:
+    """
+    Constant pool of a class file; equal constants share one entry.
+    """
+
+    def __init__(self):
+        self.entries: List[bytes] = []
+        self.index: Dict[tuple, int] = {}
+        self.count = 1
+
+    def _add(self, key: tuple, data: bytes) -> int:
+        found = self.index.get(key)
+        if found is not None:
+            return found
+        idx = self.count
+        self.entries.append(data)
+        self.index[key] = idx
+        self.count += 1
+        return idx
+
+    def utf8(self, value: str) -> int:
+        data = encode_utf8(value)
+        return self._add(("Utf8", value), struct.pack(">BH", 1, len(data)) + data)
+
+    def integer(self, value: int) -> int:
+        return self._add(("Integer", value), struct.pack(">Bi", 3, value))
+
+    def float(self, value: float) -> int:
+        data = struct.pack(">f", value)
+        return self._add(("Float", data), b"\x04" + data)
+
+    def string(self, value: str) -> int:
+        return self._add(("String", value), struct.pack(">BH", 8, self.utf8(value)))
+
+    def class_ref(self, name: str) -> int:
+        return self._add(("Class", name), struct.pack(">BH", 7, self.utf8(name)))
+
+    def name_and_type(self, name: str, desc: str) -> int:
+        return self._add(
+            ("NameAndType", name, desc), struct.pack(">BHH", 12, self.utf8(name), self.utf8(desc))
+        )
+
+    def field_ref(self, owner: str, name: str, desc: str) -> int:
+        return self._add(
+            ("Fieldref", owner, name, desc),
+            struct.pack(">BHH", 9, self.class_ref(owner), self.name_and_type(name, desc)),
+        )
+
+    def method_ref(self, owner: str, name: str, desc: str) -> int:
+        return self._add(
+            ("Methodref", owner, name, desc),
+            struct.pack(">BHH", 10, self.class_ref(owner), self.name_and_type(name, desc)),
+        )
+
+    def to_bytes(self) -> bytes:
+        return struct.pack(">H", self.count) + b"".join(self.entries)
+
+
+class MethodBuilder:
+    """
+    Code attribute of one method: bytecode, labels and local variables.
+    """
+
+    def __init__(self, access: int, name: str, desc: str):
+        self.access = access
+        self.name = name
+        self.desc = desc
+        self.code = bytearray()
+        self.labels: Dict[str, int] = {}
+        # (opcode position, operand position, label)
+        self.fixups: List[Tuple[int, int, str]] = []
+        # (index, name, descriptor, from label, to label)
+        self.local_vars: List[Tuple[int, str, str, str, str]] = []
+        self.max_stack = 0
+        self.max_locals = 0
+
+    def label(self, name: str) -> None:
+        self.labels[name] = len(self.code)
+
+    def branch(self, opcode: int, label: str) -> None:
+        pos = len(self.code)
+        self.code.append(opcode)
+        self.fixups.append((pos, len(self.code), label))
+        self.code += b"\x00\x00"
+
+    def local(self, opcode: int, index: int) -> None:
+        if index > 0xFF:
+            self.code += struct.pack(">BBH", OP_WIDE, opcode, index)
+        else:
+            self.code += bytes([opcode, index])
+
+    def resolve(self, label: str) -> int:
+        if label not in self.labels:
+            raise IllegalRuntimeException("Undefined label " + label + " in " + self.name)
+        return self.labels[label]
+
+    def to_bytes(self, pool: ConstantPool) -> bytes:
+        for pos, operand, label in self.fixups:
+            offset = self.resolve(label) - pos
+            if not -0x8000 <= offset <= 0x7FFF:
+                raise IllegalRuntimeException("Branch to " + label + " is out of range")
+            struct.pack_into(">h", self.code, operand, offset)
+
+        attributes = []
+        if self.local_vars:
+            table = bytearray()
+            for index, name, desc, start, end in self.local_vars:
+                start_pc = self.resolve(start)
+                table += struct.pack(
+                    ">HHHHH", start_pc, self.resolve(end) - start_pc,
+                    pool.utf8(name), pool.utf8(desc), index,
+                )
+            body = struct.pack(">H", len(self.local_vars)) + bytes(table)
+            attributes.append(struct.pack(">HI", pool.utf8("LocalVariableTable"), len(body)) + body)
+
+        code = (
+            struct.pack(">HHI", self.max_stack, self.max_locals, len(self.code))
+            + bytes(self.code)
+            + struct.pack(">HH", 0, len(attributes))
+            + b"".join(attributes)
+        )
+        return (
+            struct.pack(">HHHH", self.access, pool.utf8(self.name), pool.utf8(self.desc), 1)
+            + struct.pack(">HI", pool.utf8("Code"), len(code))
+            + code
+        )
+
+
+class ClassFileWriter:
+    """
+    Assemble the text produced through JasminCode into class file bytes.
+
+    Only the fixed layout JasminCode emits is understood: one directive,
+    label or instruction per line with operands separated by spaces.
+    """
+
+    def __init__(self):
+        self.pool = ConstantPool()
+        self.access = ACC_SUPER
+        self.this_class: Optional[str] = None
+        self.super_class = "java/lang/Object"
+        self.source: Optional[str] = None
+        self.fields: List[Tuple[int, str, str]] = []
+        self.methods: List[MethodBuilder] = []
+        self.method: Optional[MethodBuilder] = None
+
+    def assemble(self, text: str) -> bytes:
+        for line in self.lines(text):
+            line = line.strip()
+            if not line or line.startswith(";"):
+                continue
+            if line.startswith("."):
+                self.directive(line)
+            elif line.endswith(":"):
+                self.current().label(line[:-1])
+            else:
+                self.instruction(line)
+        return self.to_bytes()
+
+    @staticmethod
+    def lines(text: str):
+        """Split text into lines, keeping line breaks inside string constants."""
+        pending = None
+        for line in text.split("\n"):
+            if pending is not None:
+                line = pending + "\n" + line
+            if has_open_string(line):
+                pending = line
+                continue
+            pending = None
+            yield line
+        if pending is not None:
+            yield pending
+
+    def current(self) -> MethodBuilder:
+        if self.method is None:
+            raise IllegalRuntimeException("Instruction outside of a method")
+        return self.method
+
+    def directive(self, line: str) -> None:
+        parts = line.split()
+        name = parts[0]
+        if name == ".source":
+            self.source = parts[1]
+        elif name == ".class":
+            for flag in parts[1:-1]:
+                self.access |= ACCESS_FLAGS[flag]
+            self.this_class = parts[-1]
+        elif name == ".super":
+            self.super_class = parts[1]
+        elif name == ".field":
+            access = 0
+            for flag in parts[1:-2]:
+                access |= ACCESS_FLAGS[flag]
+            self.fields.append((access, parts[-2], parts[-1]))
+        elif name == ".method":
+            access = 0
+            for flag in parts[1:-1]:
+                access |= ACCESS_FLAGS[flag]
+            signature = parts[-1]
+            idx = signature.index("(")
+            self.method = MethodBuilder(access, signature[:idx], signature[idx:])
+        elif name == ".limit":
+            if parts[1] == "stack":
+                self.current().max_stack = int(parts[2])
+            else:
+                self.current().max_locals = int(parts[2])
+        elif name == ".var":
+            # .var <index> is <name> <descriptor> from <label> to <label>
+            self.current().local_vars.append(
+                (int(parts[1]), parts[3], parts[4], parts[6], parts[8])
+            )
+        elif name == ".end":
+            self.methods.append(self.current())
+            self.method = None
+        else:
+            raise IllegalOperandException(line)
+
+    def instruction(self, line: str) -> None:
+        method = self.current()
+        code = method.code
+        parts = line.split(None, 1)
+        op = parts[0]
+        arg = parts[1].strip() if len(parts) > 1 else ""
+
+        if op in SIMPLE_OPCODES:
+            code.append(SIMPLE_OPCODES[op])
+        elif op in LOCAL_OPCODES:
+            method.local(LOCAL_OPCODES[op], int(arg))
+        elif op in BRANCH_OPCODES:
+            method.branch(BRANCH_OPCODES[op], arg)
+        elif op == "bipush":
+            code += struct.pack(">Bb", OP_BIPUSH, int(arg))
+        elif op == "sipush":
+            code += struct.pack(">Bh", OP_SIPUSH, int(arg))
+        elif op == "ldc" or op == "ldc_w":
+            idx = self.constant(arg)
+            if idx > 0xFF:
+                code += struct.pack(">BH", OP_LDC_W, idx)
+            else:
+                code += bytes([OP_LDC, idx])
+        elif op == "iinc":
+            index, value = (int(x) for x in arg.split())
+            if index > 0xFF or not -128 <= value <= 127:
+                code += struct.pack(">BBHh", OP_WIDE, OP_IINC, index, value)
+            else:
+                code += struct.pack(">BBb", OP_IINC, index, value)
+        elif op in FIELD_OPCODES:
+            lexeme, desc = arg.split()
+            owner, name = split_member(lexeme)
+            code += struct.pack(">BH", FIELD_OPCODES[op], self.pool.field_ref(owner, name, desc))
+        elif op in INVOKE_OPCODES:
+            idx = arg.index("(")
+            owner, name = split_member(arg[:idx])
+            code += struct.pack(">BH", INVOKE_OPCODES[op], self.pool.method_ref(owner, name, arg[idx:]))
+        elif op in CLASS_OPCODES:
+            code += struct.pack(">BH", CLASS_OPCODES[op], self.pool.class_ref(arg))
+        elif op == "newarray":
+            if arg not in NEWARRAY_TYPES:
+                raise IllegalOperandException(arg)
+            code += bytes([OP_NEWARRAY, NEWARRAY_TYPES[arg]])
+        elif op == "multianewarray":
+            typ, dims = arg.split()
+            code += struct.pack(">BHB", OP_MULTIANEWARRAY, self.pool.class_ref(typ), int(dims))
+        else:
+            raise IllegalOperandException(line)
+
+    def constant(self, arg: str) -> int:
+        if arg.startswith('"'):
+            return self.pool.string(unquote(arg))
+        if any(c in arg for c in ".eE") or arg in ("NaN", "Infinity", "-Infinity"):
+            return self.pool.float(float(arg))
+        return self.pool.integer(int(arg))
+
+    def to_bytes(self) -> bytes:
+        if self.this_class is None:
+            raise IllegalRuntimeException("Missing .class directive")
+        this_idx = self.pool.class_ref(self.this_class)
+        super_idx = self.pool.class_ref(self.super_class)
+
+        fields = b"".join(
+            struct.pack(">HHHH", access, self.pool.utf8(name), self.pool.utf8(desc), 0)
+            for access, name, desc in self.fields
+        )
+        methods = b"".join(method.to_bytes(self.pool) for method in self.methods)
+        attributes = []
+        if self.source is not None:
+            attributes.append(
+                struct.pack(">HIH", self.pool.utf8("SourceFile"), 2, self.pool.utf8(self.source))
+            )
+
+        # The pool must be complete before it is written out
+        return (
+            struct.pack(">IHH", 0xCAFEBABE, MINOR_VERSION, MAJOR_VERSION)
+            + self.pool.to_bytes()
+            + struct.pack(">HHHH", self.access, this_idx, super_idx, 0)
+            + struct.pack(">H", len(self.fields)) + fields
+            + struct.pack(">H", len(self.methods)) + methods
+            + struct.pack(">H", len(attributes)) + b"".join(attributes)
+        )
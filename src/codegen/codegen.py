@@ -10,24 +10,48 @@ from ..utils.nodes import *
 from .emitter import Emitter
 from .frame import Frame
 from .error import IllegalOperandException, IllegalRuntimeException
-from .io import IO_SYMBOL_LIST
+from .io import IO_SYMBOLS, IO_SCOPE
 from .utils import *
+from ..utils.constant_eval import NOT_CONSTANT, ConstantEvaluator, converted
+from .folding import ConstantFolder
+from .peephole import PeepholeOptimizer
+from .flow import completes_normally, constant_condition, dead_default_stores, reachable_statements
 from functools import *
 
 
+COMPARISON_OPS = ("<", "<=", ">", ">=", "==", "!=")
+# Operators compiled by compile_condition
+CONDITION_OPS = COMPARISON_OPS + ("&&", "||")
+
+
 class CodeGenerator(ASTVisitor):
     """
     Code generator for OPLang.
     Traverses AST and generates JVM bytecode.
     """
+
+    # Run ConstantFolder over the program before generating code
+    fold_constants = True
+    # Run a PeepholeOptimizer over each generated method
+    use_peephole = True
     
-    def __init__(self):
+    def __init__(self, backend: str = "jasmin", output=None):
+        # backend: "jasmin" writes .j files, "class" writes .class files
+        # output: directory or dict sink for the generated files (see Emitter)
+        self.backend = backend
+        self.output = output
         self.current_class = None
         self.emit = None
         self.current_superclass = None
         # Global Symbol Tables to track Class Definitions
         self.class_fields = {}
         self.class_methods = {}
+        # Shared by the emitters of all classes, so its hits cover the program
+        self.peephole = PeepholeOptimizer() if self.use_peephole else None
+        # Locals of the block being generated whose default value is never read
+        self.dead_defaults = set()
+        # Class -> final attribute -> compile-time value
+        self.class_constants = {}
 
     def sanitize_type(self, t):
         """
@@ -69,6 +93,9 @@ class CodeGenerator(ASTVisitor):
     # ============================================================================
 
     def visit_program(self, node: "Program", o: Any = None):
+        if self.fold_constants:
+            ConstantFolder().visit(node)
+
         # Phase 1: Pre-scan all classes to build Symbol Tables
         for class_decl in node.class_decls:
             c_name = class_decl.name
@@ -79,6 +106,8 @@ class CodeGenerator(ASTVisitor):
                 if isinstance(member, AttributeDecl):
                     for attr in member.attributes:
                         self.class_fields[c_name][attr.name] = self.sanitize_type(member.attr_type)
+                    if member.is_final:
+                        self.scan_constants(c_name, member)
                 elif isinstance(member, MethodDecl):
                     self.class_methods[c_name][member.name] = self.sanitize_type(member.return_type)
 
@@ -87,11 +116,68 @@ class CodeGenerator(ASTVisitor):
             self.visit(class_decl, o)
         
 
+    def scan_constants(self, class_name: str, node: "AttributeDecl"):
+        """Record the values of the constant final attributes of node."""
+        constants = self.class_constants.setdefault(class_name, {})
+        for attr in node.attributes:
+            if attr.init_value is None:
+                continue
+            # The checker attaches the value; evaluate here for unchecked ASTs
+            value = getattr(attr, "constant", NOT_CONSTANT)
+            if value is NOT_CONSTANT:
+                value = self.constant_value(attr.init_value, IO_SCOPE, class_name, node.attr_type)
+            if value is not NOT_CONSTANT:
+                constants[attr.name] = value
+
+    def constant_value(self, expr, sym: SymbolTable, class_name: str, typ) -> Any:
+        """Value expr stores into a variable of type typ, or NOT_CONSTANT."""
+        value = ConstantEvaluator(lambda e: self.named_constant(e, sym, class_name)).evaluate(expr)
+        if value is NOT_CONSTANT:
+            return value
+        return converted(value, "float" if self.is_float(typ) else None)
+
+    def named_constant(self, expr, sym: SymbolTable, class_name: str) -> Any:
+        """Value of a final local, this.x, A.x or x attribute, or NOT_CONSTANT."""
+        if isinstance(expr, Identifier):
+            local = sym.lookup(expr.name)
+            if local is not None:
+                return getattr(local, "constant", NOT_CONSTANT)
+            return self.class_constants.get(class_name, {}).get(expr.name, NOT_CONSTANT)
+        if isinstance(expr, PostfixExpression) and len(expr.postfix_ops) == 1 \
+                and isinstance(expr.postfix_ops[0], MemberAccess):
+            if isinstance(expr.primary, ThisExpression):
+                owner = class_name
+            elif isinstance(expr.primary, Identifier) and sym.lookup(expr.primary.name) is None:
+                owner = expr.primary.name
+            else:
+                return NOT_CONSTANT
+            return self.class_constants.get(owner, {}).get(expr.postfix_ops[0].member_name, NOT_CONSTANT)
+        return NOT_CONSTANT
+
+    def emit_constant(self, value, frame):
+        """Code pushing a compile-time value, and its type."""
+        if type(value) is bool:
+            return self.emit.emit_push_iconst(1 if value else 0, frame), PrimitiveType("boolean")
+        if type(value) is int:
+            return self.emit.emit_push_iconst(value, frame), PrimitiveType("int")
+        if type(value) is float:
+            if value in (0.0, 1.0, 2.0) and str(value)[0] != "-":
+                frame.push()
+                return self.emit.jvm.emitFCONST(str(value)), PrimitiveType("float")
+            # ldc takes the exact value; Jasmin wants "1.0e-05", not "1e-05"
+            mantissa, _, exponent = repr(value).partition("e")
+            if "." not in mantissa:
+                mantissa += ".0"
+            text = mantissa + ("e" + exponent.lstrip("+") if exponent else "")
+            frame.push()
+            return self.emit.jvm.emitLDC(text), PrimitiveType("float")
+        return self.emit.emit_push_const('"' + value + '"', PrimitiveType("string"), frame), PrimitiveType("string")
+
     def visit_class_decl(self, node: "ClassDecl", o: Any = None):
         self.current_class = node.name
         self.current_superclass = node.superclass if node.superclass else "java/lang/Object"
         class_file = node.name + ".j"
-        self.emit = Emitter(class_file)
+        self.emit = Emitter(class_file, self.backend, self.output, self.peephole)
         
         # Cache static methods for return type inference within current class
         self.user_static_methods = {}
@@ -125,8 +211,8 @@ class CodeGenerator(ASTVisitor):
 
             for attr, attr_type in static_init_stmts:
                 # Compile init expression
-                # Note: Static context does not have 'this', use IO_SYMBOL_LIST for globals
-                code, typ = self.visit(attr.init_value, Access(frame, IO_SYMBOL_LIST))
+                # Note: Static context does not have 'this', use IO_SCOPE for globals
+                code, typ = self.visit(attr.init_value, Access(frame, IO_SCOPE))
                 self.emit.print_out(code)
 
                 # Type coercion (e.g., int -> float)
@@ -221,15 +307,15 @@ class CodeGenerator(ASTVisitor):
         this_idx = frame.get_new_index()
         self.emit.print_out(self.emit.emit_var(this_idx, "this", ClassType(self.current_class), from_label, to_label))
         
-        sym_list = [Symbol("this", ClassType(self.current_class), Index(this_idx))]
+        symbols = IO_SCOPE.child()
+        symbols.declare(Symbol("this", ClassType(self.current_class), Index(this_idx)))
         
         for param in node.params:
             idx = frame.get_new_index()
             safe_type = self.sanitize_type(param.param_type)
             self.emit.print_out(self.emit.emit_var(idx, param.name, safe_type, from_label, to_label))
-            sym_list.append(Symbol(param.name, safe_type, Index(idx)))
+            symbols.declare(Symbol(param.name, safe_type, Index(idx)))
             
-        sym_list = IO_SYMBOL_LIST + sym_list
         
         self.emit.print_out(self.emit.emit_label(from_label, frame))
         
@@ -241,10 +327,11 @@ class CodeGenerator(ASTVisitor):
             FunctionType([], PrimitiveType("void"))
         ))
         
-        o = SubBody(frame, sym_list)
+        o = SubBody(frame, symbols)
         self.visit(node.body, o)
         
-        self.emit.print_out(self.emit.emit_return(PrimitiveType("void"), frame))
+        if completes_normally(node.body):
+            self.emit.print_out(self.emit.emit_return(PrimitiveType("void"), frame))
         self.emit.print_out(self.emit.emit_label(to_label, frame))
         self.emit.print_out(self.emit.emit_end_method(frame))
         frame.exit_scope()
@@ -261,15 +348,16 @@ class CodeGenerator(ASTVisitor):
         
         this_idx = frame.get_new_index()
         self.emit.print_out(self.emit.emit_var(this_idx, "this", ClassType(self.current_class), from_label, to_label))
-        sym_list = [Symbol("this", ClassType(self.current_class), Index(this_idx))]
-        sym_list = IO_SYMBOL_LIST + sym_list
+        symbols = IO_SCOPE.child()
+        symbols.declare(Symbol("this", ClassType(self.current_class), Index(this_idx)))
         
         self.emit.print_out(self.emit.emit_label(from_label, frame))
         
-        o = SubBody(frame, sym_list)
+        o = SubBody(frame, symbols)
         self.visit(node.body, o)
         
-        self.emit.print_out(self.emit.emit_return(PrimitiveType("void"), frame))
+        if completes_normally(node.body):
+            self.emit.print_out(self.emit.emit_return(PrimitiveType("void"), frame))
         self.emit.print_out(self.emit.emit_label(to_label, frame))
         self.emit.print_out(self.emit.emit_end_method(frame))
         frame.exit_scope()
@@ -301,38 +389,38 @@ class CodeGenerator(ASTVisitor):
         if is_main:
             frame.get_new_index() 
         
-        sym_list = []
+        symbols = IO_SCOPE.child()
         if not is_static:
             this_idx = frame.get_new_index()
             self.emit.print_out(self.emit.emit_var(this_idx, "this", ClassType(class_name), from_label, to_label))
-            sym_list.append(Symbol("this", ClassType(class_name), Index(this_idx)))
+            symbols.declare(Symbol("this", ClassType(class_name), Index(this_idx)))
         
         for param in node.params:
             idx = frame.get_new_index()
             safe_type = self.sanitize_type(param.param_type)
             self.emit.print_out(self.emit.emit_var(idx, param.name, safe_type, from_label, to_label))
-            sym_list.append(Symbol(param.name, safe_type, Index(idx)))
+            symbols.declare(Symbol(param.name, safe_type, Index(idx)))
         
-        sym_list = IO_SYMBOL_LIST + sym_list
         self.emit.print_out(self.emit.emit_label(from_label, frame))
         
-        o = SubBody(frame, sym_list)
+        o = SubBody(frame, symbols)
         self.visit(node.body, o)
         
-        # Ensure return
+        # Ensure return, unless every path has returned already
         self.emit.print_out(self.emit.emit_label(to_label, frame))
         
-        if self.is_void(return_type):
-            self.emit.print_out(self.emit.emit_return(return_type, frame))
-        else:
-            if self.is_int(return_type) or self.is_bool(return_type):
-                self.emit.print_out(self.emit.emit_push_iconst(0, frame))
-            elif self.is_float(return_type):
-                self.emit.print_out(self.emit.emit_push_fconst("0.0", frame))
+        if completes_normally(node.body):
+            if self.is_void(return_type):
+                self.emit.print_out(self.emit.emit_return(return_type, frame))
             else:
-                self.emit.print_out(self.emit.jvm.emitPUSHNULL())
-                frame.push()
-            self.emit.print_out(self.emit.emit_return(return_type, frame))
+                if self.is_int(return_type) or self.is_bool(return_type):
+                    self.emit.print_out(self.emit.emit_push_iconst(0, frame))
+                elif self.is_float(return_type):
+                    self.emit.print_out(self.emit.emit_push_fconst("0.0", frame))
+                else:
+                    self.emit.print_out(self.emit.jvm.emitPUSHNULL())
+                    frame.push()
+                self.emit.print_out(self.emit.emit_return(return_type, frame))
 
         self.emit.print_out(self.emit.emit_end_method(frame))
         frame.exit_scope()
@@ -359,9 +447,13 @@ class CodeGenerator(ASTVisitor):
 
     def visit_block_statement(self, node: "BlockStatement", o: SubBody = None):
         if o is None: return
+        # The block's own scope; its declarations go out of scope with it
+        o = SubBody(o.frame, o.sym.child())
+        self.dead_defaults = dead_default_stores(node)
         for var_decl in node.var_decls:
             o = self.visit(var_decl, o)
-        for stmt in node.statements:
+        # Nothing after a return, break or continue can run
+        for stmt in reachable_statements(node.statements):
             self.visit(stmt, o)
 
     def visit_variable_decl(self, node: "VariableDecl", o: SubBody = None):
@@ -369,22 +461,30 @@ class CodeGenerator(ASTVisitor):
         frame = o.frame
         from_label = frame.get_start_label()
         to_label = frame.get_end_label()
-        new_sym = []
         safe_var_type = self.sanitize_type(node.var_type)
         
         for var in node.variables:
             idx = frame.get_new_index()
             self.emit.print_out(self.emit.emit_var(idx, var.name, safe_var_type, from_label, to_label))
-            new_sym.append(Symbol(var.name, safe_var_type, Index(idx)))
+            value = NOT_CONSTANT
+            if node.is_final and var.init_value is not None:
+                # The checker attaches the value; evaluate here for unchecked ASTs
+                value = getattr(var, "constant", NOT_CONSTANT)
+                if value is NOT_CONSTANT:
+                    value = self.constant_value(var.init_value, o.sym, self.current_class, safe_var_type)
             
-            if var.init_value is not None:
+            if value is not NOT_CONSTANT:
+                code, typ = self.emit_constant(value, frame)
+                self.emit.print_out(code)
+                self.emit.print_out(self.emit.emit_write_var(var.name, safe_var_type, idx, frame))
+            elif var.init_value is not None:
                 code, typ = self.visit(var.init_value, Access(frame, o.sym))
                 self.emit.print_out(code)
                 if self.is_float(safe_var_type) and self.is_int(typ):
                     self.emit.print_out(self.emit.emit_i2f(frame))
                 self.emit.print_out(self.emit.emit_write_var(var.name, safe_var_type, idx, frame))
-            else:
-                # [FIX START] Default Initialization
+            elif var.name not in self.dead_defaults:
+                # [FIX START] Default Initialization (skipped when assigned before any read)
                 if self.is_int(safe_var_type) or self.is_bool(safe_var_type):
                     self.emit.print_out(self.emit.emit_push_iconst(0, frame))
                     self.emit.print_out(self.emit.emit_write_var(var.name, safe_var_type, idx, frame))
@@ -406,8 +506,10 @@ class CodeGenerator(ASTVisitor):
                     frame.push() # [Important] Update frame tracking for null
                     self.emit.print_out(self.emit.emit_write_var(var.name, safe_var_type, idx, frame))
                 # [FIX END]
+            # In scope from the next variable on; its own initializer sees the enclosing one
+            o.sym.declare(Symbol(var.name, safe_var_type, Index(idx), value))
         
-        return SubBody(frame, new_sym + o.sym)
+        return o
 
     def visit_variable(self, node: "Variable", o: Any = None):
         pass
@@ -418,7 +520,7 @@ class CodeGenerator(ASTVisitor):
         self.emit.print_out(rhs_code)
         
         if isinstance(node.lhs, IdLHS):
-             sym = next(filter(lambda x: x.name == node.lhs.name, o.sym), None)
+             sym = o.sym.lookup(node.lhs.name)
              if sym and self.is_float(sym.type) and self.is_int(rhs_type):
                  self.emit.print_out(self.emit.emit_i2f(o.frame))
         
@@ -428,15 +530,22 @@ class CodeGenerator(ASTVisitor):
     def visit_if_statement(self, node: "IfStatement", o: SubBody = None):
         if o is None: return
         frame = o.frame
+        # Only one branch of if (true) / if (false) can run
+        value = constant_condition(node.condition)
+        if value is not None:
+            branch = node.then_stmt if value else node.else_stmt
+            if branch:
+                self.visit(branch, o)
+            return
+
         label_else = frame.get_new_label()
         label_exit = frame.get_new_label()
 
-        cond_code, _ = self.visit(node.condition, Access(frame, o.sym))
-        self.emit.print_out(cond_code)
-        self.emit.print_out(self.emit.emit_if_false(label_else, frame))
+        self.compile_condition(node.condition, None, label_else, Access(frame, o.sym))
 
         self.visit(node.then_stmt, o)
-        self.emit.print_out(self.emit.emit_goto(label_exit, frame))
+        if completes_normally(node.then_stmt):
+            self.emit.print_out(self.emit.emit_goto(label_exit, frame))
 
         self.emit.print_out(self.emit.emit_label(label_else, frame))
         if node.else_stmt:
@@ -447,44 +556,72 @@ class CodeGenerator(ASTVisitor):
     def visit_for_statement(self, node: "ForStatement", o: SubBody = None):
         if o is None: return
         frame = o.frame
-        sym = next(filter(lambda x: x.name == node.variable, o.sym), None)
-        
+        sym = o.sym.lookup(node.variable)
+        index = sym.value.value
+        step = 1 if node.direction == "to" else -1
+
         start_code, _ = self.visit(node.start_expr, Access(frame, o.sym))
         self.emit.print_out(start_code)
-        self.emit.print_out(self.emit.emit_write_var(sym.name, sym.type, sym.value.value, frame))
+        self.emit.print_out(self.emit.emit_write_var(sym.name, sym.type, index, frame))
+
+        # The bound is tested after every iteration; when the body cannot
+        # change it, compute it once (or load it directly) instead
+        invariant = self.is_loop_invariant(node.end_expr, assigned_locals(node.body) | {node.variable}, o.sym)
+        end_value = self.constant_value(node.end_expr, o.sym, self.current_class, PrimitiveType("int"))
+        hoisted = invariant and end_value is NOT_CONSTANT and not isinstance(node.end_expr, Identifier)
+        if hoisted:
+            bound = frame.get_new_index()
+            end_code, _ = self.visit(node.end_expr, Access(frame, o.sym))
+            self.emit.print_out(end_code)
+            self.emit.print_out(self.emit.emit_write_var("", PrimitiveType("int"), bound, frame))
 
         frame.enter_loop()
-        label_start = frame.get_new_label()
+        label_body = frame.get_new_label()
+        label_test = frame.get_new_label()
         label_continue = frame.get_continue_label()
         label_break = frame.get_break_label()
-        
-        self.emit.print_out(self.emit.emit_label(label_start, frame))
-        
-        self.emit.print_out(self.emit.emit_read_var(sym.name, sym.type, sym.value.value, frame))
-        end_code, _ = self.visit(node.end_expr, Access(frame, o.sym))
-        self.emit.print_out(end_code)
-        
-        if node.direction == "to":
-            self.emit.print_out(self.emit.emit_ificmpgt(label_break, frame))
-        else:
-            self.emit.print_out(self.emit.emit_ificmplt(label_break, frame))
-            
+
+        # Bottom-tested: enter at the test, unless the first one is known to pass
+        start_value = self.constant_value(node.start_expr, o.sym, self.current_class, PrimitiveType("int"))
+        if NOT_CONSTANT in (start_value, end_value) or (end_value - start_value) * step < 0:
+            self.emit.print_out(self.emit.emit_goto(label_test, frame))
+        self.emit.print_out(self.emit.emit_label(label_body, frame))
+
         self.visit(node.body, o)
-        
+
         self.emit.print_out(self.emit.emit_label(label_continue, frame))
-        
-        self.emit.print_out(self.emit.emit_read_var(sym.name, sym.type, sym.value.value, frame))
-        self.emit.print_out(self.emit.emit_push_iconst(1, frame))
-        if node.direction == "to":
-            self.emit.print_out(self.emit.emit_add_op("+", PrimitiveType("int"), frame))
+        self.emit.print_out(self.emit.emit_iinc(index, step, frame))
+        self.emit.print_out(self.emit.emit_label(label_test, frame))
+        self.emit.print_out(self.emit.emit_read_var(sym.name, sym.type, index, frame))
+        if end_value is not NOT_CONSTANT:
+            end_code, _ = self.emit_constant(end_value, frame)
+        elif hoisted:
+            end_code = self.emit.emit_read_var("", PrimitiveType("int"), bound, frame)
         else:
-            self.emit.print_out(self.emit.emit_add_op("-", PrimitiveType("int"), frame))
-        self.emit.print_out(self.emit.emit_write_var(sym.name, sym.type, sym.value.value, frame))
-        
-        self.emit.print_out(self.emit.emit_goto(label_start, frame))
+            end_code, _ = self.visit(node.end_expr, Access(frame, o.sym))
+        self.emit.print_out(end_code)
+        self.emit.print_out(self.emit.emit_if_compare("<=" if step == 1 else ">=", PrimitiveType("int"), label_body, frame))
         self.emit.print_out(self.emit.emit_label(label_break, frame))
         frame.exit_loop()
 
+    def is_loop_invariant(self, expr: "Expr", assigned: set, sym: SymbolTable) -> bool:
+        """Whether expr has the same value whenever a loop assigning only the
+        locals named in assigned tests it."""
+        if isinstance(expr, (IntLiteral, FloatLiteral, BoolLiteral, StringLiteral)):
+            return True
+        if isinstance(expr, Identifier):
+            if sym.lookup(expr.name) is not None:
+                return expr.name not in assigned
+            return self.named_constant(expr, sym, self.current_class) is not NOT_CONSTANT
+        if isinstance(expr, ParenthesizedExpression):
+            return self.is_loop_invariant(expr.expr, assigned, sym)
+        if isinstance(expr, UnaryOp):
+            return self.is_loop_invariant(expr.operand, assigned, sym)
+        if isinstance(expr, BinaryOp):
+            return self.is_loop_invariant(expr.left, assigned, sym) and self.is_loop_invariant(expr.right, assigned, sym)
+        # Fields, array elements and calls can change under the body
+        return self.named_constant(expr, sym, self.current_class) is not NOT_CONSTANT
+
     def visit_break_statement(self, node: "BreakStatement", o: SubBody = None):
         if o is None: return
         self.emit.print_out(self.emit.emit_goto(o.frame.get_break_label(), o.frame))
@@ -517,7 +654,7 @@ class CodeGenerator(ASTVisitor):
 
     def visit_id_lhs(self, node: "IdLHS", o: Access = None):
         if o is None: return "", None
-        sym = next(filter(lambda x: x.name == node.name, o.sym), None)
+        sym = o.sym.lookup(node.name)
         
         if type(sym.value) is Index:
             code = self.emit.emit_write_var(sym.name, sym.type, sym.value.value, o.frame)
@@ -570,6 +707,38 @@ class CodeGenerator(ASTVisitor):
     # ============================================================================
 
     def visit_binary_op(self, node: "BinaryOp", o: Access = None):
+        op = node.operator
+        if op in CONDITION_OPS:
+            return self.materialize_condition(node, o)
+
+        left_type, right_type = self.emit_operands(node, o)
+
+        if op == "^" and self.is_string(left_type) and self.is_string(right_type):
+            self.emit.print_out(self.emit.jvm.emitINVOKEVIRTUAL("java/lang/String/concat", "(Ljava/lang/String;)Ljava/lang/String;"))
+            o.frame.pop(); o.frame.pop(); o.frame.push()
+            return "", PrimitiveType("string")
+
+        res_type = left_type
+        if self.is_float(left_type) or self.is_float(right_type) or op == '/':
+            res_type = PrimitiveType("float")
+        
+        if op in ['+', '-']: return self.emit.emit_add_op(op, res_type, o.frame), res_type
+        elif op in ['*', '/']: return self.emit.emit_mul_op(op, res_type, o.frame), res_type
+        
+        # [FIX HERE] Thủ công push vào frame cho phép chia nguyên và chia dư
+        elif op == '\\': 
+             code = self.emit.emit_div(o.frame)
+             o.frame.push() 
+             return code, PrimitiveType("int")
+        elif op == '%': 
+             code = self.emit.emit_mod(o.frame)
+             o.frame.push() 
+             return code, PrimitiveType("int")
+        
+        return "", res_type
+
+    def emit_operands(self, node: "BinaryOp", o: Access):
+        """Push both operands, converting them as op needs; returns their types."""
         op = node.operator
         left_code, left_type = self.visit(node.left, o)
         self.emit.print_out(left_code)
@@ -578,30 +747,6 @@ class CodeGenerator(ASTVisitor):
             self.emit.print_out(self.emit.emit_i2f(o.frame))
             left_type = PrimitiveType("float")
 
-        if op == "&&":
-            label_false = o.frame.get_new_label()
-            label_end = o.frame.get_new_label()
-            self.emit.print_out(self.emit.emit_if_false(label_false, o.frame))
-            right_code, _ = self.visit(node.right, o)
-            self.emit.print_out(right_code)
-            self.emit.print_out(self.emit.emit_goto(label_end, o.frame))
-            self.emit.print_out(self.emit.emit_label(label_false, o.frame))
-            self.emit.print_out(self.emit.emit_push_iconst(0, o.frame))
-            self.emit.print_out(self.emit.emit_label(label_end, o.frame))
-            return "", PrimitiveType("boolean")
-
-        elif op == "||":
-            label_true = o.frame.get_new_label()
-            label_end = o.frame.get_new_label()
-            self.emit.print_out(self.emit.emit_if_true(label_true, o.frame))
-            right_code, _ = self.visit(node.right, o)
-            self.emit.print_out(right_code)
-            self.emit.print_out(self.emit.emit_goto(label_end, o.frame))
-            self.emit.print_out(self.emit.emit_label(label_true, o.frame))
-            self.emit.print_out(self.emit.emit_push_iconst(1, o.frame))
-            self.emit.print_out(self.emit.emit_label(label_end, o.frame))
-            return "", PrimitiveType("boolean")
-
         right_code, right_type = self.visit(node.right, o)
         self.emit.print_out(right_code)
         
@@ -617,52 +762,93 @@ class CodeGenerator(ASTVisitor):
             self.emit.print_out(self.emit.emit_i2f(o.frame))
             self.emit.print_out(self.emit.jvm.INDENT + "swap" + self.emit.jvm.END)
             left_type = PrimitiveType("float")
+        return left_type, right_type
 
-        if self.is_string(left_type) and self.is_string(right_type):
-            if op == "==":
-                self.emit.print_out(self.emit.emit_invoke_virtual("java/lang/String/equals", FunctionType([ClassType("java/lang/Object")], PrimitiveType("boolean")), o.frame))
-                return "", PrimitiveType("boolean")
-            elif op == "!=":
-                self.emit.print_out(self.emit.emit_invoke_virtual("java/lang/String/equals", FunctionType([ClassType("java/lang/Object")], PrimitiveType("boolean")), o.frame))
-                self.emit.print_out(self.emit.emit_push_iconst(1, o.frame))
-                self.emit.print_out(self.emit.jvm.emitIXOR())
-                o.frame.pop(); o.frame.pop(); o.frame.push()
-                return "", PrimitiveType("boolean")
-            elif op == "^":
-                self.emit.print_out(self.emit.jvm.emitINVOKEVIRTUAL("java/lang/String/concat", "(Ljava/lang/String;)Ljava/lang/String;"))
-                o.frame.pop(); o.frame.pop(); o.frame.push()
-                return "", PrimitiveType("string")
+    # ============================================================================
+    # Conditions
+    # ============================================================================
 
-        res_type = left_type
-        if self.is_float(left_type) or self.is_float(right_type) or op == '/':
-            res_type = PrimitiveType("float")
-        
-        if op in ['+', '-']: return self.emit.emit_add_op(op, res_type, o.frame), res_type
-        elif op in ['*', '/']: return self.emit.emit_mul_op(op, res_type, o.frame), res_type
-        
-        # [FIX HERE] Thủ công push vào frame cho phép chia nguyên và chia dư
-        elif op == '\\': 
-             code = self.emit.emit_div(o.frame)
-             o.frame.push() 
-             return code, PrimitiveType("int")
-        elif op == '%': 
-             code = self.emit.emit_mod(o.frame)
-             o.frame.push() 
-             return code, PrimitiveType("int")
-        
-        # [FIX HERE] Thủ công push vào frame cho phép so sánh
-        elif op in ['>', '<', '>=', '<=', '!=', '==']: 
-            code = self.emit.emit_re_op(op, res_type, o.frame)
-            o.frame.push() # Giả định kết quả là boolean (1 phần tử trên stack)
-            return code, PrimitiveType("boolean")
-        
-        return "", res_type
+    def compile_condition(self, expr: "Expr", true_label: Optional[int], false_label: Optional[int], o: Access):
+        """
+        Emit code that jumps to true_label if the boolean expr holds and to
+        false_label if not. A label may be None (not both): that outcome
+        falls through to the code emitted next. Comparisons become a single
+        conditional jump, and &&, || and ! become chains of jumps.
+        """
+        frame = o.frame
+        if isinstance(expr, ParenthesizedExpression):
+            return self.compile_condition(expr.expr, true_label, false_label, o)
+        if isinstance(expr, BoolLiteral):
+            target = true_label if expr.value else false_label
+            if target is not None:
+                self.emit.print_out(self.emit.emit_goto(target, frame))
+            return
+        if isinstance(expr, UnaryOp) and expr.operator == "!":
+            return self.compile_condition(expr.operand, false_label, true_label, o)
+
+        op = expr.operator if isinstance(expr, BinaryOp) else None
+        if op == "&&":
+            end_label = frame.get_new_label() if false_label is None else None
+            self.compile_condition(expr.left, None, false_label if end_label is None else end_label, o)
+            self.compile_condition(expr.right, true_label, false_label, o)
+            if end_label is not None:
+                self.emit.print_out(self.emit.emit_label(end_label, frame))
+        elif op == "||":
+            end_label = frame.get_new_label() if true_label is None else None
+            self.compile_condition(expr.left, true_label if end_label is None else end_label, None, o)
+            self.compile_condition(expr.right, true_label, false_label, o)
+            if end_label is not None:
+                self.emit.print_out(self.emit.emit_label(end_label, frame))
+        elif op in COMPARISON_OPS:
+            left_type, right_type = self.emit_operands(expr, o)
+            if self.is_string(left_type) and self.is_string(right_type):
+                # Only == and != apply to strings: test String.equals
+                self.emit.print_out(self.emit.emit_invoke_virtual("java/lang/String/equals", FunctionType([ClassType("java/lang/Object")], PrimitiveType("boolean")), frame))
+                if op == "!=":
+                    true_label, false_label = false_label, true_label
+                self.jump_on_value(true_label, false_label, frame)
+            else:
+                typ = PrimitiveType("float") if self.is_float(left_type) or self.is_float(right_type) else left_type
+                if true_label is not None:
+                    self.emit.print_out(self.emit.emit_if_compare(op, typ, true_label, frame))
+                    if false_label is not None:
+                        self.emit.print_out(self.emit.emit_goto(false_label, frame))
+                else:
+                    self.emit.print_out(self.emit.emit_if_compare(op, typ, false_label, frame, negate=True))
+        else:
+            code, _ = self.visit(expr, o)
+            self.emit.print_out(code)
+            self.jump_on_value(true_label, false_label, frame)
+
+    def jump_on_value(self, true_label: Optional[int], false_label: Optional[int], frame):
+        """Branch on the boolean on top of the stack (see compile_condition)."""
+        if true_label is not None:
+            self.emit.print_out(self.emit.emit_if_true(true_label, frame))
+            if false_label is not None:
+                self.emit.print_out(self.emit.emit_goto(false_label, frame))
+        else:
+            self.emit.print_out(self.emit.emit_if_false(false_label, frame))
+
+    def materialize_condition(self, expr: "Expr", o: Access):
+        """Push 1 if the boolean expr holds, else 0."""
+        frame = o.frame
+        false_label = frame.get_new_label()
+        end_label = frame.get_new_label()
+        self.compile_condition(expr, None, false_label, o)
+        self.emit.print_out(self.emit.emit_push_iconst(1, frame))
+        self.emit.print_out(self.emit.emit_goto(end_label, frame))
+        frame.pop()
+        self.emit.print_out(self.emit.emit_label(false_label, frame))
+        self.emit.print_out(self.emit.emit_push_iconst(0, frame))
+        self.emit.print_out(self.emit.emit_label(end_label, frame))
+        return "", PrimitiveType("boolean")
 
     def visit_unary_op(self, node: "UnaryOp", o: Access = None):
+        if node.operator == '!':
+            return self.materialize_condition(node, o)
         body_code, typ = self.visit(node.operand, o)
         self.emit.print_out(body_code)
         if node.operator == '-': return self.emit.emit_neg_op(typ, o.frame), typ
-        elif node.operator == '!': return self.emit.emit_not(typ, o.frame), typ
         return "", typ
 
     def visit_postfix_expression(self, node: "PostfixExpression", o: Access = None):
@@ -689,7 +875,7 @@ class CodeGenerator(ASTVisitor):
                     arg_types.append(arg_type)
                 
                 if is_static_access:
-                    found_sym = next((s for s in IO_SYMBOL_LIST if s.name == op.method_name), None)
+                    found_sym = IO_SYMBOLS.get(op.method_name)
                     if found_sym:
                         ret_type = found_sym.type.return_type
                     else:
@@ -727,7 +913,11 @@ class CodeGenerator(ASTVisitor):
                      if class_name_for_static in self.class_fields:
                          field_type = self.class_fields[class_name_for_static].get(op.member_name, field_type)
                      
-                     self.emit.print_out(self.emit.emit_get_static(class_name_for_static + "/" + op.member_name, field_type, o.frame))
+                     value = self.class_constants.get(class_name_for_static, {}).get(op.member_name, NOT_CONSTANT)
+                     if value is not NOT_CONSTANT:
+                         self.emit.print_out(self.emit_constant(value, o.frame)[0])
+                     else:
+                         self.emit.print_out(self.emit.emit_get_static(class_name_for_static + "/" + op.member_name, field_type, o.frame))
                      is_static_access = False
                      current_type = field_type
                 else:
@@ -769,7 +959,9 @@ class CodeGenerator(ASTVisitor):
 
     def visit_identifier(self, node: "Identifier", o: Access = None):
         if o is None: return "", None
-        sym = next(filter(lambda x: x.name == node.name, o.sym), None)
+        sym = o.sym.lookup(node.name)
+        if sym and getattr(sym, "constant", NOT_CONSTANT) is not NOT_CONSTANT:
+            return self.emit_constant(sym.constant, o.frame)
         if sym:
             code = self.emit.emit_read_var(sym.name, sym.type, sym.value.value, o.frame)
             return code, sym.type
@@ -778,7 +970,7 @@ class CodeGenerator(ASTVisitor):
 
     def visit_this_expression(self, node: "ThisExpression", o: Access = None):
         if o is None: return "", None
-        this_sym = next(filter(lambda x: x.name == "this", o.sym), None)
+        this_sym = o.sym.lookup("this")
         code = self.emit.emit_read_var("this", this_sym.type, this_sym.value.value, o.frame)
         return code, this_sym.type
 
@@ -793,6 +985,8 @@ class CodeGenerator(ASTVisitor):
         return self.emit.emit_push_iconst(node.value, o.frame), PrimitiveType("int")
 
     def visit_float_literal(self, node: "FloatLiteral", o: Access = None):
+        if getattr(node, "constant", NOT_CONSTANT) is not NOT_CONSTANT:
+            return self.emit_constant(node.constant, o.frame)
         return self.emit.emit_push_fconst(str(node.value), o.frame), PrimitiveType("float")
 
     def visit_bool_literal(self, node: "BoolLiteral", o: Access = None):
@@ -990,10 +990,16 @@
 import os
 from typing import List, Optional, Union
 from .jasmin_code import JasminCode
+from .class_file import ClassFileWriter
 from .error import IllegalOperandException
 from ..utils.nodes import *
 from .utils import *
 
+# Output backends an Emitter can write
+BACKENDS = ("jasmin", "class")
+# Comparison that holds exactly when the other one does not (NaN aside)
+NEGATED_COMPARISON = {"<": ">=", "<=": ">", ">": "<=", ">=": "<", "==": "!=", "!=": "=="}
+
 # Helper functions for OPLang type checking
 def is_int_type(in_type):
     """Check if type is int primitive."""
@@ -1021,13 +1027,30 @@ class Emitter:
     Emitter class to generate JVM bytecode instructions.
     """
 
-    def __init__(self, filename: str):
+    def __init__(self, filename: str, backend: str = "jasmin", output=None, peephole=None):
+        """
+        Args:
+            filename: Name of the Jasmin file, e.g. "Main.j"
+            backend: "jasmin" writes the .j text, "class" writes the .class
+                bytes directly (see class_file.py)
+            output: Directory to write into (default src/runtime), or a dict
+                used as in-memory sink: output[file name] = text or bytes
+            peephole: PeepholeOptimizer run on each method body by
+                emit_end_method, or None
+        """
+        if backend not in BACKENDS:
+            raise IllegalOperandException(backend)
         self.filename = filename
-        self.filepath = os.path.join(
-            os.path.dirname(os.path.dirname(__file__)), "runtime", filename
-        )
+        self.sink = output if isinstance(output, dict) else None
+        if output is None or self.sink is not None:
+            output = os.path.join(os.path.dirname(os.path.dirname(__file__)), "runtime")
+        self.filepath = os.path.join(output, filename)
+        self.backend = backend
         self.buff: List[str] = []
         self.jvm = JasminCode()
+        self.peephole = peephole
+        # Index in buff of the current method's .method line
+        self.method_start = None
 
     def get_jvm_type(self, in_type) -> str:
         type_in = type(in_type)
@@ -1180,6 +1203,10 @@ class Emitter:
         else:
             raise IllegalOperandException(name)
 
+    def emit_iinc(self, index: int, value: int, frame) -> str:
+        """Add the constant value to the int local at index, in place."""
+        return self.jvm.emitIINC(index, value)
+
     def emit_attribute(
         self, lexeme: str, in_type, is_final: bool, value: Optional[str] = None
     ) -> str:
@@ -1309,7 +1336,8 @@ class Emitter:
             else:
                 result.append(self.jvm.emitIFICMPNE(label_f))
         else:
-            result.append(self.jvm.emitFCMPL())
+            # NaN must fail every test: fcmpg makes it compare greater
+            result.append(self.jvm.emitFCMPG() if op in ("<", "<=") else self.jvm.emitFCMPL())
             if op == ">":
                 result.append(self.jvm.emitIFLE(label_f))
             elif op == ">=":
@@ -1331,12 +1359,50 @@ class Emitter:
         result.append(self.emit_label(label_o, frame))
         return "".join(result)
 
+    def emit_if_compare(self, op: str, in_, label: int, frame, negate: bool = False) -> str:
+        """
+        Jump to label if `left op right` holds for the two values on the
+        stack (with negate, if it does not): if_icmpXX for int and boolean,
+        if_acmpXX for references, fcmpl or fcmpg then ifXX for float.
+        """
+        frame.pop()
+        frame.pop()
+        compare = None
+        if is_float_type(in_):
+            # Every comparison with NaN is false except !=. fcmpl pushes -1
+            # for NaN and fcmpg pushes 1; pick the one that fails op
+            compare = self.jvm.emitFCMPG() if op in ("<", "<=") else self.jvm.emitFCMPL()
+        if negate:
+            op = NEGATED_COMPARISON[op]
+        if is_int_type(in_) or is_bool_type(in_):
+            jump = {
+                ">": self.jvm.emitIFICMPGT, ">=": self.jvm.emitIFICMPGE,
+                "<": self.jvm.emitIFICMPLT, "<=": self.jvm.emitIFICMPLE,
+                "==": self.jvm.emitIFICMPEQ, "!=": self.jvm.emitIFICMPNE,
+            }[op]
+            return jump(label)
+        if compare is None:
+            # References (objects, arrays, nil)
+            return (self.jvm.emitIFACMPEQ if op == "==" else self.jvm.emitIFACMPNE)(label)
+        jump = {
+            ">": self.jvm.emitIFGT, ">=": self.jvm.emitIFGE,
+            "<": self.jvm.emitIFLT, "<=": self.jvm.emitIFLE,
+            "==": self.jvm.emitIFEQ, "!=": self.jvm.emitIFNE,
+        }[op]
+        return compare + jump(label)
+
     def emit_method(self, lexeme: str, in_type, is_static: bool) -> str:
+        self.method_start = len(self.buff)
         return self.jvm.emitMETHOD(lexeme, self.get_jvm_type(in_type), is_static)
 
     def emit_end_method(self, frame) -> str:
+        extra_stack = 0
+        if self.peephole is not None and self.method_start is not None:
+            body, extra_stack = self.peephole.optimize("".join(self.buff[self.method_start:]))
+            self.buff[self.method_start:] = [body]
+        self.method_start = None
         buffer = list()
-        buffer.append(self.jvm.emitLIMITSTACK(frame.get_max_op_stack_size()))
+        buffer.append(self.jvm.emitLIMITSTACK(frame.get_max_op_stack_size() + extra_stack))
         buffer.append(self.jvm.emitLIMITLOCAL(frame.get_max_index()))
         buffer.append(self.jvm.emitENDMETHOD())
         return "".join(buffer)
@@ -1403,8 +1469,20 @@ class Emitter:
         return self.jvm.emitLIMITLOCAL(num)
 
     def emit_epilog(self) -> None:
-        file = open(self.filepath, "w")
         tmp = "".join(self.buff)
+        if self.backend == "class":
+            class_name = os.path.splitext(self.filename)[0] + ".class"
+            data = ClassFileWriter().assemble(tmp)
+            if self.sink is not None:
+                self.sink[class_name] = data
+                return
+            with open(os.path.join(os.path.dirname(self.filepath), class_name), "wb") as file:
+                file.write(data)
+            return
+        if self.sink is not None:
+            self.sink[self.filename] = tmp
+            return
+        file = open(self.filepath, "w")
         file.write(tmp)
         file.close()
 
@@ -0,0 +1,121 @@
+"""
+Reachability and dead-store analysis for method bodies.
+
+The code generator uses these to leave out what can never run or never be
+read:
+- statements that follow a return, break or continue in their block, and
+  the branch of an if whose condition is a boolean literal;
+- the return it would append to a body that cannot fall off its end;
+- the default value a declaration without initializer stores, when the
+  variable is assigned before anything can read it.
+
+The analysis is structural and conservative: a for loop is always taken to
+complete (its test or a break can end it), only x := ... and for x := ...
+write x, any other use of x reads it, and a write counts only when every
+branch that falls through makes it.
+"""
+
+from typing import List, Optional, Set
+
+from ..utils.nodes import *
+
+
+def constant_condition(expr: Expr) -> Optional[bool]:
+    """Value of a condition that is a boolean literal, else None."""
+    while isinstance(expr, ParenthesizedExpression):
+        expr = expr.expr
+    return bool(expr.value) if isinstance(expr, BoolLiteral) else None
+
+
+def completes_normally(stmt: Optional[Statement]) -> bool:
+    """Whether execution can continue after stmt."""
+    if isinstance(stmt, (ReturnStatement, BreakStatement, ContinueStatement)):
+        return False
+    if isinstance(stmt, BlockStatement):
+        return all(completes_normally(child) for child in stmt.statements)
+    if isinstance(stmt, IfStatement):
+        value = constant_condition(stmt.condition)
+        if value is True:
+            return completes_normally(stmt.then_stmt)
+        if value is False:
+            return completes_normally(stmt.else_stmt)
+        return completes_normally(stmt.then_stmt) or completes_normally(stmt.else_stmt)
+    return True
+
+
+def reachable_statements(stmts: List[Statement]) -> List[Statement]:
+    """stmts up to and including the first one that does not complete."""
+    for i, stmt in enumerate(stmts):
+        if not completes_normally(stmt):
+            return stmts[:i + 1]
+    return stmts
+
+
+def mentions(node, name: str) -> bool:
+    """Whether name appears as an identifier or assigned variable under node."""
+    if isinstance(node, list):
+        return any(mentions(child, name) for child in node)
+    if not isinstance(node, ASTNode):
+        return False
+    if isinstance(node, (Identifier, IdLHS)) and node.name == name:
+        return True
+    if isinstance(node, ForStatement) and node.variable == name:
+        return True
+    return any(mentions(child, name) for child in vars(node).values())
+
+
+def default_read(stmt: Optional[Statement], name: str) -> Optional[bool]:
+    """
+    Whether a default value in name can be read by stmt or after it: True
+    if it may be, False if stmt overwrites it first or nothing after stmt
+    runs, None if stmt leaves it alone.
+    """
+    if stmt is None:
+        return None
+    if isinstance(stmt, AssignmentStatement) and isinstance(stmt.lhs, IdLHS) and stmt.lhs.name == name:
+        return mentions(stmt.rhs, name)
+    if isinstance(stmt, ForStatement) and stmt.variable == name:
+        return mentions(stmt.start_expr, name)
+    if isinstance(stmt, BlockStatement):
+        if any(var.name == name or mentions(var.init_value, name)
+               for decl in stmt.var_decls for var in decl.variables):
+            return True
+        for child in reachable_statements(stmt.statements):
+            found = default_read(child, name)
+            if found is not None:
+                return found
+        return None
+    if isinstance(stmt, IfStatement):
+        value = constant_condition(stmt.condition)
+        if value is not None:
+            return default_read(stmt.then_stmt if value else stmt.else_stmt, name)
+        if mentions(stmt.condition, name):
+            return True
+        branches = [stmt.then_stmt, stmt.else_stmt]
+        found = [default_read(branch, name) for branch in branches]
+        if True in found:
+            return True
+        # Only the branches that fall through matter after the if
+        live = [result for branch, result in zip(branches, found) if completes_normally(branch)]
+        if not live or all(result is False for result in live):
+            return False
+        return None if all(result is None for result in live) else True
+    if mentions(stmt, name):
+        return True
+    return None if completes_normally(stmt) else False
+
+
+def dead_default_stores(block: BlockStatement) -> Set[str]:
+    """Names declared without initializer in block whose default is never read."""
+    variables = [var for decl in block.var_decls for var in decl.variables]
+    statements = reachable_statements(block.statements)
+    dead = set()
+    for i, var in enumerate(variables):
+        if var.init_value is not None:
+            continue
+        if any(mentions(later.init_value, var.name) for later in variables[i + 1:]):
+            continue
+        found = (default_read(stmt, var.name) for stmt in statements)
+        if not next((result for result in found if result is not None), False):
+            dead.add(var.name)
+    return dead
@@ -0,0 +1,396 @@
+"""
+Constant folding and algebraic simplification for OPLang ASTs.
+
+ConstantFolder rewrites a checked (or generated) AST in place, just before
+code generation:
+- constant subtrees, final locals and known class constants become literals
+  (values as computed by utils.constant_eval, i.e. with JVM semantics);
+- identities that cannot change a result are dropped: x * 1, 1 * x, x + 0
+  and 0 + x (int), x - 0, x \\ 1, x / 1 (float x), x && true, x || false,
+  - -x and !!x;
+- int literals that codegen would convert with i2f are replaced by float
+  literals (operands of / and of mixed arithmetic, float initializers,
+  assignments and returns).
+
+A folded FloatLiteral carries its exact value as .constant; the code
+generator loads that instead of the 4-decimal literal value.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from ..utils.visitor import ASTVisitor
+from ..utils.nodes import *
+from ..utils.constant_eval import NOT_CONSTANT, ConstantEvaluator, converted
+
+
+ARITHMETIC_OPS = ("+", "-", "*", "/")
+RELATIONAL_OPS = ("<", "<=", ">", ">=")
+
+
+def make_literal(value) -> Expr:
+    """Literal node for a constant value."""
+    if type(value) is bool:
+        return BoolLiteral(value)
+    if type(value) is int:
+        return IntLiteral(value)
+    if type(value) is str:
+        return StringLiteral(value)
+    literal = FloatLiteral(value)
+    literal.constant = value
+    return literal
+
+
+def type_name(typ) -> Optional[str]:
+    """"int", "float", "boolean" or "string" for a primitive type node, else None."""
+    name = getattr(typ, "type_name", None)
+    return name if name in ("int", "float", "boolean", "string") else None
+
+
+class ConstantFolder(ASTVisitor):
+    """
+    Rewrites expressions bottom-up; every visit_* returns the node to use
+    in place of the one visited.
+
+    Attributes:
+        constants: class -> final attribute -> value
+        fields: class -> attribute -> type name (None if not primitive)
+        scopes: name -> (type name, constant value) of locals and parameters,
+            innermost scope last
+    """
+
+    def __init__(self):
+        self.constants: Dict[str, Dict[str, Any]] = {}
+        self.fields: Dict[str, Dict[str, Optional[str]]] = {}
+        self.scopes: List[Dict[str, tuple]] = []
+        self.current_class = None
+        self.return_type = None
+        self.evaluator = ConstantEvaluator(self.named_constant)
+
+    # ------------------------------------------------------------------
+    # Names and types
+    # ------------------------------------------------------------------
+
+    def lookup_local(self, name: str):
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        return None
+
+    def named_constant(self, expr) -> Any:
+        """Value of a final local, x, this.x or A.x, or NOT_CONSTANT."""
+        if isinstance(expr, Identifier):
+            local = self.lookup_local(expr.name)
+            if local is not None:
+                return local[1]
+            return self.constants.get(self.current_class, {}).get(expr.name, NOT_CONSTANT)
+        if isinstance(expr, PostfixExpression) and len(expr.postfix_ops) == 1 \
+                and isinstance(expr.postfix_ops[0], MemberAccess):
+            if isinstance(expr.primary, ThisExpression):
+                owner = self.current_class
+            elif isinstance(expr.primary, Identifier) and self.lookup_local(expr.primary.name) is None \
+                    and expr.primary.name not in self.fields.get(self.current_class, {}):
+                owner = expr.primary.name
+            else:
+                return NOT_CONSTANT
+            return self.constants.get(owner, {}).get(expr.postfix_ops[0].member_name, NOT_CONSTANT)
+        return NOT_CONSTANT
+
+    def type_of(self, expr) -> Optional[str]:
+        """Primitive type name of expr where it is evident, else None."""
+        if isinstance(expr, BoolLiteral):
+            return "boolean"
+        if isinstance(expr, IntLiteral):
+            return "int"
+        if isinstance(expr, FloatLiteral):
+            return "float"
+        if isinstance(expr, StringLiteral):
+            return "string"
+        if isinstance(expr, Identifier):
+            local = self.lookup_local(expr.name)
+            if local is not None:
+                return local[0]
+            return self.fields.get(self.current_class, {}).get(expr.name)
+        if isinstance(expr, ParenthesizedExpression):
+            return self.type_of(expr.expr)
+        if isinstance(expr, UnaryOp):
+            return "boolean" if expr.operator == "!" else self.type_of(expr.operand)
+        if isinstance(expr, BinaryOp):
+            op = expr.operator
+            if op in RELATIONAL_OPS or op in ("==", "!=", "&&", "||"):
+                return "boolean"
+            if op == "^":
+                return "string"
+            if op in ("\\", "%"):
+                return "int"
+            if op == "/":
+                return "float"
+            left, right = self.type_of(expr.left), self.type_of(expr.right)
+            if left is None or right is None:
+                return None
+            return "float" if "float" in (left, right) else left
+        return None
+
+    def as_float(self, expr, typ: Optional[str]) -> Expr:
+        """expr, with an int literal replaced by a float one if typ is float."""
+        if typ == "float" and isinstance(expr, IntLiteral):
+            return make_literal(converted(self.evaluator.evaluate(expr), "float"))
+        return expr
+
+    # ------------------------------------------------------------------
+    # Program and declarations
+    # ------------------------------------------------------------------
+
+    def visit_program(self, node: "Program", o: Any = None):
+        for class_decl in node.class_decls:
+            self.fields[class_decl.name] = {
+                attr.name: type_name(member.attr_type)
+                for member in class_decl.members if isinstance(member, AttributeDecl)
+                for attr in member.attributes
+            }
+        for class_decl in node.class_decls:
+            self.visit(class_decl, o)
+        return node
+
+    def visit_class_decl(self, node: "ClassDecl", o: Any = None):
+        self.current_class = node.name
+        self.constants.setdefault(node.name, {})
+        for member in node.members:
+            self.visit(member, o)
+        return node
+
+    def visit_attribute_decl(self, node: "AttributeDecl", o: Any = None):
+        for attr in node.attributes:
+            self.visit(attr, node)
+        return node
+
+    def visit_attribute(self, node: "Attribute", o: Any = None):
+        if node.init_value is None:
+            return node
+        node.init_value = self.as_float(self.visit(node.init_value), type_name(o.attr_type))
+        if o.is_final:
+            value = self.evaluator.evaluate(node.init_value)
+            if value is not NOT_CONSTANT:
+                self.constants[self.current_class][node.name] = converted(value, type_name(o.attr_type))
+        return node
+
+    def visit_method_decl(self, node: "MethodDecl", o: Any = None):
+        return self.visit_body(node, node.params, type_name(node.return_type))
+
+    def visit_constructor_decl(self, node: "ConstructorDecl", o: Any = None):
+        return self.visit_body(node, node.params, None)
+
+    def visit_destructor_decl(self, node: "DestructorDecl", o: Any = None):
+        return self.visit_body(node, [], None)
+
+    def visit_body(self, node, params, return_type):
+        self.scopes = [{param.name: (type_name(param.param_type), NOT_CONSTANT) for param in params}]
+        self.return_type = return_type
+        node.body = self.visit(node.body)
+        self.scopes = []
+        return node
+
+    def visit_parameter(self, node: "Parameter", o: Any = None):
+        return node
+
+    def visit_primitive_type(self, node: "PrimitiveType", o: Any = None):
+        return node
+
+    def visit_array_type(self, node: "ArrayType", o: Any = None):
+        return node
+
+    def visit_class_type(self, node: "ClassType", o: Any = None):
+        return node
+
+    def visit_reference_type(self, node: "ReferenceType", o: Any = None):
+        return node
+
+    # ------------------------------------------------------------------
+    # Statements
+    # ------------------------------------------------------------------
+
+    def visit_block_statement(self, node: "BlockStatement", o: Any = None):
+        self.scopes.append({})
+        for var_decl in node.var_decls:
+            self.visit(var_decl)
+        node.statements = [self.visit(stmt) for stmt in node.statements]
+        self.scopes.pop()
+        return node
+
+    def visit_variable_decl(self, node: "VariableDecl", o: Any = None):
+        typ = type_name(node.var_type)
+        for var in node.variables:
+            value = NOT_CONSTANT
+            if var.init_value is not None:
+                var.init_value = self.as_float(self.visit(var.init_value), typ)
+                if node.is_final:
+                    value = self.evaluator.evaluate(var.init_value)
+                    if value is not NOT_CONSTANT:
+                        value = converted(value, typ)
+            # Declared after its own initializer, as in CodeGenerator
+            self.scopes[-1][var.name] = (typ, value)
+        return node
+
+    def visit_variable(self, node: "Variable", o: Any = None):
+        return node
+
+    def visit_assignment_statement(self, node: "AssignmentStatement", o: Any = None):
+        node.lhs = self.visit(node.lhs)
+        node.rhs = self.visit(node.rhs)
+        if isinstance(node.lhs, IdLHS):
+            node.rhs = self.as_float(node.rhs, self.type_of(Identifier(node.lhs.name)))
+        return node
+
+    def visit_if_statement(self, node: "IfStatement", o: Any = None):
+        node.condition = self.visit(node.condition)
+        node.then_stmt = self.visit(node.then_stmt)
+        if node.else_stmt is not None:
+            node.else_stmt = self.visit(node.else_stmt)
+        return node
+
+    def visit_for_statement(self, node: "ForStatement", o: Any = None):
+        node.start_expr = self.visit(node.start_expr)
+        node.end_expr = self.visit(node.end_expr)
+        node.body = self.visit(node.body)
+        return node
+
+    def visit_break_statement(self, node: "BreakStatement", o: Any = None):
+        return node
+
+    def visit_continue_statement(self, node: "ContinueStatement", o: Any = None):
+        return node
+
+    def visit_return_statement(self, node: "ReturnStatement", o: Any = None):
+        if node.value is not None:
+            node.value = self.as_float(self.visit(node.value), self.return_type)
+        return node
+
+    def visit_method_invocation_statement(self, node: "MethodInvocationStatement", o: Any = None):
+        node.method_call = self.visit(node.method_call)
+        return node
+
+    def visit_id_lhs(self, node: "IdLHS", o: Any = None):
+        return node
+
+    def visit_postfix_lhs(self, node: "PostfixLHS", o: Any = None):
+        self.visit_postfix_ops(node.postfix_expr)
+        return node
+
+    # ------------------------------------------------------------------
+    # Expressions
+    # ------------------------------------------------------------------
+
+    def visit_binary_op(self, node: "BinaryOp", o: Any = None):
+        node.left = self.visit(node.left)
+        node.right = self.visit(node.right)
+        op = node.operator
+        left = self.evaluator.evaluate(node.left)
+        if left is not NOT_CONSTANT:
+            # Short-circuit: a constant left operand may decide && and ||
+            value = self.evaluator.evaluate(node)
+            if value is not NOT_CONSTANT:
+                return make_literal(value)
+        right = self.evaluator.evaluate(node.right)
+
+        if op in ("&&", "||"):
+            if right is (op == "&&"):
+                return node.left
+            if left is (op == "&&"):
+                return node.right
+            return node
+
+        left_type, right_type = self.type_of(node.left), self.type_of(node.right)
+        simplified = self.simplify(op, node.left, left_type, right, node.right, right_type)
+        if simplified is None and op in ("+", "*"):
+            simplified = self.simplify(op, node.right, right_type, left, node.left, left_type)
+        if simplified is not None:
+            return simplified
+
+        if op == "/" or op in ARITHMETIC_OPS + RELATIONAL_OPS and "float" in (left_type, right_type):
+            node.left = self.as_float(node.left, "float")
+            node.right = self.as_float(node.right, "float")
+        return node
+
+    @staticmethod
+    def simplify(op, expr, expr_type, constant, constant_node, constant_type):
+        """expr if `expr op constant` always equals expr, else None."""
+        if constant is NOT_CONSTANT or type(constant) not in (int, float):
+            return None
+        result_type = "float" if op == "/" or "float" in (expr_type, constant_type) else expr_type
+        if expr_type is None or result_type != expr_type:
+            return None
+        if constant == 1 and (op == "*" or op == "/" or op == "\\"):
+            return expr
+        # x + 0.0 is not x for x = -0.0, but x - 0.0 always is
+        if constant == 0 and (op == "-" or op == "+" and expr_type == "int"):
+            return expr
+        return None
+
+    def visit_unary_op(self, node: "UnaryOp", o: Any = None):
+        node.operand = self.visit(node.operand)
+        value = self.evaluator.evaluate(node)
+        if value is not NOT_CONSTANT:
+            return make_literal(value)
+        operand = node.operand
+        if node.operator == "+" and self.type_of(operand) in ("int", "float"):
+            return operand
+        if isinstance(operand, UnaryOp) and operand.operator == node.operator and node.operator in ("-", "!"):
+            return operand.operand
+        return node
+
+    def visit_postfix_expression(self, node: "PostfixExpression", o: Any = None):
+        value = self.named_constant(node)
+        if value is not NOT_CONSTANT:
+            return make_literal(value)
+        # An identifier primary may be a class name (static access): keep it
+        if not isinstance(node.primary, Identifier):
+            node.primary = self.visit(node.primary)
+        self.visit_postfix_ops(node)
+        return node
+
+    def visit_postfix_ops(self, node: "PostfixExpression"):
+        for op in node.postfix_ops:
+            self.visit(op)
+
+    def visit_method_call(self, node: "MethodCall", o: Any = None):
+        node.args = [self.visit(arg) for arg in node.args]
+        return node
+
+    def visit_member_access(self, node: "MemberAccess", o: Any = None):
+        return node
+
+    def visit_array_access(self, node: "ArrayAccess", o: Any = None):
+        node.index = self.visit(node.index)
+        return node
+
+    def visit_object_creation(self, node: "ObjectCreation", o: Any = None):
+        node.args = [self.visit(arg) for arg in node.args]
+        return node
+
+    def visit_identifier(self, node: "Identifier", o: Any = None):
+        value = self.named_constant(node)
+        return make_literal(value) if value is not NOT_CONSTANT else node
+
+    def visit_this_expression(self, node: "ThisExpression", o: Any = None):
+        return node
+
+    def visit_parenthesized_expression(self, node: "ParenthesizedExpression", o: Any = None):
+        return self.visit(node.expr)
+
+    def visit_int_literal(self, node: "IntLiteral", o: Any = None):
+        return node
+
+    def visit_float_literal(self, node: "FloatLiteral", o: Any = None):
+        return node
+
+    def visit_bool_literal(self, node: "BoolLiteral", o: Any = None):
+        return node
+
+    def visit_string_literal(self, node: "StringLiteral", o: Any = None):
+        return node
+
+    def visit_array_literal(self, node: "ArrayLiteral", o: Any = None):
+        node.value = [self.visit(elem) for elem in node.value]
+        return node
+
+    def visit_nil_literal(self, node: "NilLiteral", o: Any = None):
+        return node
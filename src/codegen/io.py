@@ -26,3 +26,7 @@ IO_SYMBOL_LIST = [
     Symbol("writeStrLn", FunctionType([PrimitiveType("string")], PrimitiveType("void")), CName(LIB_NAME)),
 ]
 
+
+# Builtins by name; the root scope of every method's SymbolTable
+IO_SYMBOLS = {symbol.name: symbol for symbol in IO_SYMBOL_LIST}
+IO_SCOPE = SymbolTable(IO_SYMBOLS)
@@ -53,6 +53,11 @@ class MachineCode(ABC):
         # in_: Int
         pass
 
+    @abstractmethod
+    def emitIINC(self, in_, value):
+        # in_: Int, value: Int
+        pass
+
     @abstractmethod
     def emitALOAD(self, in_):
         # in_: Int
@@ -159,6 +164,10 @@ class MachineCode(ABC):
     def emitIOR(self):
         pass
 
+    @abstractmethod
+    def emitIXOR(self):
+        pass
+
     @abstractmethod
     def emitIREM(self):
         pass
@@ -327,6 +336,10 @@ class MachineCode(ABC):
     def emitFCMPL(self):
         pass
 
+    @abstractmethod
+    def emitFCMPG(self):
+        pass
+
     @abstractmethod
     def emitLIMITLOCAL(self, in_):
         # in_: String
@@ -470,6 +483,10 @@ class JasminCode(MachineCode):
         else:
             return JasminCode.INDENT + "fstore " + str(in_) + JasminCode.END
 
+    def emitIINC(self, in_, value):
+        # in_: Int, value: Int
+        return JasminCode.INDENT + "iinc " + str(in_) + " " + str(value) + JasminCode.END
+
     def emitALOAD(self, in_):
         # in_: Int
         if in_ >= 0 and in_ <= 3:
@@ -558,6 +575,9 @@ class JasminCode(MachineCode):
     def emitIOR(self):
         return JasminCode.INDENT + "ior" + JasminCode.END
 
+    def emitIXOR(self):
+        return JasminCode.INDENT + "ixor" + JasminCode.END
+
     def emitIREM(self):
         return JasminCode.INDENT + "irem" + JasminCode.END
 
@@ -705,6 +725,9 @@ class JasminCode(MachineCode):
     def emitFCMPL(self):
         return JasminCode.INDENT + "fcmpl" + JasminCode.END
 
+    def emitFCMPG(self):
+        return JasminCode.INDENT + "fcmpg" + JasminCode.END
+
     def emitLIMITLOCAL(self, in_):
         # in_: Int
         return ".limit locals " + str(in_) + JasminCode.END
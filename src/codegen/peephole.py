@@ -0,0 +1,206 @@
+"""
+Peephole optimizer for Jasmin method bodies.
+
+The Emitter hands each method body to PeepholeOptimizer.optimize just before
+writing .limit/.end method. A body is a list of lines: instructions
+("\tiload_1"), labels ("Label3:") and directives (".var ..."). Rules look at
+a window of consecutive lines and return a replacement; labels and
+directives end a window, so no rule moves code across a jump target.
+
+Rules are PeepholeRule objects in PeepholeOptimizer.rules (DEFAULT_RULES
+unless given); add one by appending to that list. Each optimizer counts the
+hits of every rule in hits.
+"""
+
+import re
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .jasmin_code import JasminCode
+
+
+# Instructions that push one value, pop nothing and have no side effect
+PURE_PUSH = re.compile(r"^([ifa]load(_\d)?|iconst_(m1|\d)|fconst_\d|bipush|sipush|ldc(_w)?|aconst_null)$")
+# ... or that may have one (class initialization), but do not read the stack
+PUSH_ONE = re.compile(PURE_PUSH.pattern[:-2] + "|getstatic)$")
+LOCAL_ACCESS = re.compile(r"^([ifa])(load|store)(?:_(\d))?$")
+
+# Branch taken on !v, for a boolean v: the branch to take on v instead
+NEGATED_BRANCH = {"ifle": "ifgt", "ifgt": "ifle", "ifeq": "ifne", "ifne": "ifeq"}
+
+
+class Insn(NamedTuple):
+    """One line of a method body."""
+    text: str
+    op: str   # opcode; ":" for a label, "" for a directive or blank line
+    arg: str  # operands, or the label name
+
+    @classmethod
+    def parse(cls, line: str) -> "Insn":
+        if line.startswith(JasminCode.INDENT) and not line.strip().startswith("."):
+            op, _, arg = line.strip().partition(" ")
+            return cls(line, op, arg.strip())
+        if line.endswith(":"):
+            return cls(line, ":", line[:-1])
+        return cls(line, "", "")
+
+
+def instruction(op: str, arg: str = "") -> str:
+    """Line of a Jasmin instruction."""
+    return JasminCode.INDENT + op + (" " + arg if arg else "")
+
+
+def local_access(insn: Insn) -> Optional[Tuple[str, str, int]]:
+    """(type prefix, "load"/"store", index) of a local variable access."""
+    match = LOCAL_ACCESS.match(insn.op)
+    if match is None:
+        return None
+    prefix, kind, short = match.groups()
+    if short is not None:
+        return prefix, kind, int(short)
+    return (prefix, kind, int(insn.arg)) if insn.arg.isdigit() else None
+
+
+class PeepholeRule(NamedTuple):
+    """
+    Attributes:
+        name: Key of the rule in PeepholeOptimizer.hits
+        match: Called with the body and a position; returns (number of lines
+            replaced, replacement lines), or None if the rule does not apply
+        extra_stack: How much the rewrite can raise the operand stack depth
+    """
+    name: str
+    match: Callable[[List[Insn], int], Optional[Tuple[int, List[str]]]]
+    extra_stack: int = 0
+
+
+def window(body: List[Insn], i: int, size: int) -> Optional[List[Insn]]:
+    """The size instructions at i, or None if they are not all instructions."""
+    insns = body[i:i + size]
+    if len(insns) < size or any(insn.op in ("", ":") for insn in insns):
+        return None
+    return insns
+
+
+def goto_next_label(body, i):
+    # goto L, when L labels the next instruction anyway
+    if body[i].op != "goto":
+        return None
+    j = i + 1
+    while j < len(body) and body[j].op == ":":
+        if body[j].arg == body[i].arg:
+            return 1, []
+        j += 1
+    return None
+
+
+def store_load(body, i):
+    # xstore n; xload n -> dup; xstore n
+    insns = window(body, i, 2)
+    if insns is None:
+        return None
+    store, load = local_access(insns[0]), local_access(insns[1])
+    if store is None or load is None or store[1] != "store" or load[1] != "load":
+        return None
+    if store[0] != load[0] or store[2] != load[2]:
+        return None
+    return 2, [instruction("dup"), insns[0].text]
+
+
+def swap_i2f_swap(body, i):
+    # push v; swap; i2f; swap -> i2f; push v (converts the int under v)
+    insns = window(body, i, 4)
+    if insns is None or not PUSH_ONE.match(insns[0].op):
+        return None
+    if [insn.op for insn in insns[1:]] != ["swap", "i2f", "swap"]:
+        return None
+    return 4, [instruction("i2f"), insns[0].text]
+
+
+def swap_pushes(body, i):
+    # push a; push b; swap -> push b; push a
+    insns = window(body, i, 3)
+    if insns is None or insns[2].op != "swap":
+        return None
+    if not PURE_PUSH.match(insns[0].op) or not PURE_PUSH.match(insns[1].op):
+        return None
+    # Leave "swap; i2f; swap" whole for swap_i2f_swap
+    if i + 3 < len(body) and body[i + 3].op == "i2f":
+        return None
+    return 3, [insns[1].text, insns[0].text]
+
+
+def not_branch(body, i):
+    # iconst_1; ixor; ifle L -> ifgt L (and the other boolean tests)
+    insns = window(body, i, 3)
+    if insns is None or [insns[0].op, insns[1].op] != ["iconst_1", "ixor"]:
+        return None
+    negated = NEGATED_BRANCH.get(insns[2].op)
+    if negated is None:
+        return None
+    return 3, [instruction(negated, insns[2].arg)]
+
+
+def double_not(body, i):
+    # iconst_1; ixor; iconst_1; ixor -> nothing
+    insns = window(body, i, 4)
+    if insns is None or [insn.op for insn in insns] != ["iconst_1", "ixor", "iconst_1", "ixor"]:
+        return None
+    return 4, []
+
+
+def dup2_x1_pop2(body, i):
+    # push v; push ref; push index; dup2_x1; pop2 -> push ref; push index; push v
+    insns = window(body, i, 5)
+    if insns is None or [insns[3].op, insns[4].op] != ["dup2_x1", "pop2"]:
+        return None
+    if not all(PURE_PUSH.match(insn.op) for insn in insns[:3]):
+        return None
+    return 5, [insns[1].text, insns[2].text, insns[0].text]
+
+
+DEFAULT_RULES = [
+    PeepholeRule("goto-next-label", goto_next_label),
+    PeepholeRule("store-load", store_load, extra_stack=1),
+    PeepholeRule("swap-i2f-swap", swap_i2f_swap),
+    PeepholeRule("swap-pushes", swap_pushes),
+    PeepholeRule("not-branch", not_branch),
+    PeepholeRule("double-not", double_not),
+    PeepholeRule("dup2_x1-pop2", dup2_x1_pop2),
+]
+
+
+class PeepholeOptimizer:
+    """
+    Attributes:
+        rules: Rules tried at each position, in order
+        hits: Rule name -> number of rewrites it made
+    """
+
+    # Lines a rewrite can make visible to rules starting before it
+    LOOKBEHIND = 4
+
+    def __init__(self, rules: List[PeepholeRule] = None):
+        self.rules = list(DEFAULT_RULES if rules is None else rules)
+        self.hits: Dict[str, int] = {rule.name: 0 for rule in self.rules}
+
+    def optimize(self, code: str) -> Tuple[str, int]:
+        """
+        Rewrite a method body until no rule applies. Returns the new body
+        and how much to add to its .limit stack.
+        """
+        body = [Insn.parse(line) for line in code.split(JasminCode.END)]
+        extra_stack = 0
+        i = 0
+        while i < len(body):
+            for rule in self.rules:
+                found = rule.match(body, i)
+                if found is not None:
+                    count, replacement = found
+                    body[i:i + count] = [Insn.parse(line) for line in replacement]
+                    self.hits[rule.name] = self.hits.get(rule.name, 0) + 1
+                    extra_stack = max(extra_stack, rule.extra_stack)
+                    i = max(0, i - self.LOOKBEHIND)
+                    break
+            else:
+                i += 1
+        return JasminCode.END.join(insn.text for insn in body), extra_stack
@@ -0,0 +1,248 @@
+"""
+JVM execution helpers for OPLang code generation.
+This module talks to a long-lived JVM worker (src/runtime/worker/JvmWorker.j)
+so that assembling and running generated classes does not pay for a new JVM
+start-up every time.
+"""
+
+import os
+import queue
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+RUNTIME_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "runtime")
+JASMIN_JAR = os.path.join(RUNTIME_DIR, "jasmin.jar")
+WORKER_SOURCE = os.path.join(RUNTIME_DIR, "worker", "JvmWorker.j")
+WORKER_CLASS = "JvmWorker"
+
+JASMIN_FOUND_ERRORS = re.compile(r"^(.*): Found \d+ errors?$")
+
+
+class JvmWorkerError(Exception):
+    def __init__(self, msg):
+        # msg:string
+        self.s = msg
+
+    def __str__(self):
+        return "JVM Worker: " + self.s + "\n"
+
+
+class JvmWorker:
+    """
+    Client for a persistent JVM that assembles Jasmin files and runs classes.
+
+    The worker is assembled from JvmWorker.j with jasmin on first use and then
+    kept alive; each request is one TAB separated line on its stdin and each
+    reply is a "<STATUS> <n>" header followed by n bytes of payload.
+
+    Attributes:
+        java (str): Java executable
+        proc (subprocess.Popen): The running worker, None until started
+    """
+
+    def __init__(self, java: str = "java"):
+        self.java = java
+        self.proc: Optional[subprocess.Popen] = None
+        self.class_dir: Optional[str] = None
+        self.replies: Optional[queue.Queue] = None
+        # One request at a time; compilations in other threads wait here
+        self.lock = threading.Lock()
+
+    def is_alive(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
+
+    def start(self, timeout: float = 30) -> None:
+        """
+        Assemble the worker class (once) and start the worker JVM.
+
+        Raises:
+            JvmWorkerError: When the worker class cannot be assembled
+            FileNotFoundError: When java is not installed
+        """
+        if self.is_alive():
+            return
+        self.close()
+        if self.class_dir is None or not os.path.exists(
+            os.path.join(self.class_dir, WORKER_CLASS + ".class")
+        ):
+            self.class_dir = tempfile.mkdtemp(prefix="oplang-worker-")
+            result = subprocess.run(
+                [self.java, "-jar", JASMIN_JAR, "-d", self.class_dir, WORKER_SOURCE],
+                capture_output=True,
+                text=True,
+                timeout=timeout,
+            )
+            if not os.path.exists(os.path.join(self.class_dir, WORKER_CLASS + ".class")):
+                raise JvmWorkerError(result.stdout + result.stderr)
+
+        self.proc = subprocess.Popen(
+            [self.java, "-cp", os.pathsep.join([self.class_dir, JASMIN_JAR]), WORKER_CLASS],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        self.replies = queue.Queue()
+        reader = threading.Thread(
+            target=self._read_replies, args=(self.proc.stdout, self.replies), daemon=True
+        )
+        reader.start()
+
+    @staticmethod
+    def _read_replies(stream, replies: queue.Queue) -> None:
+        while True:
+            header = stream.readline()
+            if not header:
+                replies.put(None)
+                return
+            status, size = header.decode("utf-8").split()
+            payload = stream.read(int(size)) if int(size) > 0 else b""
+            replies.put((status, payload.decode("utf-8", errors="replace")))
+
+    def request(self, fields: List[str], timeout: float) -> Tuple[str, str]:
+        """
+        Send one request and wait for its reply.
+
+        Args:
+            fields: Request fields, the first one being the command
+            timeout: Seconds to wait before the worker is killed
+
+        Returns:
+            (status, payload) where status is "OK" or "ERR"
+
+        Raises:
+            subprocess.TimeoutExpired: When no reply arrives in time
+            JvmWorkerError: When the worker died
+        """
+        with self.lock:
+            return self._request(fields, timeout)
+
+    def _request(self, fields: List[str], timeout: float) -> Tuple[str, str]:
+        self.start()
+        try:
+            self.proc.stdin.write(("\t".join(fields) + "\n").encode("utf-8"))
+            self.proc.stdin.flush()
+        except OSError as e:
+            self.close()
+            raise JvmWorkerError(str(e))
+        try:
+            reply = self.replies.get(timeout=timeout)
+        except queue.Empty:
+            # The program is stuck (e.g. an infinite loop): drop this JVM,
+            # the next request starts a fresh one.
+            self.close()
+            raise subprocess.TimeoutExpired(fields[0], timeout)
+        if reply is None:
+            self.close()
+            raise JvmWorkerError("worker exited")
+        return reply
+
+    def run(self, main_class: str, class_path: List[str], timeout: float = 10) -> Tuple[bool, str]:
+        """
+        Run main_class in a fresh class loader over class_path.
+
+        Returns:
+            (True, captured stdout) or (False, stack trace)
+        """
+        status, output = self.request(["RUN", main_class] + list(class_path), timeout)
+        return status == "OK", output
+
+    def close(self) -> None:
+        if self.proc is not None:
+            if self.proc.poll() is None:
+                self.proc.kill()
+            self.proc.wait()
+            for stream in (self.proc.stdin, self.proc.stdout):
+                if stream:
+                    stream.close()
+            self.proc = None
+        self.replies = None
+
+    def shutdown(self) -> None:
+        """Stop the worker and remove its assembled class."""
+        self.close()
+        if self.class_dir is not None:
+            shutil.rmtree(self.class_dir, ignore_errors=True)
+            self.class_dir = None
+
+
+def parse_jasmin_output(output: str, j_files: Sequence[str]) -> Dict[str, List[str]]:
+    """
+    Split what one jasmin run printed into messages per input file.
+
+    Jasmin handles its files in order and ends each failed one with a
+    "<file>: Found N errors" line, so the lines before it belong to it.
+
+    Returns:
+        {j_file: messages}, an empty list meaning the file assembled
+    """
+    errors: Dict[str, List[str]] = {j_file: [] for j_file in j_files}
+    pending: List[str] = []
+    for line in output.splitlines():
+        if line.startswith("Generated: "):
+            pending = []
+            continue
+        match = JASMIN_FOUND_ERRORS.match(line)
+        if match and match.group(1) in errors:
+            errors[match.group(1)] = pending + [line]
+            pending = []
+            continue
+        pending.append(line)
+    return errors
+
+
+def assemble_batch(
+    groups: Sequence[Tuple[str, Sequence[str]]],
+    worker: Optional[JvmWorker] = None,
+    java: str = "java",
+    timeout: float = 10,
+) -> Dict[str, List[str]]:
+    """
+    Assemble the .j files of one or many compilations with a single assembler.
+
+    Every group is (output directory, .j files). With a worker all groups go
+    to the worker JVM; otherwise each group is one jasmin process (a group
+    cannot be split between directories since classes may share names).
+
+    Returns:
+        {j_file: error messages}, empty for the files that assembled
+
+    Raises:
+        subprocess.TimeoutExpired: When a group takes longer than timeout
+        FileNotFoundError: When java is not installed
+    """
+    errors: Dict[str, List[str]] = {}
+    for out_dir, j_files in groups:
+        # jasmin exits the JVM on a missing file, so those never reach it
+        present = []
+        for j_file in j_files:
+            if os.path.isfile(j_file):
+                present.append(j_file)
+            else:
+                errors[j_file] = [j_file + ": file not found"]
+        if not present:
+            continue
+
+        output = None
+        if worker is not None:
+            try:
+                status, output = worker.request(["ASM", out_dir] + present, timeout)
+                if status != "OK":
+                    errors.update({j_file: [output] for j_file in present})
+                    continue
+            except JvmWorkerError:
+                output = None
+        if output is None:
+            result = subprocess.run(
+                [java, "-jar", JASMIN_JAR, "-d", out_dir] + present,
+                capture_output=True,
+                text=True,
+                timeout=timeout,
+            )
+            output = result.stdout + result.stderr
+        errors.update(parse_jasmin_output(output, present))
+    return errors
@@ -1,4 +1,9 @@
-from ..utils.nodes import Type
+from typing import Optional, Set
+
+from ..utils.nodes import (
+    AssignmentStatement, BlockStatement, ForStatement, IdLHS, IfStatement, Statement, Type,
+)
+from ..utils.constant_eval import NOT_CONSTANT
 from .frame import Frame
 
 
@@ -40,17 +45,51 @@ class CName(Value):
 
 
 class Symbol:
-    def __init__(self, name: str, _type: Type, value: Value):
+    def __init__(self, name: str, _type: Type, value: Value, constant=NOT_CONSTANT):
         self.name = name
         self.type = _type
         self.value = value
+        # Compile-time value of a final local (utils.constant_eval)
+        self.constant = constant
+
+
+class SymbolTable:
+    """
+    Codegen scope: a dict of the symbols declared in it, chained to the
+    enclosing scope. A block gets a child table, so declaring a variable
+    adds one entry instead of copying the enclosing symbols, and a lookup
+    costs one dict probe per enclosing scope.
+    """
+
+    __slots__ = ("symbols", "parent")
+
+    def __init__(self, symbols: dict = None, parent: "SymbolTable" = None):
+        self.symbols = symbols if symbols is not None else {}
+        self.parent = parent
+
+    def child(self) -> "SymbolTable":
+        """A new, empty scope nested in this one."""
+        return SymbolTable(None, self)
+
+    def declare(self, symbol: Symbol):
+        self.symbols[symbol.name] = symbol
+
+    def lookup(self, name: str) -> Optional[Symbol]:
+        """Innermost symbol called name, or None."""
+        table = self
+        while table is not None:
+            symbol = table.symbols.get(name)
+            if symbol is not None:
+                return symbol
+            table = table.parent
+        return None
 
 
 class Access:
     def __init__(
         self,
         frame: Frame,
-        sym: list["Symbol"],
+        sym: SymbolTable,
         is_left: bool = False,
         is_first: bool = False,
     ):
@@ -61,7 +100,23 @@ class Access:
 
 
 class SubBody:
-    def __init__(self, frame: Frame, sym: list["Symbol"]):
+    def __init__(self, frame: Frame, sym: SymbolTable):
         self.frame = frame
         self.sym = sym
 
+
+
+def assigned_locals(stmt: Optional[Statement]) -> Set[str]:
+    """Names stmt assigns with x := ... or uses as a for variable."""
+    if isinstance(stmt, BlockStatement):
+        names = set()
+        for child in stmt.statements:
+            names |= assigned_locals(child)
+        return names
+    if isinstance(stmt, IfStatement):
+        return assigned_locals(stmt.then_stmt) | assigned_locals(stmt.else_stmt)
+    if isinstance(stmt, ForStatement):
+        return {stmt.variable} | assigned_locals(stmt.body)
+    if isinstance(stmt, AssignmentStatement) and isinstance(stmt.lhs, IdLHS):
+        return {stmt.lhs.name}
+    return set()
@@ -29,11 +29,11 @@ program: classdecllist EOF; // write for program rule here using vardecl and fun
 // -----------Parser----------------
 
 // class
-classdecllist: classdecl classdecllist | classdecl;
+classdecllist: classdecl+;
 classdecl: CLASS ID classextends classbody;
 classextends: EXTENDS ID | ;
 classbody: LP classmemlist RP;
-classmemlist: classmem classmemlist | ;
+classmemlist: classmem*;
 classmem: attrdecl | methoddecl;
 
 // method
@@ -47,69 +47,70 @@ destructor: TILDE ID LB RB blockstmt_no_return;
 typ: primitivetyp | classtyp | arraytyp;
 paramdecl: LB paramnullist RB;
 paramnullist: paramprime | ;
-paramprime: param SEMICOLON paramprime | param;
+paramprime: (param SEMICOLON)* param;
 param: typ AMPERSAND? idlist;
-idlist: ID COMMA idlist | ID;
+idlist: ID (COMMA ID)*;
 
 // attribute
-attrdecllist: attrdecl attrdecllist | attrdecl;
+attrdecllist: attrdecl+;
 attrdecl: mutattr | immutattr;
 mutattr: (STATIC? | FINAL STATIC | STATIC FINAL) typ AMPERSAND? attrlist SEMICOLON;
 immutattr: (FINAL STATIC? | STATIC FINAL) typ attrlist SEMICOLON;
-attrlist: attrmem COMMA attrlist | attrmem;
+attrlist: attrmem (COMMA attrmem)*;
 attrmem: idlist attrinit;
 attrinit: ASSIGN expr | ;
 
 // variable
-vardecllist: vardecl vardecllist | vardecl;
+vardecllist: vardecl+;
 vardecl: mutvar | immutvar;
 mutvar: typ AMPERSAND? varlist SEMICOLON;
 immutvar: FINAL typ varlist SEMICOLON;
-varlist: varmem COMMA varlist | varmem;
+varlist: varmem (COMMA varmem)*;
 varmem: idlist varinit;
 varinit: ASSIGN expr | ;
 
 // arraylit, booleanlit
 arraylit: LP arraymemlist RP;
-arraymemlist: arraymem COMMA arraymemlist | arraymem | ;
+arraymemlist: (arraymem (COMMA arraymem)* COMMA?)?;
 arraymem: INTLIT | FLOATLIT | STRINGLIT | booleanlit | NEW ID LB argnullist RB;
 booleanlit: TRUE | FALSE;
 
 // expression
-exprlist: expr COMMA exprlist | expr;
-expr: expr1 (GREATER_EQ | LESS_EQ | GREATER | LESS) expr1 | expr1;
-expr1: expr2 (EQ | NEQ) expr2 | expr2;
-expr2: expr2 (AND | OR) expr3 | expr3;
-expr3: expr3 (ADD | SUB) expr4 | expr4;
-expr4: expr4 (MUL | DIV_I | DIV_F | MOD) expr5 | expr5;
-expr5: expr5 CONCAT expr6 | expr6;
-expr6: (NOT) expr6 | expr7;
-expr7: (ADD | SUB) expr7 | expr8;
-expr8: expr9 postfixlist;
-postfixlist: postfix postfixlist | ;
+exprlist: expr (COMMA expr)*;
+// relational and equality operators do not associate: a == b < c == d is
+// (a == b) < (c == d), and a < b < c is a syntax error
+expr: expr1 ((EQ | NEQ) expr1)? ((GREATER_EQ | LESS_EQ | GREATER | LESS) expr1 ((EQ | NEQ) expr1)?)?;
+// binary operators, highest precedence first; all left associative
+expr1: expr1 CONCAT expr1
+     | expr1 (MUL | DIV_I | DIV_F | MOD) expr1
+     | expr1 (ADD | SUB) expr1
+     | expr1 (AND | OR) expr1
+     | expr2;
+// "!" binds looser than unary "+"/"-", which bind looser than postfixes;
+// the postfixes are inlined so that "(" after ".ID" always starts the call
+expr2: NOT* (ADD | SUB)* expr3 (LSB expr RSB | DOT ID (LB argnullist RB)?)*;
+postfixlist: postfix*;
 postfix : LSB expr RSB 
           | DOT ID // field access 
           | DOT ID LB argnullist RB; // method call 
-expr9: NEW ID LB argnullist RB | expr10 ;
-expr10: THIS | ID | NIL | primitivelit | arraylit | subexpr;
+expr3: NEW ID LB argnullist RB | THIS | ID | NIL
+     | INTLIT | FLOATLIT | STRINGLIT | booleanlit | arraylit | LB expr RB;
 
 argnullist: argprime | ;
-argprime: expr COMMA argprime | expr;
-primitivelit: INTLIT | FLOATLIT | STRINGLIT | booleanlit;
-subexpr: LB expr RB;
+argprime: expr (COMMA expr)*;
 
 // statement
-stmtlist: stmt stmtlist | ;
+stmtlist: stmt*;
 stmt: blockstmt | assignstmt | ifstmt | forstmt | breakstmt | continuestmt | returnstmt | methodinstmt;
 blockstmt: LP vardecllist? stmtlist RP;
 blockstmt_no_return: LP vardecllist? stmtlist_no_return RP;
-stmtlist_no_return: stmt_no_return stmtlist_no_return | ;
+stmtlist_no_return: stmt_no_return*;
 stmt_no_return: blockstmt_no_return 
               | assignstmt | ifstmt | forstmt 
               | breakstmt | continuestmt | methodinstmt;
 
 assignstmt: lhs ASSIGN expr SEMICOLON;
-lhs: ID | expr9 postfix postfixlist;
+lhs: ID | expr3 postfix postfixlist;
 
 ifstmt: IF expr THEN stmt | IF expr THEN stmt ELSE stmt;
 
@@ -121,7 +122,7 @@ continuestmt: CONTINUE SEMICOLON;
 
 returnstmt: RETURN expr SEMICOLON;
 
-methodinstmt: (expr9 postfix postfixlist) LB argnullist RB SEMICOLON;
+methodinstmt: (expr3 postfix postfixlist) LB argnullist RB SEMICOLON;
 
 // type
 primitivetyp: INT | FLOAT | STRING | BOOLEAN;
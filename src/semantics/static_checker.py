@@ -7,10 +7,12 @@ scope management, inheritance validation, and detects all semantic errors as
 specified in the OPLang language specification.
 """
 
-from functools import reduce
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from platform import node
 from threading import local
-from typing import Dict, List, Set, Optional, Any, Tuple, Union, NamedTuple
+from typing import Dict, FrozenSet, List, Set, Optional, Any, Tuple, Union, NamedTuple
 from ..utils.visitor import ASTVisitor
 from ..utils.nodes import (
     ASTNode, Program, ClassDecl, AttributeDecl, Attribute, MethodDecl,
@@ -30,6 +32,85 @@ from .static_error import (
     MustInLoop, IllegalConstantExpression, IllegalArrayLiteral,
     IllegalMemberAccess, NoEntryPoint
 )
+from ..utils.constant_eval import NOT_CONSTANT, ConstantEvaluator, converted
+
+
+class ArrayTypeInfo:
+    """
+    Checker-side array type, hash-consed: ArrayTypeInfo.of returns the one
+    object for each (elem, size), so two array types are the same type
+    exactly when they are the same object. Primitive and class types are
+    interned strings; elem is None for the empty literal {}.
+    """
+
+    __slots__ = ("elem", "size")
+    _table: Dict[Tuple[Any, int], "ArrayTypeInfo"] = {}
+
+    @classmethod
+    def of(cls, elem: Any, size: int) -> "ArrayTypeInfo":
+        key = (elem, size)
+        t = cls._table.get(key)
+        if t is None:
+            t = object.__new__(cls)
+            object.__setattr__(t, "elem", elem)
+            object.__setattr__(t, "size", size)
+            cls._table[key] = t
+        return t
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ArrayTypeInfo is immutable")
+
+    def __reduce__(self):
+        # Unpickling (e.g. in a checker worker process) re-interns the type
+        return (ArrayTypeInfo.of, (self.elem, self.size))
+
+    def __repr__(self):
+        return f"{self.elem}[{self.size}]"
+
+
+class ScopeChain:
+    """
+    Persistent environment: one scope dict plus a pointer to the enclosing chain.
+
+    Pushing a scope (class, method, constructor, block, loop body) is O(1)
+    and never copies or mutates the enclosing chain, which stays valid when
+    the inner scope is done. Iterating yields the scope dicts from the
+    innermost outwards. in_loop is computed per node, so break/continue
+    checks do not walk the chain.
+    """
+
+    __slots__ = ("scope", "parent", "in_loop")
+
+    def __init__(self, scope: Dict[str, Any], parent: Optional["ScopeChain"] = None):
+        self.scope = scope
+        self.parent = parent
+        self.in_loop = scope.get("in_loop", False) or (parent is not None and parent.in_loop)
+
+    def push(self, scope: Dict[str, Any]) -> "ScopeChain":
+        return ScopeChain(scope, self)
+
+    def __iter__(self):
+        node = self
+        while node is not None:
+            yield node.scope
+            node = node.parent
+
+
+class CheckResult(NamedTuple):
+    """
+    What a passing check_program run leaves behind for recheck_program.
+
+    Attributes:
+        order: Class names in declaration order
+        classes: Class envs by name, io included
+        dependencies: For each class, the other classes its check read
+    """
+
+    order: Tuple[str, ...]
+    classes: Dict[str, Dict[str, Any]]
+    dependencies: Dict[str, FrozenSet[str]]
+
+
 class StaticChecker(ASTVisitor):
     """
     Stateless static semantic checker for OPLang using visitor pattern.
@@ -48,10 +129,98 @@ class StaticChecker(ASTVisitor):
 
     Also checks for valid entry point: static void main() with no parameters.
     """
+    # Cleared while declarations are collected for check_program_parallel
+    check_bodies = True
+
     def check_program(self, ast):
         """Convenience method to run checker on AST."""
-        global_env = [{"class": "io", "statics": {"attrs": [], "methods": self.global_env}}]
-        self.visit_program(ast, global_env)
+        return self.visit_program(ast)
+
+    def check_program_parallel(self, ast, max_workers: Optional[int] = None):
+        """
+        check_program with the class bodies checked across a process pool.
+
+        Phase one declares the classes in order without visiting method,
+        constructor or destructor bodies. Bodies never change a class env, so
+        this builds every env exactly as the sequential check leaves it, and
+        stops where a declaration fails. Phase two checks each class up to
+        that point in full in a worker, starting from the envs of the classes
+        before it, which is all the sequential check lets it see. The first
+        class in declaration order that fails is checked again here, so the
+        error raised is the one check_program would raise.
+
+        Returns:
+            The CheckResult of ast, as check_program
+        """
+        decls = ast.class_decls
+        base_env = self._begin_program()
+        end = len(decls)
+        failed = None
+        self.check_bodies = False
+        try:
+            for index, class_decl in enumerate(decls):
+                self._check_class(class_decl, base_env)
+        except Exception:
+            end = index + 1
+            failed = index
+        finally:
+            self.check_bodies = True
+        declared = self.classes
+
+        if end:
+            chunksize = max(1, end // (4 * (max_workers or os.cpu_count() or 1)))
+            with ProcessPoolExecutor(
+                max_workers,
+                initializer=_init_check_worker,
+                initargs=(ast, declared, sys.getrecursionlimit()),
+            ) as pool:
+                results = list(pool.map(_check_class_worker, range(end), chunksize=chunksize))
+        else:
+            results = []
+
+        dependencies = {}
+        for index, class_deps in enumerate(results):
+            if class_deps is None:
+                failed = index
+                break
+            dependencies[decls[index].name] = class_deps
+        if failed is not None:
+            # Checking the first failing class again raises its error here
+            self._check_class_at(ast, declared, failed)
+
+        self._check_entry_point(ast)
+        return CheckResult(tuple(d.name for d in decls), declared, dependencies)
+
+    def recheck_program(self, ast, previous: Optional[CheckResult], changed):
+        """
+        Re-check ast after an edit, visiting only what the edit can affect.
+
+        changed holds the ClassDecls of ast that differ from the program
+        previous was computed for. They are checked again together with
+        every class that depends on them, directly or transitively; all other
+        classes reuse their envs from previous. Without a previous result, or
+        when classes were added, removed, renamed or reordered, the whole
+        program is checked.
+
+        Returns:
+            The CheckResult of ast; errors are raised as by check_program
+        """
+        order = tuple(d.name for d in ast.class_decls)
+        if previous is None or order != previous.order:
+            return self.check_program(ast)
+
+        dependents = {}
+        for cname, deps in previous.dependencies.items():
+            for dep in deps:
+                dependents.setdefault(dep, []).append(cname)
+        dirty = {d.name for d in changed}
+        stack = list(dirty)
+        while stack:
+            for cname in dependents.get(stack.pop(), ()):
+                if cname not in dirty:
+                    dirty.add(cname)
+                    stack.append(cname)
+        return self.visit_program(ast, (previous, dirty))
     global_env = [
         {"name": "readInt",  "params": [], "return_type": "int", "type": "int", "static": True},
         {"name": "writeInt", "params": ["int"], "return_type": "void", "type": "void", "static": True},
@@ -66,16 +235,17 @@ class StaticChecker(ASTVisitor):
         {"name": "writeStr",  "params": ["string"], "return_type": "void", "type": "void", "static": True},
         {"name": "writeStrLn","params": ["string"], "return_type": "void", "type": "void", "static": True},
     ]
+    global_index = {m["name"]: m for m in global_env}
 
         # --- PHASE 1: only register attributes (no init evaluation) ---
     def _collect_attribute_decl(self, node: "AttributeDecl", o: Any = None):
         """
         Ghi nhận tên/kiểu/const/static của các attribute vào class_env
         (không evaluate init_value ở bước này).
-        Sử dụng cùng cấu trúc target mà code hiện tại dùng: o[0][kind]['attrs'].
+        Sử dụng cùng cấu trúc target mà code hiện tại dùng: o.scope[kind]['attrs'].
         """
         kind = "statics" if node.is_static else "locals"
-        target = o[0][kind]["attrs"]
+        target = o.scope[kind]["attrs"]
 
         declared_type = node.attr_type.accept(self, o)
         declared_type_name = self.get_type_name(declared_type)
@@ -84,20 +254,20 @@ class StaticChecker(ASTVisitor):
                 raise UndeclaredClass(declared_type_name)
         for attr in node.attributes:
             # nếu đã có tên tương tự trong target -> Redeclared
-            if any(a["name"] == attr.name for a in target):
+            if attr.name in target:
                 raise Redeclared("Attribute", attr.name)
             # tạo entry "light" — chưa ghi value_type vì chưa evaluate init
-            target.append({
+            target[attr.name] = {
                 "name": attr.name,
                 "type": declared_type_name,
                 "const": node.is_final or isinstance(node.attr_type, ReferenceType),
                 "value_type": None,
                 "static": node.is_static
-            })
+            }
 
     def _collect_attribute_decl(self, node: "AttributeDecl", o: Any = None):
         kind = "statics" if node.is_static else "locals"
-        target = o[0][kind]["attrs"]
+        target = o.scope[kind]["attrs"]
 
         declared_type = node.attr_type.accept(self, o)
         declared_type_name = self.get_type_name(declared_type)
@@ -107,36 +277,36 @@ class StaticChecker(ASTVisitor):
         
         for attr in node.attributes:
             # Kiểm tra trùng tên
-            if any(a["name"] == attr.name for a in target):
+            if attr.name in target:
                 # FIX: Kiểm tra nếu là final thì báo lỗi Redeclared Constant, ngược lại là Attribute
                 raise Redeclared("Constant" if node.is_final else "Attribute", attr.name)
             
-            target.append({
+            target[attr.name] = {
                 "name": attr.name,
                 "type": declared_type_name,
                 "const": node.is_final or isinstance(node.attr_type, ReferenceType),
                 "value_type": None,
                 "static": node.is_static
-            })
+            }
 
     def _check_attribute_decl(self, node: "AttributeDecl", o: Any = None):
         kind = "statics" if node.is_static else "locals"
-        target = o[0][kind]["attrs"]
+        target = o.scope[kind]["attrs"]
         declared_type = node.attr_type.accept(self, o)
         declared_typename = self.get_type_name(declared_type)
         
         # Context scope for init expression evaluation
-        init_env = [{
-            "current": o[0]["current"],
-            "inherit": o[0].get("inherit", []),
+        init_env = o.push({
+            "current": o.scope["current"],
+            "inherit": o.scope.get("inherit", []),
             "static_context": node.is_static # Mark context as static or instance
-        }] + o
+        })
 
         last_init_expr = None
         for attr in node.attributes[::-1]:
             if attr.init_value:
                 last_init_expr = attr.init_value
-            sym = next((a for a in target if a["name"] == attr.name), None)
+            sym = target.get(attr.name)
             if sym is None:
                 raise UndeclaredAttribute(attr.name)
 
@@ -180,9 +350,57 @@ class StaticChecker(ASTVisitor):
                     raise TypeMismatchInStatement(node)
 
             sym["value_type"] = type_check
+            if is_const:
+                self._record_constant(attr, sym, declared_typename, init_env)
 
 
+    def _record_constant(self, decl, sym, type_name, env):
+        """
+        Evaluate the initializer of a checked final variable or attribute and,
+        if it is a compile-time constant, keep its value in the symbol (for
+        later constants) and on the AST node as decl.constant (for codegen).
+        """
+        value = ConstantEvaluator(lambda expr: self._named_constant(expr, env)).evaluate(decl.init_value)
+        value = converted(value, type_name) if value is not NOT_CONSTANT else value
+        if value is not NOT_CONSTANT:
+            sym["value"] = value
+            decl.constant = value
+
+    def _named_constant(self, expr, env):
+        """Value of a final name, this.x or A.x whose value is known, else NOT_CONSTANT."""
+        sym = None
+        if isinstance(expr, Identifier):
+            found = self.lookupInside(expr.name, env)
+            if found[0]:
+                sym = found[1]
+        elif isinstance(expr, PostfixExpression) and len(expr.postfix_ops) == 1 \
+                and isinstance(expr.postfix_ops[0], MemberAccess):
+            if isinstance(expr.primary, ThisExpression):
+                owner = env.scope.get("current")
+            elif isinstance(expr.primary, Identifier) and not self.lookupInside(expr.primary.name, env)[0]:
+                owner = expr.primary.name
+            else:
+                return NOT_CONSTANT
+            found = self.lookupClassMember(expr.postfix_ops[0].member_name, env, owner)
+            if found[0] and found[2] == "attribute":
+                sym = found[1]
+        if not isinstance(sym, dict) or not sym.get("const"):
+            return NOT_CONSTANT
+        return sym.get("value", NOT_CONSTANT)
+
     def check_type(self, from_type, to_type, env):
+        """
+        Memoized _check_type. Types are interned, so (from, to) is a cheap
+        key; the table is cleared whenever a class is declared because that
+        is the only thing that can change an answer.
+        """
+        key = (from_type, to_type)
+        result = self.type_cache.get(key)
+        if result is None:
+            result = self.type_cache[key] = self._check_type(from_type, to_type, env)
+        return result
+
+    def _check_type(self, from_type, to_type, env):
         """
         Check for type compatibility (Coercion):
         1. Exact match (same_type)
@@ -208,33 +426,11 @@ class StaticChecker(ASTVisitor):
             return True
 
         # 4. Subclass -> Superclass (Inheritance Check)
+        # Every class knows its ancestors from the moment it is declared
         if isinstance(from_type, str) and isinstance(to_type, str):
-            # Use lookupGlobal to get class def, ignoring local variable shadowing
-            found_class = self.lookupGlobal(from_type, env)
-            if found_class[0]:
-                # Get immediate parents
-                parents = found_class[1].get("inherit", [])
-                
-                # Check direct inheritance
-                if to_type in parents:
-                    return True
-                
-                # Check deep inheritance (Ancestors) using a queue
-                queue = list(parents)
-                visited = set(parents)
-                while queue:
-                    curr = queue.pop(0)
-                    if curr == to_type:
-                        return True
-                    
-                    # Fetch parent class info
-                    curr_cls = self.lookupGlobal(curr, env)
-                    if curr_cls[0]:
-                        grandparents = curr_cls[1].get("inherit", [])
-                        for gp in grandparents:
-                            if gp not in visited:
-                                visited.add(gp)
-                                queue.append(gp)
+            found_class = self._class_env(from_type)
+            if found_class is not None and to_type in found_class["ancestor_set"]:
+                return True
 
         return False
 
@@ -242,20 +438,79 @@ class StaticChecker(ASTVisitor):
         if isinstance(t, ReferenceType):
             return self.get_type_name(t.referenced_type)
         if isinstance(t, PrimitiveType):
-            return t.type_name
+            return sys.intern(t.type_name)
         if isinstance(t, ClassType):
-            return t.class_name
+            return sys.intern(t.class_name)
         if isinstance(t, ArrayType):
-            return {"kind": "array", "elem": self.get_type_name(t.element_type), "size": t.size}
-        return str(t)
+            return ArrayTypeInfo.of(self.get_type_name(t.element_type), t.size)
+        return sys.intern(str(t))
 
     # ============================================
     # LOOKUP FUNCTIONS
     # ============================================
+    #
+    # Symbol tables are hash indexed:
+    #   - a local scope maps name -> symbol in scope["local"]
+    #   - a class env keeps its members in statics/locals, each split into
+    #     "attrs" (name -> symbol) and "methods" (name -> overloads, in
+    #     declaration order)
+    #   - self.classes maps class name -> class env (io included); a class
+    #     is registered, with its ancestor table, as soon as its header has
+    #     been checked
+
+    @staticmethod
+    def _new_class_env(name, inherit):
+        class_env = {
+            "class": name,
+            "current": name,
+            "statics": {"attrs": {}, "methods": {}},
+            "locals": {"attrs": {}, "methods": {}},
+            "inherit": inherit,
+            # filled in by _link_ancestors
+            "ancestors": [],
+            "ancestor_set": frozenset(),
+            "lookup_order": [],
+        }
+        class_env["lookup_order"] = [class_env]
+        return class_env
 
-        # ============================================
-    # LOOKUP FUNCTIONS (bản đầy đủ, tường minh)
-    # ============================================
+    def _link_ancestors(self, class_env, parent):
+        """
+        Precompute the ancestors of a class from its (already declared) parent.
+
+        ancestors lists the superclasses nearest first; lookup_order is the
+        order lookupClassMember searches: the class itself, then its
+        ancestors starting from the root of the hierarchy.
+        """
+        if parent is None:
+            return
+        pname = class_env["inherit"][0]
+        ancestors = [pname] + parent.get("ancestors", [])
+        class_env["ancestors"] = ancestors
+        class_env["ancestor_set"] = frozenset(ancestors)
+        class_env["lookup_order"] = [class_env] + [
+            self._class_env(a) for a in reversed(ancestors) if a in self.classes
+        ]
+
+    @staticmethod
+    def _find_member(class_env, name, with_methods=True):
+        """
+        Member of one class, looked up in the order static methods, instance
+        methods, static attributes, instance attributes.
+
+        Returns:
+            (symbol, "method" | "attribute", "static" | "local") or None
+        """
+        if with_methods:
+            for kind, storage in (("statics", "static"), ("locals", "local")):
+                overloads = class_env[kind]["methods"].get(name)
+                if overloads:
+                    return overloads[0], "method", storage
+        for kind, storage in (("statics", "static"), ("locals", "local")):
+            sym = class_env[kind]["attrs"].get(name)
+            if sym is not None:
+                return sym, "attribute", storage
+        return None
 
     def lookupClass(self, name, env):
         """
@@ -263,16 +518,14 @@ class StaticChecker(ASTVisitor):
         xem như class name bị shadow → không được dùng trong ngữ cảnh này.
         """
         # 1) Kiểm tra shadow từ local scope
-        if env and isinstance(env, list) and "local" in env[0]:
-            for var in env[0]["local"]:
-                if var["name"] == name:
-                    # Class name bị che khuất bởi biến local
-                    return [False, None, None]
+        if env is not None and "local" in env.scope and name in env.scope["local"]:
+            # Class name bị che khuất bởi biến local
+            return [False, None, None]
 
-        # 2) Không bị shadow → tra class theo env
-        for (idx, item) in enumerate(env):
-            if item.get("class") == name:
-                return [True, item, idx]
+        # 2) Không bị shadow → tra class theo global class map
+        cls = self._class_env(name)
+        if cls is not None:
+            return [True, cls, "class"]
 
         return [False, None, None]
 
@@ -283,46 +536,20 @@ class StaticChecker(ASTVisitor):
         Dùng cho tra cứu symbol trong toàn bộ chương trình.
         """
         # Nếu đang trong method, ta lưu tên method hiện hành
-        current_method = env[0].get("method", "")
-
-        # Duyệt qua từng class trong env (trừ phần local stack)
-        for classItem in env:
-            if "class" not in classItem:
+        current_method = env.scope.get("method", "")
+        classes = self.classes
+
+        # Class hiện tại trước, sau đó các class khác theo thứ tự khai báo
+        order = [current_class] if current_class in classes else []
+        order += [c for c in classes if c != current_class]
+        for cname in order:
+            found = self._find_member(self._class_env(cname), name, bool(current_method))
+            if found is None:
                 continue
-
-            # --- Class hiện tại ---
-            if classItem["class"] == current_class:
-                # Nếu đang trong method, ưu tiên method scope
-                if current_method:
-                    for m in classItem["statics"]["methods"]:
-                        if m["name"] == name:
-                            return [True, m, "method", "static", classItem["class"]]
-                    for m in classItem["locals"]["methods"]:
-                        if m["name"] == name:
-                            return [True, m, "method", "local", classItem["class"]]
-                # Thuộc tính
-                for a in classItem["statics"]["attrs"]:
-                    if a["name"] == name:
-                        return [True, a, "attribute", "static", classItem["class"]]
-                for a in classItem["locals"]["attrs"]:
-                    if a["name"] == name:
-                        return [True, a, "attribute", "local", classItem["class"]]
-
-            # --- Class khác (có thể là cha) ---
-            else:
-                if current_method:
-                    for m in classItem["statics"]["methods"]:
-                        if m["name"] == name:
-                            return [True, m, "method", "static", classItem["class"], "inherited"]
-                    for m in classItem["locals"]["methods"]:
-                        if m["name"] == name:
-                            return [True, m, "method", "local", classItem["class"], "inherited"]
-                for a in classItem["statics"]["attrs"]:
-                    if a["name"] == name:
-                        return [True, a, "attribute", "static", classItem["class"], "inherited"]
-                for a in classItem["locals"]["attrs"]:
-                    if a["name"] == name:
-                        return [True, a, "attribute", "local", classItem["class"], "inherited"]
+            sym, kind, storage = found
+            if cname == current_class:
+                return [True, sym, kind, storage, cname]
+            return [True, sym, kind, storage, cname, "inherited"]
 
         return [False, None, None]
 
@@ -331,52 +558,39 @@ class StaticChecker(ASTVisitor):
         Tìm biến/hàm trong class hiện tại hoặc cha (kế thừa).
         Đã sửa: Luôn tìm kiếm method bất kể ngữ cảnh (bỏ check if current_method).
         """
-        # --- Duyệt class hiện tại ---
-        for classItem in env:
-            if classItem.get("class") == current_class:
-                # Tìm trong Methods (Static & Local)
-                for m in classItem["statics"]["methods"]:
-                    if m["name"] == name:
-                        return [True, m, "method", "static", classItem["class"]]
-                for m in classItem["locals"]["methods"]:
-                    if m["name"] == name:
-                        return [True, m, "method", "local", classItem["class"]]
-                
-                # Tìm trong Attributes
-                for a in classItem["statics"]["attrs"]:
-                    if a["name"] == name:
-                        return [True, a, "attribute", "static", classItem["class"]]
-                for a in classItem["locals"]["attrs"]:
-                    if a["name"] == name:
-                        return [True, a, "attribute", "local", classItem["class"]]
-
-        # --- Duyệt các class cha nếu có ---
+        # --- Class hiện tại ---
+        class_env = self._class_env(current_class)
+        if class_env is not None:
+            found = self._find_member(class_env, name)
+            if found is not None:
+                return [True, found[0], found[1], found[2], current_class]
+
+        # --- Các class cha, duyệt từ cuối danh sách ---
         if parents:
-            stack = parents.copy()
-            while len(stack) > 0:
-                parent_class = stack[-1]
-                for classItem in env:
-                    if classItem.get("class") == parent_class:
-                        # Tìm trong Methods (Inherited)
-                        for m in classItem["statics"]["methods"]:
-                            if m["name"] == name:
-                                return [True, m, "method", "static", classItem["class"], "inherited"]
-                        for m in classItem["locals"]["methods"]:
-                            if m["name"] == name:
-                                return [True, m, "method", "local", classItem["class"], "inherited"]
-                        
-                        # Tìm trong Attributes (Inherited)
-                        for a in classItem["statics"]["attrs"]:
-                            if a["name"] == name:
-                                return [True, a, "attribute", "static", classItem["class"], "inherited"]
-                        for a in classItem["locals"]["attrs"]:
-                            if a["name"] == name:
-                                return [True, a, "attribute", "local", classItem["class"], "inherited"]
-                stack.pop()
+            for parent_class in reversed(parents):
+                parent_env = self._class_env(parent_class)
+                if parent_env is None:
+                    continue
+                found = self._find_member(parent_env, name)
+                if found is not None:
+                    return [True, found[0], found[1], found[2], parent_class, "inherited"]
 
         return [False, None, None]
 
     def lookupInside(self, name, env):
+        """
+        Memoized _lookup_inside, per member being checked. Keyed by the scope
+        chain node and the name; cleared whenever a local or parameter is
+        declared, since that is the only way a name can change meaning while
+        a member is checked.
+        """
+        key = (env, name)
+        found = self.name_cache.get(key)
+        if found is None:
+            found = self.name_cache[key] = self._lookup_inside(name, env)
+        return found
+
+    def _lookup_inside(self, name, env):
         """
         Tìm identifier:
         1. Duyệt ngược các scope cục bộ (Block -> Method).
@@ -386,9 +600,9 @@ class StaticChecker(ASTVisitor):
         for scope in env:
             # Nếu gặp scope chứa biến local
             if "local" in scope:
-                for x in scope["local"]:
-                    if x["name"] == name:
-                        return [True, x, "local"]
+                sym = scope["local"].get(name)
+                if sym is not None:
+                    return [True, sym, "local"]
             
             # Nếu gặp ranh giới Class (scope của ClassDecl), dừng tìm kiếm biến cục bộ
             # Vì biến cục bộ không thể "xuyên" qua ranh giới method/class ra ngoài global theo cách này
@@ -396,8 +610,8 @@ class StaticChecker(ASTVisitor):
                 break
 
         # --- 2. Tìm trong class hiện tại hoặc cha (Members) ---
-        current_class = env[0].get("current")
-        inherit = env[0].get("inherit", [])
+        current_class = env.scope.get("current")
+        inherit = env.scope.get("inherit", [])
         lookup = self.lookupVarFromTail(name, env, current_class, inherit)
         if lookup[0]:
             return lookup
@@ -406,67 +620,68 @@ class StaticChecker(ASTVisitor):
         return [False, None, None]
 
     def lookupClassMember(self, name, env, current_class):
+        """
+        Memoized _lookup_class_member, per member being checked. Class envs
+        only change between members, so (class, name) decides the result.
+        """
+        key = (current_class, name)
+        found = self.member_cache.get(key)
+        if found is None:
+            found = self.member_cache[key] = self._lookup_class_member(name, current_class)
+        return found
+
+    def _lookup_class_member(self, name, current_class):
         if current_class == "io":
-            for m in self.global_env:
-                if m["name"] == name:
-                    return [True, m, "method", "static", "io"]
+            m = self.global_index.get(name)
+            if m is not None:
+                return [True, m, "method", "static", "io"]
             return [False, None, None, None, None]
-        
-        # 1. Tìm định nghĩa class hiện tại để lấy danh sách cha (inherit)
-        # Dùng lookupGlobal để chắc chắn tìm thấy Class Definition (bỏ qua local shadowing)
-        found_cls = self.lookupGlobal(current_class, env)
-        
-        full_parents = []
-        if found_cls[0]:
-            # Lấy danh sách cha trực tiếp
-            parents = found_cls[1].get("inherit", [])
-            
-            # 2. Thu thập toàn bộ danh sách tổ tiên (Deep Inheritance support)
-            # Vì lookupVarFromTail chỉ duyệt qua list parents được truyền vào mà không tự đệ quy
-            queue = list(parents)
-            while queue:
-                p = queue.pop(0)
-                if p not in full_parents:
-                    full_parents.append(p)
-                    # Tìm cha của p để thêm vào queue
-                    p_cls = self.lookupGlobal(p, env)
-                    if p_cls[0]:
-                        queue.extend(p_cls[1].get("inherit", []))
-        
-        # 3. Gọi lookupVarFromTail với danh sách đầy đủ các class cha
-        found = self.lookupVarFromTail(name, env, current_class, full_parents)
-        
-        if found[0]:
-            return found
+
+        # Duyệt theo thứ tự tra cứu đã tính sẵn khi khai báo class
+        # (class hiện tại, rồi tổ tiên từ gốc xuống)
+        found_cls = self._class_env(current_class)
+        if found_cls is None:
+            return [False, None, None, None, None]
+        for owner in found_cls["lookup_order"]:
+            found = self._find_member(owner, name)
+            if found is not None:
+                if owner is found_cls:
+                    return [True, found[0], found[1], found[2], current_class]
+                return [True, found[0], found[1], found[2], owner["class"], "inherited"]
+
         return [False, None, None, None, None]
 
     def lookupGlobal(self, name, env):
         """Tìm class hoặc builtin global function."""
         # Class global
-        for cls in env:
-            if cls.get("class") == name:
-                return [True, cls, "class"]
+        cls = self._class_env(name)
+        if cls is not None:
+            return [True, cls, "class"]
 
         # Builtin function
-        for f in self.global_env:
-            if f["name"] == name:
-                return [True, f, "builtin"]
+        f = self.global_index.get(name)
+        if f is not None:
+            return [True, f, "builtin"]
 
         return [False, None, None]
 
+    def _class_env(self, name):
+        """
+        Env of a declared class (or io), or None. Every class env read while
+        checking a class goes through here, which is how the dependency graph
+        used by recheck_program is recorded.
+        """
+        cls = self.classes.get(name)
+        if cls is not None and name != self.current_class and name != "io":
+            self.current_deps.add(name)
+        return cls
+
     def same_type(self, a, b):
-        # a và b đều là string → primitive hoặc class
+        # Mọi kiểu đều được intern → cùng kiểu khi và chỉ khi cùng object
+        # (chuỗi intern so sánh == bằng identity trước tiên)
         if isinstance(a, str) and isinstance(b, str):
             return a == b
-        # a và b đều là dict kiểu array
-        if isinstance(a, dict) and isinstance(b, dict):
-            return (
-                a["kind"] == "array"
-                and b["kind"] == "array"
-                and self.same_type(a["elem"], b["elem"])
-                and a["size"] == b["size"]
-            )
-        return False
+        return a is b and isinstance(a, ArrayTypeInfo)
     # ============================================
     # ============================================
     # ============================================
@@ -476,9 +691,58 @@ class StaticChecker(ASTVisitor):
     # ============================================
          
     def visit_program(self, node: "Program", o: Any = None):
-        base_env = [{"class": "io", "statics": {"attrs": [], "methods": self.global_env}}]
-        env = reduce(lambda acc, c: acc + [c.accept(self, acc)], node.class_decls, base_env)
+        # o is None for a full check, or (previous CheckResult, names of the
+        # classes to check again) when called from recheck_program
+        previous, dirty = o if o is not None else (None, None)
+        base_env = self._begin_program(previous.classes["io"] if previous is not None else None)
+        for class_decl in node.class_decls:
+            cname = class_decl.name
+            if previous is not None and cname not in dirty:
+                self.classes[cname] = previous.classes[cname]
+                self.dependencies[cname] = previous.dependencies[cname]
+                self.type_cache.clear()
+                continue
+            self._check_class(class_decl, base_env)
+
+        self._check_entry_point(node)
+        return CheckResult(tuple(d.name for d in node.class_decls), self.classes, self.dependencies)
+
+    def _begin_program(self, io_env=None):
+        """Reset the per-program state and return the top-level env."""
+        if io_env is None:
+            io_env = self._new_class_env("io", [])
+            io_env["statics"]["methods"] = {m["name"]: [m] for m in self.global_env}
+        self.classes = {"io": io_env}
+        self.type_cache = {}
+        self.name_cache = {}
+        self.member_cache = {}
+        self.dependencies = {}
+        self.current_class = None
+        self.current_deps = set()
+        # Declared classes are registered in self.classes, so the top-level
+        # env is just io and each class is checked against it in order
+        return ScopeChain(io_env)
+
+    def _check_class(self, class_decl, base_env):
+        """Check one class, recording the classes it depends on."""
+        cname = class_decl.name
+        self.current_class = cname
+        self.current_deps = set()
+        class_decl.accept(self, base_env)
+        self.dependencies[cname] = frozenset(self.current_deps)
+
+    def _check_class_at(self, program, declared, index):
+        """
+        Check the index-th class of program in full, with the classes before
+        it taken from declared (envs built by phase one of
+        check_program_parallel).
+        """
+        base_env = self._begin_program(declared["io"])
+        for class_decl in program.class_decls[:index]:
+            self.classes[class_decl.name] = declared[class_decl.name]
+        self._check_class(program.class_decls[index], base_env)
 
+    def _check_entry_point(self, node):
         has_main = any(
             isinstance(m, MethodDecl)
             and m.name == "main"
@@ -499,21 +763,18 @@ class StaticChecker(ASTVisitor):
         if self.lookupGlobal(cname, o)[0]:
             raise Redeclared("Class", cname)
 
-        class_env = {
-            "class": cname,
-            "current": cname,
-            "statics": {"attrs": [], "methods": []},
-            "locals": {"attrs": [], "methods": []},
-            "inherit": [pname] if pname else [],
-        }
+        class_env = self._new_class_env(cname, [pname] if pname else [])
 
         if pname:
             found = self.lookupGlobal(pname, o)
             if not found[0]:
                 raise UndeclaredClass(pname)
+            self._link_ancestors(class_env, found[1])
+        self.classes[cname] = class_env
+        self.type_cache.clear()
 
         # Env to use when visiting members (class at head)
-        env_with_class = [class_env] + o
+        env_with_class = o.push(class_env)
 
         # === PHA 1: collect attribute declarations (only register symbols) ===
         for mem in node.members:
@@ -522,14 +783,15 @@ class StaticChecker(ASTVisitor):
 
         # === PHA 2: check attributes (init values) and visit methods ===
         for mem in node.members:
+            # Lookups are memoized per member (see lookupInside)
+            self.name_cache.clear()
+            self.member_cache.clear()
             if isinstance(mem, AttributeDecl):
                 self._check_attribute_decl(mem, env_with_class)
             else:
                 # methods / constructors / etc — reuse existing visitor behaviour
                 mem.accept(self, env_with_class)
 
-        # cuối cùng thêm class_env vào global env (như cậu đang làm)
-        o.append(class_env)
         return class_env
 
     
@@ -539,21 +801,20 @@ class StaticChecker(ASTVisitor):
         Sửa lỗi: Cho phép biến final kiểu ClassType được khởi tạo bởi non-constant expression (như new Class).
         """
         kind = "statics" if node.is_static else "locals"
-        target = o[0][kind]["attrs"]
+        target = o.scope[kind]["attrs"]
 
         declared_type = node.attr_type.accept(self, o)
         declared_typename = self.get_type_name(declared_type)
         
-        methods_in_class = o[0]["statics"]["methods"] + o[0]["locals"]["methods"]
         last_init_expr = None
         for attr in node.attributes[::-1]:
             if attr.init_value:
                 last_init_expr = attr.init_value
             # --- Redeclaration ---
-            if any(a["name"] == attr.name for a in target):
+            if attr.name in target:
                 raise Redeclared("Attribute", attr.name)
 
-            if any(m["name"] == attr.name for m in methods_in_class):
+            if attr.name in o.scope["statics"]["methods"] or attr.name in o.scope["locals"]["methods"]:
                 raise Redeclared("Attribute", attr.name)
             # --- Xác định kiểu gán ban đầu ---
             init_type = attr.init_value.accept(self, o) if attr.init_value else None
@@ -612,13 +873,13 @@ class StaticChecker(ASTVisitor):
                     raise TypeMismatchInStatement(node)
 
             # --- Thêm vào scope ---
-            target.append({
+            target[attr.name] = {
                 "name": attr.name,
                 "type": declared_typename,
                 "const": is_const,
                 "value_type": init_type[0] if init_type else None,
                 "static": node.is_static
-            })
+            }
 
 
     def visit_attribute(self, node: "Attribute", o: Any = None):
@@ -628,17 +889,17 @@ class StaticChecker(ASTVisitor):
      
     def visit_method_decl(self, node: "MethodDecl", o: Any = None):
         kind = "statics" if node.is_static else "locals"
-        target = o[0][kind]["methods"]
+        target = o.scope[kind]["methods"]
 
         # --- FIX START: Kiểm tra trùng tên với Attribute ---
         # Nguyên tắc: Một method không được phép trùng tên với bất kỳ attribute nào (static hoặc instance) trong class
         
         # 1. Kiểm tra với Instance Attributes
-        if any(attr["name"] == node.name for attr in o[0]["locals"]["attrs"]):
+        if node.name in o.scope["locals"]["attrs"]:
             raise Redeclared("Method", node.name)
             
         # 2. Kiểm tra với Static Attributes
-        if any(attr["name"] == node.name for attr in o[0]["statics"]["attrs"]):
+        if node.name in o.scope["statics"]["attrs"]:
              raise Redeclared("Method", node.name)
         # --- FIX END ---
 
@@ -646,8 +907,8 @@ class StaticChecker(ASTVisitor):
         param_types = [self.get_type_name(p.param_type) for p in node.params]
         
         # Kiểm tra redeclared với các Method khác (Overloading check)
-        for m in target:
-            if m["name"] == node.name and m["param_types"] == param_types:
+        for m in target.get(node.name, []):
+            if m["param_types"] == param_types:
                 raise Redeclared("Method", node.name)
 
         # Xác định kiểu trả về
@@ -662,19 +923,19 @@ class StaticChecker(ASTVisitor):
             "static": node.is_static
         }
         # Tạo môi trường local (method scope)
-        target.append(method_info)
-        local_env = [{
-            "current": o[0]["class"],
-            "inherit": o[0].get("inherit", []),
-            "local": [],
+        target.setdefault(node.name, []).append(method_info)
+        local_env = o.push({
+            "current": o.scope["class"],
+            "inherit": o.scope.get("inherit", []),
+            "local": {},
             "return_type": method_info["return_type"],
             "method": node.name,
             "is_static": node.is_static
-        }] + o
+        })
         # Thêm các tham số vào local scope
         list(map(lambda p: self.visit_parameter(p, local_env), node.params))
         # Duyệt thân hàm
-        if node.body:
+        if node.body and self.check_bodies:
             # self.visit_block_statement(node.body, local_env)
             self.visit_method_body(node.body, local_env)
         # Lưu vào môi trường class
@@ -686,14 +947,14 @@ class StaticChecker(ASTVisitor):
             s.accept(self, env)
      
     def visit_constructor_decl(self, node: "ConstructorDecl", o: Any = None):
-        cname = o[0]["class"]
+        cname = o.scope["class"]
         param_types = [self.get_type_name(p.param_type) for p in node.params]
         kind = "locals"
-        target = o[0][kind]["methods"]
+        target = o.scope[kind]["methods"]
         if node.name != cname:
             raise TypeMismatchInStatement(node)
-        for m in target:
-            if m["name"] == node.name and m["param_types"] == param_types:
+        for m in target.get(node.name, []):
+            if m["param_types"] == param_types:
                 raise Redeclared("Method", node.name)
         method_info = {
             "kind": "Constructor",
@@ -704,40 +965,40 @@ class StaticChecker(ASTVisitor):
             "return_type": cname,
             "static": "locals"
         }
-        env = [{
+        env = o.push({
             "current": cname,
-            "inherit": o[0].get("inherit", []),
-            "local": [],
+            "inherit": o.scope.get("inherit", []),
+            "local": {},
             "return_type": cname,     # constructor return type = class
             "method": cname           # để lookupInside/lookupClassMember hoạt động đúng
-        }] + o
+        })
         list(map(lambda p: self.visit_parameter(p, env), node.params))
-        if node.body:
+        if node.body and self.check_bodies:
             self.visit_block_statement(node.body, env)
-        target.append(method_info)
+        target.setdefault(node.name, []).append(method_info)
 
      
     def visit_destructor_decl(self, node: "DestructorDecl", o: Any = None):
-          for m in o[0]["locals"]["methods"]:
-            if m["name"] == node.name and m["kind"] == "Destructor" and m["param_types"] == []:
+          for m in o.scope["locals"]["methods"].get(node.name, []):
+            if m["kind"] == "Destructor" and m["param_types"] == []:
                 raise Redeclared("Destructor", node.name)
           method_info = {
             "kind": "Destructor",
             "name": node.name,
-            "type": o[0]["class"],
+            "type": o.scope["class"],
             "params": [],
             "param_types": [],  # lưu để so sánh sau
-            "return_type": o[0]["class"],
+            "return_type": o.scope["class"],
             "static": "locals"
           }
-          if node.body:
-            self.visit_block_statement(node.body, [{"current": o[0]["class"], "local": []}] + o)
-          o[0]["locals"]["methods"].append(method_info)
+          if node.body and self.check_bodies:
+            self.visit_block_statement(node.body, o.push({"current": o.scope["class"], "local": {}}))
+          o.scope["locals"]["methods"].setdefault(node.name, []).append(method_info)
 
      
     def visit_parameter(self, node: "Parameter", o: Any = None):
-        local_scope = o[0]["local"]
-        if any(v["name"] == node.name for v in local_scope):
+        local_scope = o.scope["local"]
+        if node.name in local_scope:
             raise Redeclared("Parameter", node.name)
 
         declared_type = node.param_type.accept(self, o)
@@ -748,7 +1009,8 @@ class StaticChecker(ASTVisitor):
             if not self.lookupGlobal(type_name, o)[0]:
                 raise UndeclaredClass(type_name)
 
-        local_scope.append({"name": node.name, "type": type_name, "const": False})
+        local_scope[node.name] = {"name": node.name, "type": type_name, "const": False}
+        self.name_cache.clear()
 
     # Type system
      
@@ -772,14 +1034,14 @@ class StaticChecker(ASTVisitor):
     def visit_block_statement(self, node: "BlockStatement", o: Any = None):
         # duyệt các biến và statement
         new_scope = {
-            "current": o[0]["current"],
-            "inherit": o[0].get("inherit", []),
-            "local": [],
-            "return_type": o[0].get("return_type", None),
-            "method": o[0].get("method", None),
-            "in_loop": o[0].get("in_loop", False)
+            "current": o.scope["current"],
+            "inherit": o.scope.get("inherit", []),
+            "local": {},
+            "return_type": o.scope.get("return_type", None),
+            "method": o.scope.get("method", None),
+            "in_loop": o.scope.get("in_loop", False)
         }
-        env = [new_scope] + o
+        env = o.push(new_scope)
         list(map(lambda v: v.accept(self, env), node.var_decls))
         list(map(lambda s: s.accept(self, env), node.statements))
 
@@ -789,13 +1051,12 @@ class StaticChecker(ASTVisitor):
         if isinstance(declared_type, ClassType):
             if not self.lookupGlobal(declared_typename, o)[0]:
                 raise UndeclaredClass(declared_typename)
-        local_scope = o[0]["local"]
-        class_env = o[1] if len(o) > 1 and isinstance(o[1], dict) and "class" in o[1] else None
+        local_scope = o.scope["local"]
         last_init_expr = None
         for var in node.variables[::-1]:
             if var.init_value:
                 last_init_expr = var.init_value
-            if any(s["name"] == var.name for s in local_scope):
+            if var.name in local_scope:
                 raise Redeclared("Constant" if node.is_final else "Variable", var.name)
             
             init_type = var.init_value.accept(self, o) if var.init_value else None
@@ -850,8 +1111,8 @@ class StaticChecker(ASTVisitor):
             else:
                 # Kiểm tra type mismatch cho biến thường
                 if init_type and not self.check_type(type_check, declared_typename, o):
-                    if type(type_check) is dict and type_check["kind"] == "array" and declared_typename["kind"] == "array":
-                        if type_check["size"] == 0 and declared_typename["size"] == 0:
+                    if isinstance(type_check, ArrayTypeInfo) and isinstance(declared_typename, ArrayTypeInfo):
+                        if type_check.size == 0 and declared_typename.size == 0:
                             continue
                     raise TypeMismatchInStatement(node)
             # Thêm vào scope
@@ -861,7 +1122,10 @@ class StaticChecker(ASTVisitor):
                 "const": is_const,
                 "value_type": type_check
             }
-            local_scope.append(res)
+            if is_const:
+                self._record_constant(var, res, declared_typename, o)
+            local_scope[var.name] = res
+            self.name_cache.clear()
 
      
     def visit_variable(self, node: "Variable", o: Any = None):
@@ -881,7 +1145,7 @@ class StaticChecker(ASTVisitor):
             
             # --- FIX START: Check static context for assignment LHS ---
             if found[0]:
-                is_static_method = o[0].get("is_static", False)
+                is_static_method = o.scope.get("is_static", False)
                 # found structure: [True, symbol, kind, storage, ...]
                 # storage is at index 3 ('local' = instance member, 'static' = static member)
                 if len(found) >= 4:
@@ -910,7 +1174,7 @@ class StaticChecker(ASTVisitor):
             # nếu base là identifier (chuỗi tên), cần lookup để biết kiểu của base
             # (ví dụ a := new A() => a type = "A")
             if base_name =="this":
-                base_sym = {"type": o[0]["current"], "const": False}
+                base_sym = {"type": o.scope["current"], "const": False}
                 base_type = base_sym["type"]
             else:
                 found_base = self.lookupInside(base_name, o)
@@ -987,7 +1251,7 @@ class StaticChecker(ASTVisitor):
         else:
             rhs_type = rhs["type"] if isinstance(rhs, dict) else str(rhs)
         # ---- so sánh kiểu ----
-        # target_type và rhs_type có thể là string (primitive/class) hoặc dict (array)
+        # target_type và rhs_type có thể là string (primitive/class) hoặc ArrayTypeInfo (array)
         if not self.check_type(rhs_type, target_type, o):
             raise TypeMismatchInStatement(node)
 
@@ -1019,29 +1283,29 @@ class StaticChecker(ASTVisitor):
         if start[0] != "int" or end[0] != "int":
             raise TypeMismatchInStatement(node)
 
-        loop_scope = [{
+        loop_scope = {
             "in_loop": True,
-            "local": o[0].get("local", []),    # giữ lại biến local như i, j
-            "current": o[0]["current"],
-            "inherit": o[0].get("inherit", []),
-            "return_type": o[0].get("return_type", None)
-        }]
-        node.body.accept(self, loop_scope + o)
+            "local": o.scope.get("local", {}),    # giữ lại biến local như i, j
+            "current": o.scope["current"],
+            "inherit": o.scope.get("inherit", []),
+            "return_type": o.scope.get("return_type", None)
+        }
+        node.body.accept(self, o.push(loop_scope))
 
      
     def visit_break_statement(self, node: "BreakStatement", o: Any = None):
-        if not any(scope.get("in_loop", False) for scope in o):
+        if not o.in_loop:
             raise MustInLoop(node)
 
      
     def visit_continue_statement(self, node: "ContinueStatement", o: Any = None):
-        if not any(scope.get("in_loop", False) for scope in o):
+        if not o.in_loop:
             raise MustInLoop(node)
 
      
     def visit_return_statement(self, node: "ReturnStatement", o: Any = None):
         # Determine expected return type from current method scope
-        expected_type = o[0].get("return_type", "void")
+        expected_type = o.scope.get("return_type", "void")
         
         if node.value:
             expr_info = node.value.accept(self, o)
@@ -1062,7 +1326,7 @@ class StaticChecker(ASTVisitor):
      
     def visit_method_invocation_statement(self, node: "MethodInvocationStatement", o: Any = None):
         # Tạo bản sao của scope
-        new_scope = o[0].copy()
+        new_scope = o.scope.copy()
         
         # 1. Đánh dấu cho phép gọi hàm void
         new_scope["is_proc"] = True
@@ -1071,7 +1335,7 @@ class StaticChecker(ASTVisitor):
         new_scope["parent_stmt"] = node
         
         # Tạo môi trường mới
-        new_env = [new_scope] + o[1:]
+        new_env = o.parent.push(new_scope)
         
         node.method_call.accept(self, new_env)
 
@@ -1189,10 +1453,10 @@ class StaticChecker(ASTVisitor):
                 is_valid = True
                 if len(found) >= 4:
                     storage = found[3]
-                    in_method = o[0].get("method") is not None
-                    is_static_method = o[0].get("is_static", False)
-                    in_attr_init = "static_context" in o[0]
-                    is_static_ctx = o[0].get("static_context", False)
+                    in_method = o.scope.get("method") is not None
+                    is_static_method = o.scope.get("is_static", False)
+                    in_attr_init = "static_context" in o.scope
+                    is_static_ctx = o.scope.get("static_context", False)
 
                     if storage == 'local':
                         if in_method and is_static_method: is_valid = False
@@ -1260,7 +1524,7 @@ class StaticChecker(ASTVisitor):
                 primary_name = getattr(node.primary, "name", str(node.primary))
         if isinstance(node.primary, ThisExpression):
             primary_name = "this"
-            primary_type = o[0].get("current")
+            primary_type = o.scope.get("current")
             is_class_ref = False 
 
         chain = [{"kind": "primary", "name": primary_name, "type": primary_type}]
@@ -1313,11 +1577,11 @@ class StaticChecker(ASTVisitor):
                 
                 expected_params = found[1]['params']
                 
-                arg_scope = o[0].copy()
+                arg_scope = o.scope.copy()
                 arg_scope["is_proc"] = False
                 if "parent_stmt" in arg_scope:
                     del arg_scope["parent_stmt"]
-                arg_env = [arg_scope] + o[1:]
+                arg_env = o.parent.push(arg_scope)
                 
                 actual_args = [a.accept(self, arg_env) for a in op.args]
 
@@ -1327,8 +1591,8 @@ class StaticChecker(ASTVisitor):
                 for act, exp in zip(actual_args, expected_params):
                     act_type = act[0] if isinstance(act, list) else (act['type'] if isinstance(act, dict) else str(act))
                     if not self.check_type(act_type, exp, o):
-                        if o[0].get("parent_stmt"):
-                            raise TypeMismatchInStatement(o[0]["parent_stmt"])
+                        if o.scope.get("parent_stmt"):
+                            raise TypeMismatchInStatement(o.scope["parent_stmt"])
                         else:
                             raise TypeMismatchInExpression(node)
                             
@@ -1344,7 +1608,7 @@ class StaticChecker(ASTVisitor):
                     is_last_op = (i == len(node.postfix_ops) - 1)
                     if not is_last_op:
                         raise TypeMismatchInExpression(node)
-                    is_proc = o[0].get("is_proc", False)
+                    is_proc = o.scope.get("is_proc", False)
                     if not is_proc:
                         raise TypeMismatchInExpression(node)
 
@@ -1355,7 +1619,7 @@ class StaticChecker(ASTVisitor):
 
             elif isinstance(op, ArrayAccess):
                 # ... (Giữ nguyên logic ArrayAccess) ...
-                if not isinstance(current_type, dict) or current_type.get("kind") != "array":
+                if not isinstance(current_type, ArrayTypeInfo):
                     raise TypeMismatchInExpression(node)
 
                 idx = op.index.accept(self, o)
@@ -1365,7 +1629,7 @@ class StaticChecker(ASTVisitor):
                 if idx_type != "int":
                     raise TypeMismatchInExpression(node)
                 
-                elem_type = current_type["elem"]
+                elem_type = current_type.elem
                 is_const = is_const and idx_const
                 chain.append({"kind": "array", "index_type": "int", "elem_type": elem_type})
                 current_type = elem_type
@@ -1406,7 +1670,7 @@ class StaticChecker(ASTVisitor):
         # Find constructors
         # Constructors are stored in locals["methods"] with kind="Constructor"
         constructors = [
-            m for m in class_env["locals"]["methods"] 
+            m for overloads in class_env["locals"]["methods"].values() for m in overloads
             if m.get("kind") == "Constructor"
         ]
         
@@ -1458,12 +1722,12 @@ class StaticChecker(ASTVisitor):
                 storage = found[3]
                 
                 # Context flags
-                in_method = o[0].get("method") is not None
-                is_static_method = o[0].get("is_static", False)
+                in_method = o.scope.get("method") is not None
+                is_static_method = o.scope.get("is_static", False)
                 
                 # Attribute init context
-                in_attr_init = "static_context" in o[0]
-                is_static_ctx = o[0].get("static_context", False)
+                in_attr_init = "static_context" in o.scope
+                is_static_ctx = o.scope.get("static_context", False)
 
                 if storage == 'local':
                     if in_method:
@@ -1495,14 +1759,14 @@ class StaticChecker(ASTVisitor):
      
     def visit_this_expression(self, node: "ThisExpression", o: Any = None):
         # Disallow in static method
-        if o[0].get("method") and o[0].get("is_static", False):
+        if o.scope.get("method") and o.scope.get("is_static", False):
             raise IllegalMemberAccess(node)
         
         # Disallow in static attribute initialization
-        if o[0].get("static_context", False):
+        if o.scope.get("static_context", False):
              raise IllegalMemberAccess(node)
              
-        return [o[0]["current"], False]
+        return [o.scope["current"], False]
 
     def visit_parenthesized_expression(
         self, node: "ParenthesizedExpression", o: Any = None
@@ -1527,15 +1791,62 @@ class StaticChecker(ASTVisitor):
 
         # Case 1: empty literal `{}` → hợp lệ
         if len(elems) == 0:
-            return [{"kind": "array", "elem": None, "size": 0}, False]
+            return [ArrayTypeInfo.of(None, 0), False]
 
         # Case 2: non-empty literal → kiểm tra type consistency
         elem_types = list(set([t[0] for t in elems]))
         if len(elem_types) > 1:
             raise IllegalArrayLiteral(node)
         is_const = all(t[1] for t in elems)
-        return [{"kind": "array", "elem": elem_types[0], "size": len(elems)}, is_const]
+        return [ArrayTypeInfo.of(elem_types[0], len(elems)), is_const]
 
      
     def visit_nil_literal(self, node: "NilLiteral", o: Any = None):
-        return ["nil", True]
\ No newline at end of file
+        return ["nil", True]
+
+
+class _CheckWorker:
+    """
+    Phase two of check_program_parallel in one worker process.
+
+    Tasks arrive in increasing class order, so the envs of the classes
+    before the next one are registered incrementally instead of being
+    copied for every class.
+    """
+
+    def __init__(self, program, declared):
+        self.program = program
+        self.declared = declared
+        self.checker = StaticChecker()
+        self.base_env = None
+        self.registered = 0
+
+    def check(self, index):
+        """Check one class; its dependencies, or None if it fails."""
+        decls = self.program.class_decls
+        if self.base_env is None or index < self.registered:
+            self.base_env = self.checker._begin_program(self.declared["io"])
+            self.registered = 0
+        classes = self.checker.classes
+        # Also replaces the env the previous task built for its own class
+        for class_decl in decls[self.registered:index]:
+            classes[class_decl.name] = self.declared[class_decl.name]
+        self.registered = index
+        try:
+            self.checker._check_class(decls[index], self.base_env)
+        except Exception:
+            return None
+        return self.checker.dependencies[decls[index].name]
+
+
+_worker = None
+
+
+def _init_check_worker(program, declared, recursion_limit):
+    global _worker
+    sys.setrecursionlimit(recursion_limit)
+    _worker = _CheckWorker(program, declared)
+
+
+def _check_class_worker(index):
+    return _worker.check(index)
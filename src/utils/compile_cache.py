@@ -0,0 +1,277 @@
+"""
+Content-addressed compile cache for OPLang.
+Stage results (ASTs, checker verdicts, generated .j text and .class bytes)
+are stored on disk as raw bytes under a key made from the stage input and
+the compiler version, so unchanged inputs skip the stage on the next run.
+
+Entries are plain data, never pickles: ASTs are stored as JSON and rebuilt
+only from the node classes of utils.nodes. The cache directory is private
+to the user: it is created with mode 0700 and not used at all when another
+user owns it or can write to it.
+"""
+
+import hashlib
+import json
+import os
+import stat
+import struct
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+
+from . import nodes
+
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "oplang"
+)
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+ENTRY_SUFFIX = ".bin"
+
+
+def compiler_version() -> str:
+    """Hash of the compiler sources (grammar and Python), so edits invalidate the cache."""
+    global _COMPILER_VERSION
+    if _COMPILER_VERSION is None:
+        digest = hashlib.sha256()
+        for root, dirs, files in os.walk(SRC_DIR):
+            dirs[:] = sorted(d for d in dirs if d not in ("__pycache__", "runtime"))
+            for name in sorted(files):
+                if name.endswith((".py", ".g4")):
+                    path = os.path.join(root, name)
+                    digest.update(os.path.relpath(path, SRC_DIR).encode("utf-8"))
+                    with open(path, "rb") as file:
+                        digest.update(file.read())
+        _COMPILER_VERSION = digest.hexdigest()
+    return _COMPILER_VERSION
+
+
+_COMPILER_VERSION: Optional[str] = None
+
+
+def private_dir(path: str) -> bool:
+    """
+    Create directory path (mode 0700) if needed; True if it is a real
+    directory owned by the current user that no one else can write to.
+    """
+    try:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        st = os.lstat(path)
+    except OSError:
+        return False
+    if not stat.S_ISDIR(st.st_mode):
+        return False
+    if hasattr(os, "getuid") and (st.st_uid != os.getuid() or st.st_mode & 0o022):
+        return False
+    return True
+
+
+def pack_files(files: Dict[str, bytes]) -> bytes:
+    """One cache entry holding several named files."""
+    parts = []
+    for name, data in sorted(files.items()):
+        encoded = name.encode("utf-8")
+        parts.append(struct.pack(">IQ", len(encoded), len(data)) + encoded + data)
+    return b"".join(parts)
+
+
+def unpack_files(entry: bytes) -> Optional[Dict[str, bytes]]:
+    """Files of an entry made by pack_files, or None if it is malformed."""
+    files = {}
+    header = struct.calcsize(">IQ")
+    pos = 0
+    while pos < len(entry):
+        if pos + header > len(entry):
+            return None
+        name_size, data_size = struct.unpack_from(">IQ", entry, pos)
+        pos += header
+        if pos + name_size + data_size > len(entry):
+            return None
+        try:
+            name = entry[pos:pos + name_size].decode("utf-8")
+        except UnicodeDecodeError:
+            return None
+        files[name] = entry[pos + name_size:pos + name_size + data_size]
+        pos += name_size + data_size
+    return files
+
+
+# Node classes an AST entry may name
+AST_NODE_CLASSES = {
+    name: cls for name, cls in vars(nodes).items()
+    if isinstance(cls, type) and issubclass(cls, nodes.ASTNode) and cls.__module__ == nodes.__name__
+}
+
+
+def encode_ast(ast: Any) -> bytes:
+    """
+    JSON for an AST (or the error string AST generation returned): a node is
+    {"node": class name, "fields": {attribute: value}}, lists are arrays.
+    Raises TypeError for values that are not nodes, lists or JSON scalars.
+    """
+    def encode(value):
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        if isinstance(value, list):
+            return [encode(item) for item in value]
+        if type(value).__name__ in AST_NODE_CLASSES and type(value) is AST_NODE_CLASSES[type(value).__name__]:
+            return {"node": type(value).__name__, "fields": {k: encode(v) for k, v in vars(value).items()}}
+        raise TypeError(f"cannot cache {type(value).__name__} in an AST")
+
+    return json.dumps(encode(ast), separators=(",", ":")).encode("utf-8")
+
+
+def decode_ast(entry: bytes) -> Any:
+    """AST of an encode_ast entry, or None if it is malformed."""
+    def decode(value):
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        if isinstance(value, list):
+            return [decode(item) for item in value]
+        if not isinstance(value, dict) or set(value) != {"node", "fields"} \
+                or not isinstance(value["fields"], dict):
+            raise ValueError("not an AST node")
+        cls = AST_NODE_CLASSES.get(value["node"])
+        if cls is None:
+            raise ValueError(f"unknown node {value['node']!r}")
+        # Set the recorded attributes only; no constructor or other code runs
+        node = cls.__new__(cls)
+        for name, field in value["fields"].items():
+            if not name.isidentifier() or name.startswith("_"):
+                raise ValueError(f"bad field {name!r}")
+            setattr(node, name, decode(field))
+        return node
+
+    try:
+        return decode(json.loads(entry.decode("utf-8")))
+    except (ValueError, RecursionError):
+        return None
+
+
+class CompileCache:
+    """
+    On-disk cache of compilation stages with a least-recently-used size cap.
+
+    Entries are bytes, stored in <cache_dir>/<stage>/<key>.bin. Reading an
+    entry touches its mtime; when the total size grows over max_bytes the
+    entries with the oldest mtime are removed first. A cache_dir that is
+    not private (see private_dir) behaves as an empty, read-only cache.
+
+    Attributes:
+        cache_dir (str): Root directory of the cache
+        max_bytes (int): Size cap for all entries together
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.version = compiler_version()
+        self.lock = threading.Lock()
+        self.total_bytes: Optional[int] = None
+        self._private: Optional[bool] = None
+
+    def usable(self) -> bool:
+        """Whether cache_dir is private to the current user (checked once)."""
+        if self._private is None:
+            self._private = private_dir(self.cache_dir)
+        return self._private
+
+    def key(self, stage: str, *parts) -> str:
+        """Key of a stage result; parts are str or bytes describing the input."""
+        digest = hashlib.sha256()
+        digest.update(self.version.encode("utf-8"))
+        digest.update(stage.encode("utf-8"))
+        for part in parts:
+            data = part if isinstance(part, bytes) else str(part).encode("utf-8")
+            digest.update(len(data).to_bytes(8, "big"))
+            digest.update(data)
+        return digest.hexdigest()
+
+    def _path(self, stage: str, key: str) -> str:
+        return os.path.join(self.cache_dir, stage, key + ENTRY_SUFFIX)
+
+    def get(self, stage: str, key: str) -> Optional[bytes]:
+        """Stored bytes, or None when there is no (readable) entry."""
+        if not self.usable():
+            return None
+        path = self._path(stage, key)
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+            os.utime(path)
+            return data
+        except OSError:
+            return None
+
+    def put(self, stage: str, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes or not self.usable():
+            return
+        path = self._path(stage, key)
+        tmp = None
+        try:
+            os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+            # Write to a private file first so readers never see half an entry
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            # An unwritable cache only costs the entry, like a failed read
+            if tmp is not None and os.path.exists(tmp):
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+            return
+        with self.lock:
+            if self.total_bytes is None:
+                self.total_bytes = self.size()
+            else:
+                self.total_bytes += len(data)
+            if self.total_bytes > self.max_bytes:
+                self.evict()
+
+    def _entries(self):
+        for stage in os.listdir(self.cache_dir):
+            stage_dir = os.path.join(self.cache_dir, stage)
+            if not os.path.isdir(stage_dir):
+                continue
+            for name in os.listdir(stage_dir):
+                if name.endswith(ENTRY_SUFFIX):
+                    path = os.path.join(stage_dir, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    yield st.st_mtime, st.st_size, path
+
+    def size(self) -> int:
+        """Total size of the entries on disk."""
+        if not self.usable():
+            return 0
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self) -> None:
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self.total_bytes = total
+
+    def clear(self) -> None:
+        with self.lock:
+            if self.usable():
+                for _, _, path in list(self._entries()):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+            self.total_bytes = 0
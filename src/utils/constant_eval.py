@@ -0,0 +1,184 @@
+"""
+Compile-time evaluation of OPLang constant expressions.
+
+Shared by the static checker, which attaches the value of every final local
+and attribute whose initializer is a constant expression, and the code
+generator, which loads those values instead of computing them at runtime.
+
+Values follow the JVM: int is 32-bit two's complement, float is IEEE single
+precision rounded after every operation, and / always yields float. A float
+literal denotes the value the Emitter loads for it (rounded to 4 decimals).
+"""
+
+import math
+import struct
+from typing import Any, Callable
+
+from .nodes import (
+    BinaryOp, BoolLiteral, Expr, FloatLiteral, IntLiteral,
+    ParenthesizedExpression, StringLiteral, UnaryOp,
+)
+
+
+class _NotConstant:
+    """Type of NOT_CONSTANT."""
+
+    def __repr__(self):
+        return "NOT_CONSTANT"
+
+
+# Result of evaluating something that is not a compile-time constant
+NOT_CONSTANT = _NotConstant()
+
+
+def to_int32(value: int) -> int:
+    """Wrap an int to 32-bit two's complement."""
+    value &= 0xFFFFFFFF
+    return value - 0x100000000 if value & 0x80000000 else value
+
+
+def to_float32(value: float) -> float:
+    """Round to the nearest single precision float; NOT_CONSTANT if it overflows."""
+    if not math.isfinite(value):
+        return NOT_CONSTANT
+    try:
+        return struct.unpack(">f", struct.pack(">f", value))[0]
+    except OverflowError:
+        return NOT_CONSTANT
+
+
+def literal_float(value: float) -> float:
+    """The float a FloatLiteral denotes (see Emitter.emit_push_fconst)."""
+    return to_float32(float("{0:.4f}".format(value)))
+
+
+def converted(value: Any, type_name: str) -> Any:
+    """value as stored in a variable of the named type (int widens to float)."""
+    if type_name == "float" and type(value) is int:
+        return to_float32(float(value))
+    return value
+
+
+class ConstantEvaluator:
+    """
+    Evaluates literals, parentheses, unary and binary operators, and names
+    resolved by lookup.
+
+    Attributes:
+        lookup: Called with an expression node the evaluator does not know
+            (an identifier, this.x, A.x ...); returns its value or NOT_CONSTANT
+    """
+
+    def __init__(self, lookup: Callable[[Expr], Any] = None):
+        self.lookup = lookup if lookup is not None else (lambda expr: NOT_CONSTANT)
+
+    def evaluate(self, expr: Expr) -> Any:
+        """Value of expr as int, float, bool or str, or NOT_CONSTANT."""
+        if isinstance(expr, BoolLiteral):
+            return bool(expr.value)
+        if isinstance(expr, IntLiteral):
+            return to_int32(int(expr.value))
+        if isinstance(expr, FloatLiteral):
+            # A literal made by constant folding carries its exact value
+            value = getattr(expr, "constant", NOT_CONSTANT)
+            return value if value is not NOT_CONSTANT else literal_float(expr.value)
+        if isinstance(expr, StringLiteral):
+            return expr.value
+        if isinstance(expr, ParenthesizedExpression):
+            return self.evaluate(expr.expr)
+        if isinstance(expr, UnaryOp):
+            return self._unary(expr.operator, self.evaluate(expr.operand))
+        if isinstance(expr, BinaryOp):
+            return self._binary(expr)
+        return self.lookup(expr)
+
+    @staticmethod
+    def _unary(op: str, value: Any) -> Any:
+        if value is NOT_CONSTANT:
+            return NOT_CONSTANT
+        if op == "!":
+            return not value if type(value) is bool else NOT_CONSTANT
+        if type(value) not in (int, float):
+            return NOT_CONSTANT
+        if op == "+":
+            return value
+        if op == "-":
+            return to_int32(-value) if type(value) is int else -value
+        return NOT_CONSTANT
+
+    def _binary(self, node: BinaryOp) -> Any:
+        op = node.operator
+        left = self.evaluate(node.left)
+        if left is NOT_CONSTANT:
+            return NOT_CONSTANT
+        # Short-circuit like the generated code does
+        if op == "&&" and left is False:
+            return False
+        if op == "||" and left is True:
+            return True
+        right = self.evaluate(node.right)
+        if right is NOT_CONSTANT:
+            return NOT_CONSTANT
+        return binary_value(op, left, right)
+
+
+def binary_value(op: str, left: Any, right: Any) -> Any:
+    """Value of left op right for constant operands, or NOT_CONSTANT."""
+    lt, rt = type(left), type(right)
+    if op in ("&&", "||"):
+        if lt is bool and rt is bool:
+            return (left and right) if op == "&&" else (left or right)
+        return NOT_CONSTANT
+    if op == "^":
+        return left + right if lt is str and rt is str else NOT_CONSTANT
+    if op in ("==", "!="):
+        # Only int and boolean equality are constant (strings compare with equals)
+        if lt is rt and lt in (int, bool):
+            return (left == right) if op == "==" else (left != right)
+        return NOT_CONSTANT
+    if lt not in (int, float) or rt not in (int, float):
+        return NOT_CONSTANT
+
+    if op in ("\\", "%"):
+        if lt is not int or rt is not int or right == 0:
+            return NOT_CONSTANT
+        # JVM idiv/irem truncate towards zero
+        quotient = abs(left) // abs(right)
+        if (left < 0) != (right < 0):
+            quotient = -quotient
+        return to_int32(quotient) if op == "\\" else to_int32(left - right * quotient)
+
+    if op == "/" or lt is float or rt is float:
+        # Mixed operands are promoted (i2f), then the float op is rounded
+        left, right = to_float32(float(left)), to_float32(float(right))
+        if op in ("<", "<=", ">", ">="):
+            return _compare(op, left, right)
+        if op == "+":
+            return to_float32(left + right)
+        if op == "-":
+            return to_float32(left - right)
+        if op == "*":
+            return to_float32(left * right)
+        if op == "/":
+            return NOT_CONSTANT if right == 0 else to_float32(left / right)
+        return NOT_CONSTANT
+
+    if op in ("<", "<=", ">", ">="):
+        return _compare(op, left, right)
+    if op == "+":
+        return to_int32(left + right)
+    if op == "-":
+        return to_int32(left - right)
+    if op == "*":
+        return to_int32(left * right)
+    return NOT_CONSTANT
+
+
+def _compare(op: str, left, right) -> bool:
+    if op == "<":
+        return left < right
+    if op == "<=":
+        return left <= right
+    if op == ">":
+        return left > right
+    return left >= right
@@ -0,0 +1,52 @@
+"""
+Parsing entry point for OPLang.
+Runs the parser with the cheap SLL prediction mode first and only falls back
+to full LL prediction when SLL cannot parse the input.
+"""
+
+from antlr4 import Parser
+from antlr4.atn.PredictionMode import PredictionMode
+from antlr4.error.ErrorStrategy import BailErrorStrategy
+
+
+def parse_two_stage(parser: Parser, rule: str = "program"):
+    """
+    Parse with SLL + bail-out first, then re-parse with full LL on failure.
+
+    Stage 1 runs without error listeners and gives up at the first syntax
+    error. If it succeeds its tree is the LL tree. Otherwise the input is
+    parsed again from scratch with the parser's own error strategy,
+    listeners and LL prediction, so errors are reported exactly as a plain
+    LL parse would report them.
+
+    Args:
+        parser: Parser with its token stream, listeners and error strategy set
+        rule: Name of the start rule
+
+    Returns:
+        The parse tree of the start rule
+    """
+    error_handler = parser._errHandler
+    listeners = parser._listeners
+    prediction_mode = parser._interp.predictionMode
+
+    parser._errHandler = BailErrorStrategy()
+    parser._listeners = []
+    parser._interp.predictionMode = PredictionMode.SLL
+    try:
+        return getattr(parser, rule)()
+    except Exception:
+        # SLL gave up (ParseCancellationException) or the lexer failed;
+        # stage 2 reports either one exactly like a plain LL parse
+        pass
+    finally:
+        parser._errHandler = error_handler
+        parser._listeners = listeners
+        parser._interp.predictionMode = prediction_mode
+
+    token_stream = parser.getTokenStream()
+    lexer = token_stream.tokenSource
+    lexer.reset()
+    token_stream.setTokenSource(lexer)
+    parser.reset()
+    return getattr(parser, rule)()
@@ -0,0 +1,151 @@
+"""
+Opt-in profiling for AST visitors (StaticChecker, CodeGenerator, ...).
+
+A VisitorProfiler attached to a visitor instance shadows each of its visit_*
+methods with a timing wrapper. Nodes dispatch through visitor.visit_xxx, so
+every call is seen, including the ones a visitor makes on itself. Nothing is
+installed on visitors that are not attached, so they run at full speed.
+
+Usage:
+    profiler = VisitorProfiler()
+    with profiler.phase("check"):
+        profiler.attach(StaticChecker()).check_program(ast)
+    profiler.write_json("profile.json")
+    profiler.write_folded("profile.folded")  # flamegraph.pl / speedscope
+"""
+
+import json
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Tuple
+
+
+class VisitorProfiler:
+    """
+    Call counts and times of visit_* methods, per method and per unit.
+
+    Attributes:
+        visits: visit_* name -> [calls, cumulative seconds]
+        units: "A" for class A, "A.f" for its method, constructor or
+            destructor f -> [calls, cumulative seconds]
+        folded: call stack -> seconds spent in its top frame itself
+    """
+
+    # Visits that open a unit; their frames are labelled with its name
+    UNIT_VISITS = ("visit_method_decl", "visit_constructor_decl", "visit_destructor_decl")
+
+    # Visitor class -> names of its visit_* methods
+    _visit_names: Dict[type, List[str]] = {}
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        self.visits: Dict[str, List[float]] = {}
+        self.units: Dict[str, List[float]] = {}
+        self.folded: Dict[Tuple[str, ...], float] = {}
+        self._stack: List[str] = []
+        # Time spent in the callees of each open frame
+        self._callee_time: List[float] = []
+        self._classes: List[str] = []
+
+    def attach(self, visitor):
+        """Profile every visit_* method of visitor; returns visitor."""
+        cls = type(visitor)
+        names = self._visit_names.get(cls)
+        if names is None:
+            names = self._visit_names[cls] = [
+                name for name in dir(cls) if name.startswith("visit_") and callable(getattr(cls, name))
+            ]
+        for name in names:
+            # Bind the class's method, so re-attaching replaces old wrappers
+            method = getattr(cls, name).__get__(visitor, cls)
+            setattr(visitor, name, self._wrap(name, method))
+        return visitor
+
+    @staticmethod
+    def detach(visitor):
+        """Remove the wrappers attach installed on visitor."""
+        for name in [n for n in vars(visitor) if n.startswith("visit_")]:
+            delattr(visitor, name)
+
+    @contextmanager
+    def phase(self, name: str):
+        """Count the visits made inside the block under a frame of their own."""
+        self._enter(name)
+        start = self.clock()
+        try:
+            yield self
+        finally:
+            self._exit(self.clock() - start)
+
+    def _wrap(self, name: str, method):
+        if name == "visit_class_decl":
+            def label(node):
+                self._classes.append(node.name)
+                return node.name
+        elif name in self.UNIT_VISITS:
+            def label(node):
+                owner = self._classes[-1] + "." if self._classes else ""
+                return owner + str(getattr(node, "name", ""))
+        else:
+            label = None
+
+        def wrapper(node, *args, **kwargs):
+            unit = label(node) if label is not None else None
+            self._enter(name if unit is None else f"{name} {unit}")
+            start = self.clock()
+            try:
+                return method(node, *args, **kwargs)
+            finally:
+                elapsed = self.clock() - start
+                self._exit(elapsed)
+                self._add(self.visits, name, elapsed)
+                if unit is not None:
+                    self._add(self.units, unit, elapsed)
+                    if name == "visit_class_decl":
+                        self._classes.pop()
+
+        return wrapper
+
+    def _enter(self, frame: str):
+        self._stack.append(frame)
+        self._callee_time.append(0.0)
+
+    def _exit(self, elapsed: float):
+        callee_time = self._callee_time.pop()
+        stack = tuple(self._stack)
+        self._stack.pop()
+        self.folded[stack] = self.folded.get(stack, 0.0) + elapsed - callee_time
+        if self._callee_time:
+            self._callee_time[-1] += elapsed
+
+    @staticmethod
+    def _add(table: Dict[str, List[float]], key: str, elapsed: float):
+        entry = table.get(key)
+        if entry is None:
+            table[key] = [1, elapsed]
+        else:
+            entry[0] += 1
+            entry[1] += elapsed
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Visits and units, each sorted by cumulative time, descending."""
+        def rows(table):
+            ordered = sorted(table.items(), key=lambda item: -item[1][1])
+            return {key: {"calls": calls, "seconds": seconds} for key, (calls, seconds) in ordered}
+
+        return {"visits": rows(self.visits), "units": rows(self.units)}
+
+    def write_json(self, path: str):
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    def folded_lines(self) -> List[str]:
+        """Folded stacks, "frame;frame;frame microseconds", one per stack."""
+        return [
+            ";".join(frame.replace(";", ",") for frame in stack) + f" {round(seconds * 1e6)}"
+            for stack, seconds in self.folded.items()
+        ]
+
+    def write_folded(self, path: str):
+        with open(path, "w") as file:
+            file.write("\n".join(self.folded_lines()) + "\n")
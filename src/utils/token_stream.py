@@ -0,0 +1,90 @@
+"""
+Streaming token API for OPLang.
+Scans a source with OPLangLexer and yields one compact record per token
+instead of materialising Token objects, so large sources are lexed in
+constant memory.
+"""
+
+from typing import Iterator, NamedTuple, Optional, Union
+
+from antlr4 import InputStream, Token
+from antlr4.CommonTokenFactory import TokenFactory
+from build.OPLangLexer import OPLangLexer, LexerError
+
+
+class TokenRecord(NamedTuple):
+    """
+    One token. start and stop are character offsets (inclusive), so its text
+    is only cut out of the source when TokenScanner.text asks for it.
+    """
+
+    type: int
+    start: int
+    stop: int
+    line: int
+    column: int
+    # Set only when a lexer action rewrote the text (string literals)
+    text: Optional[str] = None
+
+
+class ErrorRecord(NamedTuple):
+    """A lexical error; the position is where the failing token starts."""
+
+    error: LexerError
+    start: int
+    line: int
+    column: int
+
+
+class RecordFactory(TokenFactory):
+    """Token factory that builds TokenRecord tuples instead of CommonToken objects."""
+
+    def create(self, source, type: int, text: str, channel: int, start: int, stop: int, line: int, column: int):
+        return TokenRecord(type, start, stop, line, column, text)
+
+    def createThin(self, type: int, text: str):
+        return TokenRecord(type, -1, -1, 0, -1, text)
+
+
+class TokenScanner:
+    """
+    Generator based token stream over OPLangLexer.
+
+    Iterating yields TokenRecord for every token up to and including EOF.
+    A lexical error ends the stream with an ErrorRecord instead of raising.
+
+    Attributes:
+        input_stream (InputStream): The source being scanned
+        lexer (OPLangLexer): Lexer producing TokenRecord tuples
+    """
+
+    def __init__(self, source: str):
+        self.input_stream = InputStream(source)
+        self.lexer = OPLangLexer(self.input_stream)
+        self.lexer._factory = RecordFactory()
+
+    def __iter__(self) -> Iterator[Union[TokenRecord, ErrorRecord]]:
+        lexer = self.lexer
+        while True:
+            try:
+                record = lexer.nextToken()
+            except LexerError as e:
+                yield ErrorRecord(e, lexer._tokenStartCharIndex, lexer._tokenStartLine, lexer._tokenStartColumn)
+                return
+            yield record
+            if record.type == Token.EOF:
+                return
+
+    def text(self, record: TokenRecord) -> str:
+        """Text of a token, as Token.text would give it."""
+        if record.text is not None:
+            return record.text
+        if record.type == Token.EOF:
+            return "<EOF>"
+        return self.input_stream.getText(record.start, record.stop)
+
+    def type_name(self, record: TokenRecord) -> str:
+        """Symbolic name of the token type, e.g. "ID" or "EOF"."""
+        if record.type == Token.EOF:
+            return "EOF"
+        return self.lexer.symbolicNames[record.type]
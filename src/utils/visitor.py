@@ -18,6 +18,10 @@ class ASTVisitor(ABC):
         """Visit a node using the visitor pattern."""
         return node.accept(self, o)
 
+    def profiled(self, profiler):
+        """Route this visitor's visit_* calls through profiler (utils.profiling)."""
+        return profiler.attach(self)
+
     # Program and class declarations
     @abstractmethod
     def visit_program(self, node: "Program", o: Any = None):
@@ -1221,3 +1221,26 @@ def test_100():
 """
     expected = "Program([ClassDecl(FinalTest, [AttributeDecl(PrimitiveType(int), [Attribute(x)]), MethodDecl(PrimitiveType(void) setX([Parameter(PrimitiveType(int) val)]), BlockStatement(stmts=[IfStatement(if BinaryOp(Identifier(val), >, IntLiteral(0)) then BlockStatement(stmts=[AssignmentStatement(PostfixLHS(PostfixExpression(ThisExpression(this).x)) := Identifier(val))]))]))])])"
     assert str(ASTGenerator(source).generate()) == expected
+
+
+def test_101():
+    """Test long member and statement lists (no recursion per list element)"""
+    body = "\n".join("            x := x + %d;" % i for i in range(2000))
+    attrs = "\n".join("    int a%d;" % i for i in range(500))
+    source = "class Test {\n%s\n    void main() {\n        int x := 0;\n%s\n    }\n}" % (attrs, body)
+    ast = ASTGenerator(source).generate()
+    cls = ast.class_decls[0]
+    assert len(cls.members) == 501
+    assert len(cls.members[-1].body.statements) == 2000
+    assert str(cls.members[-1].body.statements[-1]) == "AssignmentStatement(IdLHS(x) := BinaryOp(Identifier(x), +, IntLiteral(1999)))"
+
+
+def test_102():
+    """Test operator precedence and associativity across all expression levels"""
+    source = """class Test {
+    void main() {
+        boolean b := !-a.b[1] * 2 \\ 3 + 4 - x.f() ^ "s" ^ "t" == c && d || e < f.g(1, 2).h != -(g % 2);
+    }
+}"""
+    expected = "Program([ClassDecl(Test, [MethodDecl(PrimitiveType(void) main([]), BlockStatement(vars=[VariableDecl(PrimitiveType(boolean), [Variable(b = BinaryOp(BinaryOp(BinaryOp(BinaryOp(BinaryOp(BinaryOp(UnaryOp(!, UnaryOp(-, PostfixExpression(PostfixExpression(Identifier(a).b)[IntLiteral(1)]))), *, IntLiteral(2)), \\, IntLiteral(3)), +, IntLiteral(4)), -, BinaryOp(BinaryOp(PostfixExpression(Identifier(x).f()), ^, StringLiteral('s')), ^, StringLiteral('t'))), ==, BinaryOp(BinaryOp(Identifier(c), &&, Identifier(d)), ||, Identifier(e))), <, BinaryOp(PostfixExpression(PostfixExpression(Identifier(f).g(IntLiteral(1), IntLiteral(2))).h), !=, UnaryOp(-, ParenthesizedExpression((BinaryOp(Identifier(g), %, IntLiteral(2))))))))])], stmts=[]))])])"
+    assert str(ASTGenerator(source).generate()) == expected
@@ -1,4 +1,8 @@
-from utils import Checker
+import pytest
+
+from utils import Checker, ASTGenerator
+from src.semantics.static_checker import StaticChecker
+from src.semantics.static_error import UndeclaredAttribute, UndeclaredIdentifier
 from src.utils.nodes import *
 
 def test_001():
@@ -1550,3 +1554,165 @@ def test_100():
     assert Checker(source).check_from_source() == expected
 
 
+
+def test_101():
+    """Overloads are kept per name; only an identical signature is redeclared"""
+    source = """
+        class A {
+            int f(int x) { return x; }
+            int f(float x) { return 1; }
+            int f(int y) { return y; }
+            static void main() {
+            }
+        }
+    """
+    expected = "Redeclared(Method, f)"
+    assert Checker(source).check_from_source() == expected
+
+def test_102():
+    """Members are found through the class index of every ancestor"""
+    source = """
+        class A { static int s := 1; int a := 2; int get() { return this.a; } }
+        class B extends A { float b := 1.5; }
+        class C extends B {
+            int sum() { return this.get() + A.s + this.a; }
+            static void main() {
+                C c := new C();
+                io.writeIntLn(c.sum());
+                io.writeFloatLn(c.b);
+            }
+        }
+    """
+    expected = "Static checking passed"
+    assert Checker(source).check_from_source() == expected
+
+def test_103():
+    """Subtype checks see every ancestor of a deep hierarchy, and only those"""
+    source = """
+        class A {}
+        class B extends A {}
+        class C extends B {}
+        class D extends C {}
+        class Test {
+            static void main() {
+                A a := new D();
+                B b := new D();
+                C c := new B();
+            }
+        }
+    """
+    expected = "TypeMismatchInStatement(VariableDecl(ClassType(C), [Variable(c = ObjectCreation(new B()))]))"
+    assert Checker(source).check_from_source() == expected
+
+def test_104():
+    """Nested scopes see enclosing locals and loop context; sibling scopes are independent"""
+    source = """
+        class Test {
+            static void main() {
+                int i;
+                for i := 0 to 3 do {
+                    { int x := i; { int y := x; if y > 1 then { break; } } }
+                    { int x := 2; continue; }
+                }
+                { int x := 1; break; }
+            }
+        }
+    """
+    expected = "MustInLoop(BreakStatement())"
+    assert Checker(source).check_from_source() == expected
+
+def test_105():
+    """Array types are equal only when element type and size both match"""
+    source = """
+        class Test {
+            static void main() {
+                int[3] a := {1, 2, 3};
+                int[3] b := a;
+                float[3] f := {1.0, 2.0, 3.0};
+                int[2] c := a;
+            }
+        }
+    """
+    expected = "TypeMismatchInStatement(VariableDecl(ArrayType(PrimitiveType(int)[2]), [Variable(c = Identifier(a))]))"
+    assert Checker(source).check_from_source() == expected
+
+def test_106():
+    """Re-checking an edited class also re-checks the classes that use it, and only those"""
+    before = """
+        class A { int x := 1; }
+        class B { int get(A a) { return a.x; } }
+        class C { static void main() { io.writeIntLn(1); } }
+    """
+    after = before.replace("int x := 1;", "int y := 1;")
+    result = StaticChecker().check_program(ASTGenerator(before).generate())
+    assert result.dependencies == {"A": frozenset(), "B": frozenset({"A"}), "C": frozenset()}
+
+    ast = ASTGenerator(after).generate()
+    checker = StaticChecker()
+    checked = []
+    visit_class_decl = checker.visit_class_decl
+    checker.visit_class_decl = lambda node, o: checked.append(node.name) or visit_class_decl(node, o)
+    with pytest.raises(UndeclaredAttribute, match=r"^UndeclaredAttribute\(x\)$"):
+        checker.recheck_program(ast, result, [ast.class_decls[0]])
+    assert checked == ["A", "B"]
+
+def test_107():
+    """The parallel checker reports the error of the first failing class, as the sequential one"""
+    source = """
+        class A { int f() { return 1; } }
+        class B { void g() { int x := y; } }
+        class C { int h() { return A.zz; } }
+        class B { }
+        class Main { static void main() {} }
+    """
+    ast = ASTGenerator(source).generate()
+    errors = []
+    for check in (StaticChecker().check_program, lambda a: StaticChecker().check_program_parallel(a, 2)):
+        try:
+            check(ast)
+        except UndeclaredIdentifier as e:
+            errors.append(str(e))
+    assert errors == ["UndeclaredIdentifier(y)", "UndeclaredIdentifier(y)"]
+
+    ok = ASTGenerator(source.replace("int x := y;", "").replace("class B { }", "")
+                      .replace("A.zz", "new A().f()")).generate()
+    parallel = StaticChecker().check_program_parallel(ok, 2)
+    sequential = StaticChecker().check_program(ok)
+    assert parallel.order == sequential.order == ("A", "B", "C", "Main")
+    assert parallel.dependencies == sequential.dependencies
+
+def test_108():
+    """A local declared after a name was looked up shadows it from then on"""
+    source = """
+        class A {
+            int x := 1;
+            void f() {
+                int y := x;
+                string x := "s";
+                int z := x;
+            }
+            static void main() {}
+        }
+    """
+    expected = "TypeMismatchInStatement(VariableDecl(PrimitiveType(int), [Variable(z = Identifier(x))]))"
+    assert Checker(source).check_from_source() == expected
+
+def test_109():
+    """Checking attaches the value of each constant final to its declaration"""
+    source = """
+        class A {
+            static final int N := 3 * 4;
+            final float half := 1 / 2;
+            static void main() {
+                final string s := "a" ^ "b";
+                final boolean b := (A.N > 10) && true;
+                final int m := A.N % 5;
+            }
+        }
+    """
+    ast = ASTGenerator(source).generate()
+    StaticChecker().check_program(ast)
+    members = ast.class_decls[0].members
+    constants = [attr.constant for decl in members[:2] for attr in decl.attributes]
+    constants += [var.constant for decl in members[2].body.var_decls for var in decl.variables]
+    assert constants == [12, 0.5, "ab", True, 2]
@@ -35,6 +35,11 @@ def wrap_in_main(var_decls_statements: List[VariableDecl], statements: List[Stat
     ])
 
 
+def io_write(method: str, expr: Expr) -> Statement:
+    """io.<method>(expr); as a statement."""
+    return MethodInvocationStatement(PostfixExpression(Identifier("io"), [MethodCall(method, [expr])]))
+
+
 # 1. Basic Output Tests
 def test_001():
     """Test string output"""
@@ -1585,4 +1590,206 @@ def test_100():
 #         MethodInvocationStatement(PostfixExpression(Identifier("io"), [MethodCall("writeInt", [Identifier("c")])])),
 #         MethodInvocationStatement(PostfixExpression(Identifier("io"), [MethodCall("writeInt", [Identifier("d")])]))
 #     ]
-#     assert CodeGenerator().generate_and_run(wrap_in_main(var_decls, stmts)) == "11223344"
\ No newline at end of file
+#     assert CodeGenerator().generate_and_run(wrap_in_main(var_decls, stmts)) == "11223344"
+
+# ==========================================
+# Class file backend (no jasmin step)
+# ==========================================
+def test_103():
+    """Class backend: string with escape sequences"""
+    stmt = MethodInvocationStatement(PostfixExpression(Identifier("io"), [MethodCall("writeStr", [StringLiteral("A\nB")])]))
+    assert CodeGenerator(backend="class").generate_and_run(wrap_in_main([],[stmt])) == "A\nB"
+
+def test_104():
+    """Class backend: for loop, large constants and float division"""
+    var_decls = [
+        VariableDecl(False, PrimitiveType("int"), [Variable("i")]),
+        VariableDecl(False, PrimitiveType("int"), [Variable("sum", IntLiteral(100000))])
+    ]
+    stmts = [
+        ForStatement("i", IntLiteral(1), "to", IntLiteral(5),
+            AssignmentStatement(IdLHS("sum"), BinaryOp(Identifier("sum"), "+", Identifier("i")))
+        ),
+        MethodInvocationStatement(PostfixExpression(Identifier("io"), [MethodCall("writeInt", [Identifier("sum")])])),
+        MethodInvocationStatement(PostfixExpression(Identifier("io"), [MethodCall("writeFloat", [BinaryOp(IntLiteral(7), "/", IntLiteral(2))])]))
+    ]
+    assert CodeGenerator(backend="class").generate_and_run(wrap_in_main(var_decls, stmts)) == "1000153.5"
+
+def test_105():
+    """Class backend: subclass instance assigned to superclass variable"""
+    ast = Program([
+        ClassDecl("ZA", None, [
+            ConstructorDecl("ZA", [], BlockStatement([], []))
+        ]),
+        ClassDecl("ZB", "ZA", [
+            ConstructorDecl("ZB", [], BlockStatement([], []))
+        ]),
+        ClassDecl("Main", None, [
+            MethodDecl(True, PrimitiveType("void"), "main", [],
+                BlockStatement([
+                    VariableDecl(False, ClassType("ZA"), [Variable("a", ObjectCreation("ZB", []))]),
+                    VariableDecl(False, PrimitiveType("float"), [Variable("f", IntLiteral(5))])
+                ], [
+                    MethodInvocationStatement(PostfixExpression(Identifier("io"), [
+                        MethodCall("writeFloat", [Identifier("f")])
+                    ]))
+                ])
+            )
+        ])
+    ])
+    assert CodeGenerator(backend="class").generate_and_run(ast) == "5.0"
+
+def test_106():
+    """Batch: several programs assembled together, each run on its own"""
+    hello = MethodInvocationStatement(PostfixExpression(Identifier("io"), [MethodCall("writeStr", [StringLiteral("Hello")])]))
+    number = MethodInvocationStatement(PostfixExpression(Identifier("io"), [MethodCall("writeInt", [BinaryOp(IntLiteral(6), "*", IntLiteral(7))])]))
+    asts = [wrap_in_main([], [hello]), wrap_in_main([], [number])]
+    assert CodeGenerator().generate_and_run_all(asts) == ["Hello", "42"]
+
+def test_107():
+    """Constant finals are loaded as values computed with JVM int and float semantics"""
+    ast = Program([
+        ClassDecl("Main", None, [
+            AttributeDecl(True, True, PrimitiveType("float"), [
+                Attribute("third", BinaryOp(FloatLiteral(1.0), "/", FloatLiteral(3.0)))
+            ]),
+            MethodDecl(True, PrimitiveType("void"), "main", [],
+                BlockStatement([
+                    VariableDecl(True, PrimitiveType("int"), [
+                        Variable("big", BinaryOp(IntLiteral(2147483647), "+", IntLiteral(1)))
+                    ]),
+                    VariableDecl(True, PrimitiveType("int"), [
+                        Variable("q", BinaryOp(UnaryOp("-", IntLiteral(7)), "\\", IntLiteral(2)))
+                    ])
+                ], [
+                    MethodInvocationStatement(PostfixExpression(Identifier("io"), [MethodCall("writeInt", [Identifier("big")])])),
+                    MethodInvocationStatement(PostfixExpression(Identifier("io"), [MethodCall("writeInt", [Identifier("q")])])),
+                    MethodInvocationStatement(PostfixExpression(Identifier("io"), [
+                        MethodCall("writeFloat", [PostfixExpression(Identifier("Main"), [MemberAccess("third")])])
+                    ]))
+                ])
+            )
+        ])
+    ])
+    assert CodeGenerator().generate_and_run(ast) == "-2147483648-30.33333334"
+
+def test_108():
+    """Block scopes: an inner declaration shadows the outer one only inside its block"""
+    var_decls = [
+        VariableDecl(False, PrimitiveType("int"), [
+            Variable("a", IntLiteral(2)),
+            Variable("b", BinaryOp(Identifier("a"), "*", IntLiteral(3)))
+        ])
+    ]
+    stmts = [
+        BlockStatement([VariableDecl(False, PrimitiveType("int"), [Variable("a", IntLiteral(10))])], [
+            MethodInvocationStatement(PostfixExpression(Identifier("io"), [MethodCall("writeInt", [Identifier("a")])]))
+        ]),
+        MethodInvocationStatement(PostfixExpression(Identifier("io"), [
+            MethodCall("writeInt", [BinaryOp(Identifier("a"), "+", Identifier("b"))])
+        ]))
+    ]
+    assert CodeGenerator().generate_and_run(wrap_in_main(var_decls, stmts)) == "108"
+
+def test_109():
+    """Folded expressions print what the unfolded code computes at runtime"""
+    var_decls = [VariableDecl(False, PrimitiveType("int"), [Variable("x", IntLiteral(5))])]
+    stmts = [
+        io_write("writeIntLn", BinaryOp(IntLiteral(2147483647), "+", BinaryOp(IntLiteral(2), "*", IntLiteral(3)))),
+        io_write("writeIntLn", BinaryOp(BinaryOp(IntLiteral(1), "*", Identifier("x")), "+", IntLiteral(0))),
+        io_write("writeIntLn", UnaryOp("-", UnaryOp("-", Identifier("x")))),
+        io_write("writeFloatLn", BinaryOp(IntLiteral(1), "/", IntLiteral(3))),
+        io_write("writeFloatLn", BinaryOp(Identifier("x"), "/", IntLiteral(2))),
+        io_write("writeBoolLn", BinaryOp(UnaryOp("!", BoolLiteral(True)), "||", BinaryOp(Identifier("x"), ">", IntLiteral(4)))),
+        io_write("writeStrLn", BinaryOp(StringLiteral("a"), "^", StringLiteral("b")))
+    ]
+    expected = "-2147483643\n5\n5\n0.33333334\n2.5\ntrue\nab"
+    assert CodeGenerator().generate_and_run(wrap_in_main(var_decls, stmts)) == expected
+
+def test_110():
+    """Conditions compile to jumps: nested &&, || and !, boolean == and string !="""
+    var_decls = [
+        VariableDecl(False, PrimitiveType("int"), [Variable("x", IntLiteral(4))]),
+        VariableDecl(False, PrimitiveType("float"), [Variable("y", FloatLiteral(2.5))]),
+        VariableDecl(False, PrimitiveType("boolean"), [Variable("b", BoolLiteral(False))]),
+        VariableDecl(False, PrimitiveType("string"), [Variable("s", StringLiteral("a"))])
+    ]
+    cond = BinaryOp(
+        BinaryOp(BinaryOp(Identifier("x"), ">", IntLiteral(3)), "&&", UnaryOp("!", Identifier("b"))),
+        "||",
+        BinaryOp(Identifier("y"), "<", IntLiteral(0))
+    )
+    stmts = [
+        IfStatement(cond, io_write("writeStrLn", StringLiteral("yes")), io_write("writeStrLn", StringLiteral("no"))),
+        io_write("writeBoolLn", BinaryOp(Identifier("b"), "==", BinaryOp(Identifier("x"), "<", Identifier("y")))),
+        IfStatement(BinaryOp(Identifier("s"), "!=", StringLiteral("a")), io_write("writeStrLn", StringLiteral("ne")), None),
+        io_write("writeBoolLn", UnaryOp("!", BinaryOp(Identifier("b"), "||", BinaryOp(Identifier("s"), "==", StringLiteral("a")))))
+    ]
+    assert CodeGenerator().generate_and_run(wrap_in_main(var_decls, stmts)) == "yes\ntrue\nfalse"
+
+def test_111():
+    """For loops: hoisted bound, break, continue, downto and a bound the body changes"""
+    var_decls = [VariableDecl(False, PrimitiveType("int"), [
+        Variable("i"), Variable("n", IntLiteral(3)), Variable("s", IntLiteral(0))
+    ])]
+    stmts = [
+        ForStatement("i", IntLiteral(1), "to", BinaryOp(Identifier("n"), "*", IntLiteral(2)), BlockStatement([], [
+            AssignmentStatement(IdLHS("s"), BinaryOp(Identifier("s"), "+", Identifier("i"))),
+            IfStatement(BinaryOp(Identifier("i"), "==", IntLiteral(5)), BreakStatement(), None)
+        ])),
+        io_write("writeIntLn", Identifier("s")),
+        ForStatement("i", IntLiteral(5), "downto", IntLiteral(2), BlockStatement([], [
+            IfStatement(BinaryOp(Identifier("i"), "==", IntLiteral(4)), ContinueStatement(), None),
+            io_write("writeIntLn", Identifier("i"))
+        ])),
+        ForStatement("i", Identifier("n"), "to", Identifier("s"), BlockStatement([], [
+            AssignmentStatement(IdLHS("s"), BinaryOp(Identifier("s"), "-", IntLiteral(4)))
+        ])),
+        io_write("writeIntLn", Identifier("i")),
+        ForStatement("i", IntLiteral(2), "to", IntLiteral(1), io_write("writeIntLn", Identifier("i"))),
+        io_write("writeIntLn", Identifier("i"))
+    ]
+    assert CodeGenerator().generate_and_run(wrap_in_main(var_decls, stmts)) == "15\n5\n3\n2\n6\n2"
+
+def test_112():
+    """Unreachable statements, the trailing return and dead default stores are left out"""
+    sign = MethodDecl(True, PrimitiveType("int"), "sign", [Parameter(PrimitiveType("int"), "x")], BlockStatement(
+        [VariableDecl(False, PrimitiveType("int"), [Variable("r")])],
+        [
+            IfStatement(BinaryOp(Identifier("x"), ">", IntLiteral(0)), ReturnStatement(IntLiteral(1)), None),
+            AssignmentStatement(IdLHS("r"), IntLiteral(-1)),
+            IfStatement(BinaryOp(Identifier("x"), "<", IntLiteral(0)), ReturnStatement(Identifier("r")), ReturnStatement(IntLiteral(0))),
+            io_write("writeIntLn", IntLiteral(99))
+        ]
+    ))
+    main = MethodDecl(True, PrimitiveType("void"), "main", [], BlockStatement(
+        [VariableDecl(False, PrimitiveType("int"), [Variable("i"), Variable("t")])],
+        [
+            ForStatement("i", IntLiteral(-1), "to", IntLiteral(5), BlockStatement([], [
+                io_write("writeIntLn", PostfixExpression(Identifier("Main"), [MethodCall("sign", [Identifier("i")])])),
+                IfStatement(BinaryOp(Identifier("i"), "==", IntLiteral(1)), BlockStatement([], [BreakStatement(), io_write("writeIntLn", IntLiteral(98))]), None)
+            ])),
+            IfStatement(BoolLiteral(False), io_write("writeIntLn", IntLiteral(97)), AssignmentStatement(IdLHS("t"), Identifier("i"))),
+            io_write("writeIntLn", Identifier("t"))
+        ]
+    ))
+    program = Program([ClassDecl("Main", None, [sign, main])])
+    assert CodeGenerator().generate_and_run(program) == "-1\n0\n1\n1"
+
+def test_113():
+    """Every comparison with NaN is false except !=, in branches and values"""
+    var_decls = [VariableDecl(False, PrimitiveType("float"), [
+        Variable("z", FloatLiteral(0.0)), Variable("n")
+    ])]
+    def branch(cond):
+        return IfStatement(cond, io_write("writeStr", StringLiteral("T")), io_write("writeStr", StringLiteral("F")))
+    one = FloatLiteral(1.0)
+    stmts = [AssignmentStatement(IdLHS("n"), BinaryOp(Identifier("z"), "/", Identifier("z")))]
+    stmts += [branch(BinaryOp(Identifier("n"), op, one)) for op in ("<", "<=", ">", ">=", "==", "!=")]
+    stmts += [
+        branch(UnaryOp("!", BinaryOp(Identifier("n"), "<", one))),
+        branch(BinaryOp(BinaryOp(Identifier("n"), ">", one), "||", BinaryOp(Identifier("n"), "<", one))),
+        io_write("writeBool", BinaryOp(Identifier("n"), "<=", one)),
+        io_write("writeBool", BinaryOp(one, "<", Identifier("n")))
+    ]
+    assert CodeGenerator().generate_and_run(wrap_in_main(var_decls, stmts)) == "FFFFFTTFfalsefalse"
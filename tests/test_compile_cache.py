@@ -0,0 +1,97 @@
+"""
+Test cases for the OPLang compile cache.
+"""
+
+import os
+
+from src.utils.compile_cache import CompileCache, decode_ast, pack_files, unpack_files
+from utils import ASTGenerator, Checker
+
+
+def test_001(tmp_path):
+    """Stored bytes come back, unknown keys miss; entries can hold several files"""
+    cache = CompileCache(str(tmp_path))
+    key = cache.key("codegen", "class A {}")
+    assert cache.get("codegen", key) is None
+    files = {"A.j": b".class public A", "A.class": b"\xca\xfe"}
+    cache.put("codegen", key, pack_files(files))
+    assert unpack_files(cache.get("codegen", key)) == files
+    assert unpack_files(pack_files(files)[:-1]) is None
+
+
+def test_002(tmp_path):
+    """Keys depend on stage, input and compiler version"""
+    cache = CompileCache(str(tmp_path))
+    key = cache.key("ast", "class A {}")
+    assert key == cache.key("ast", "class A {}")
+    assert key != cache.key("check", "class A {}")
+    assert key != cache.key("ast", "class B {}")
+    cache.version = "other"
+    assert key != cache.key("ast", "class A {}")
+
+
+def test_003(tmp_path):
+    """Least recently used entries are evicted over the size cap"""
+    cache = CompileCache(str(tmp_path), max_bytes=2500)
+    keys = [cache.key("codegen", str(i)) for i in range(3)]
+    for i, key in enumerate(keys[:2]):
+        cache.put("codegen", key, b"x" * 1000)
+        os.utime(os.path.join(str(tmp_path), "codegen", key + ".bin"), (i, i))
+    # Reading the oldest entry makes the other one least recently used
+    assert cache.get("codegen", keys[0]) == b"x" * 1000
+    cache.put("codegen", keys[2], b"x" * 1000)
+    assert cache.get("codegen", keys[1]) is None
+    assert cache.get("codegen", keys[0]) is not None
+    assert cache.get("codegen", keys[2]) is not None
+    assert cache.size() <= 2500
+
+
+def test_004(tmp_path, monkeypatch):
+    """Checker returns the same verdict from the cache"""
+    import utils
+    monkeypatch.delenv("OPLANG_CACHE", raising=False)
+    monkeypatch.setattr(utils, "_COMPILE_CACHE", CompileCache(str(tmp_path)))
+    source = "class A { static void main() { int x := 1; io.writeInt(x); } }"
+    first = Checker(source=source).check_from_source()
+    assert os.listdir(os.path.join(str(tmp_path), "check-source"))
+    assert Checker(source=source).check_from_source() == first == "Static checking passed"
+
+
+def test_005(tmp_path):
+    """A cache directory that cannot be written is skipped, not an error"""
+    blocker = tmp_path / "file"
+    blocker.write_bytes(b"")
+    # A regular file in the way makes every write fail with an OSError
+    cache = CompileCache(str(blocker / "cache"))
+    key = cache.key("ast", "class A {}")
+    cache.put("ast", key, b"verdict")
+    assert cache.get("ast", key) is None
+
+
+def test_006(tmp_path):
+    """A cache directory other users can write to is never read"""
+    cache_dir = tmp_path / "shared"
+    cache_dir.mkdir()
+    writer = CompileCache(str(cache_dir))
+    key = writer.key("check", "class A {}")
+    writer.put("check", key, b"Static checking passed")
+    os.chmod(str(cache_dir), 0o777)
+    cache = CompileCache(str(cache_dir))
+    assert not cache.usable()
+    assert cache.get("check", key) is None
+    assert CompileCache(str(tmp_path / "own")).usable()
+    assert os.stat(str(tmp_path / "own")).st_mode & 0o777 == 0o700
+
+
+def test_007(tmp_path, monkeypatch):
+    """ASTs are cached as JSON and rebuilt only from node classes"""
+    import utils
+    monkeypatch.delenv("OPLANG_CACHE", raising=False)
+    monkeypatch.setattr(utils, "_COMPILE_CACHE", CompileCache(str(tmp_path)))
+    source = "class A { static void main() { float f := 1.5; io.writeFloat(f * 2); } }"
+    first = ASTGenerator(source).generate()
+    assert os.listdir(os.path.join(str(tmp_path), "ast"))
+    second = ASTGenerator(source).generate()
+    assert second is not first and str(second) == str(first)
+    assert decode_ast(b'{"node": "os.system", "fields": {}}') is None
+    assert decode_ast(b'{"node": "IntLiteral", "fields": {"__class__": 1}}') is None
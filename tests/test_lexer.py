@@ -1,4 +1,4 @@
-from utils import Tokenizer
+from utils import Tokenizer, TokenScanner, ErrorRecord
 
 
 def test_001():
@@ -604,3 +604,21 @@ def test_100():
     source = "class Program { static void main() { return; } }"
     expected = "class,Program,{,static,void,main,(,),{,return,;,},},EOF"
     assert Tokenizer(source).get_tokens_as_string() == expected
+
+def test_101():
+    """Token stream yields positioned records with text on demand"""
+    scanner = TokenScanner('int x := "hi";\n  y')
+    records = list(scanner)
+    assert [(r.start, r.stop, r.line, r.column) for r in records] == [
+        (0, 2, 1, 0), (4, 4, 1, 4), (6, 7, 1, 6), (9, 12, 1, 9), (13, 13, 1, 13), (17, 17, 2, 2), (18, 17, 2, 3)
+    ]
+    assert [scanner.text(r) for r in records] == ["int", "x", ":=", "hi", ";", "y", "<EOF>"]
+    assert [scanner.type_name(r) for r in records] == ["INT", "ID", "ASSIGN", "STRINGLIT", "SEMICOLON", "ID", "EOF"]
+
+def test_102():
+    """Token stream ends with an error record instead of raising"""
+    records = list(TokenScanner("a := 1 $ b"))
+    assert len(records) == 4
+    assert isinstance(records[-1], ErrorRecord)
+    assert str(records[-1].error) == "Error Token $"
+    assert (records[-1].start, records[-1].line, records[-1].column) == (7, 1, 7)
@@ -0,0 +1,77 @@
+"""
+Test cases for the peephole optimizer.
+"""
+
+from src.codegen.peephole import PeepholeOptimizer, PeepholeRule
+from src.utils.nodes import *
+from utils import CodeGenerator
+
+
+def body(*lines):
+    return "".join(line + "\n" for line in lines)
+
+
+def test_001():
+    """Each default rule rewrites its pattern and counts the hit"""
+    optimizer = PeepholeOptimizer()
+    code, extra_stack = optimizer.optimize(body(
+        "\tiload_1", "\tfload_2", "\tswap", "\ti2f", "\tswap",
+        "\tfstore_3", "\tfload_3",
+        "\tiload_1", "\ticonst_1", "\tixor", "\tifle Label1",
+        "\tgoto Label1", "Label2:", "Label1:",
+        "\treturn",
+    ))
+    assert code == body(
+        "\tiload_1", "\ti2f", "\tfload_2",
+        "\tdup", "\tfstore_3",
+        "\tiload_1", "\tifgt Label1",
+        "Label2:", "Label1:",
+        "\treturn",
+    )
+    assert extra_stack == 1
+    assert {name: n for name, n in optimizer.hits.items() if n} == {
+        "swap-i2f-swap": 1, "store-load": 1, "not-branch": 1, "goto-next-label": 1
+    }
+
+
+def test_002():
+    """Labels and directives end a window; extra rules can be added"""
+    optimizer = PeepholeOptimizer()
+    optimizer.rules.append(PeepholeRule("nop", lambda code, i: (1, []) if code[i].op == "nop" else None))
+    code, extra_stack = optimizer.optimize(body(
+        "\tistore_1", "Label0:", "\tiload_1",
+        "\tistore_2", ".var 3 is y I from Label0 to Label1", "\tiload_2",
+        "\tnop",
+    ))
+    assert code == body("\tistore_1", "Label0:", "\tiload_1", "\tistore_2", ".var 3 is y I from Label0 to Label1", "\tiload_2")
+    assert extra_stack == 0
+    assert optimizer.hits["nop"] == 1 and optimizer.hits["store-load"] == 0
+
+
+def test_003():
+    """Optimized programs run as before"""
+    var_decls = [
+        VariableDecl(False, PrimitiveType("int"), [Variable("i", IntLiteral(3))]),
+        VariableDecl(False, PrimitiveType("float"), [Variable("f", FloatLiteral(0.5))]),
+        VariableDecl(False, PrimitiveType("string"), [Variable("s", StringLiteral("a"))]),
+        VariableDecl(False, ArrayType(PrimitiveType("int"), 2), [])
+    ]
+    var_decls[-1].variables.append(Variable("a"))
+    stmts = [
+        MethodInvocationStatement(PostfixExpression(Identifier("io"), [
+            MethodCall("writeFloatLn", [BinaryOp(Identifier("i"), "+", Identifier("f"))])
+        ])),
+        AssignmentStatement(PostfixLHS(PostfixExpression(Identifier("a"), [ArrayAccess(IntLiteral(1))])), IntLiteral(7)),
+        MethodInvocationStatement(PostfixExpression(Identifier("io"), [
+            MethodCall("writeIntLn", [PostfixExpression(Identifier("a"), [ArrayAccess(IntLiteral(1))])])
+        ])),
+        IfStatement(
+            BinaryOp(Identifier("s"), "!=", StringLiteral("b")),
+            MethodInvocationStatement(PostfixExpression(Identifier("io"), [MethodCall("writeStrLn", [StringLiteral("ne")])])),
+            None
+        )
+    ]
+    program = Program([ClassDecl("Main", None, [
+        MethodDecl(True, PrimitiveType("void"), "main", [], BlockStatement(var_decls, stmts))
+    ])])
+    assert CodeGenerator().generate_and_run(program) == "3.5\n7\nne"
@@ -0,0 +1,74 @@
+"""
+Test cases for the visitor profiler.
+"""
+
+import json
+
+from src.semantics.static_checker import StaticChecker
+from src.utils.profiling import VisitorProfiler
+from utils import ASTGenerator
+
+
+SOURCE = """
+    class A {
+        int x := 1;
+        int f(int n) { return n + this.x; }
+        static void main() { io.writeIntLn(new A().f(2)); }
+    }
+"""
+
+
+class Ticks:
+    """Clock advancing one second per reading."""
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        self.now += 1
+        return self.now
+
+
+def test_001():
+    """Visits and units are counted; an unattached visitor has no wrappers"""
+    ast = ASTGenerator(SOURCE).generate()
+    profiler = VisitorProfiler()
+    checker = StaticChecker()
+    assert not [n for n in vars(checker) if n.startswith("visit_")]
+    with profiler.phase("check"):
+        checker.profiled(profiler).check_program(ast)
+    assert profiler.visits["visit_class_decl"][0] == 1
+    assert profiler.visits["visit_method_decl"][0] == 2
+    assert profiler.units["A"][0] == 1
+    assert profiler.units["A.f"][0] == 1
+    assert profiler.units["A.main"][0] == 1
+    VisitorProfiler.detach(checker)
+    assert not [n for n in vars(checker) if n.startswith("visit_")]
+
+
+def test_002():
+    """Folded stacks hold self time, which adds up to the phase's total"""
+    ast = ASTGenerator(SOURCE).generate()
+    profiler = VisitorProfiler(clock=Ticks())
+    with profiler.phase("check"):
+        StaticChecker().profiled(profiler).check_program(ast)
+    lines = profiler.folded_lines()
+    assert all(line.startswith("check") for line in lines)
+    assert any(line.startswith("check;visit_program;visit_class_decl A;visit_method_decl A.f;") for line in lines)
+    # The phase started at the first tick and ended at the last one
+    total = sum(int(line.rsplit(" ", 1)[1]) for line in lines)
+    assert total == (profiler.clock.now - 1) * 10 ** 6
+
+
+def test_003(tmp_path):
+    """JSON export lists visits and units by cumulative time"""
+    ast = ASTGenerator(SOURCE).generate()
+    profiler = VisitorProfiler()
+    StaticChecker().profiled(profiler).check_program(ast)
+    path = tmp_path / "profile.json"
+    profiler.write_json(str(path))
+    data = json.loads(path.read_text())
+    assert set(data) == {"visits", "units"}
+    assert data["visits"]["visit_program"]["calls"] == 1
+    seconds = [row["seconds"] for row in data["units"].values()]
+    assert seconds == sorted(seconds, reverse=True)
@@ -4,6 +4,8 @@ import subprocess
 import tempfile
 import shutil
 import glob
+import atexit
+import pickle
 
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "build"))
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "src"))
@@ -12,43 +14,93 @@ from antlr4 import *
 from build.OPLangLexer import OPLangLexer
 from build.OPLangParser import OPLangParser
 from src.utils.error_listener import NewErrorListener
+from src.utils.parsing import parse_two_stage
+from src.utils.token_stream import TokenScanner, ErrorRecord
 from src.astgen.ast_generation import ASTGeneration
 from src.semantics.static_checker import StaticChecker
 from src.utils.nodes import *
+from src.codegen.runner import JvmWorker, JvmWorkerError, assemble_batch
+from src.utils.compile_cache import CompileCache, DEFAULT_CACHE_DIR, encode_ast, decode_ast, pack_files, unpack_files
+from src.utils.profiling import VisitorProfiler
+
+
+def _compile_cache():
+    """Return the session-wide compile cache, or None when it is disabled."""
+    global _COMPILE_CACHE
+    if os.environ.get("OPLANG_CACHE", "1") == "0":
+        return None
+    if _COMPILE_CACHE is None:
+        _COMPILE_CACHE = CompileCache(os.environ.get("OPLANG_CACHE_DIR", DEFAULT_CACHE_DIR))
+    return _COMPILE_CACHE
+
+
+_COMPILE_CACHE = None
+
+
+def _profiler():
+    """
+    Return the session-wide visitor profiler, or None unless OPLANG_PROFILE
+    names the file to write it to at exit (JSON for *.json, folded stacks
+    otherwise). Compile cache hits are not visited, so set OPLANG_CACHE=0 too.
+    """
+    global _PROFILER
+    path = os.environ.get("OPLANG_PROFILE")
+    if not path:
+        return None
+    if _PROFILER is None:
+        _PROFILER = VisitorProfiler()
+        # One file per pytest-xdist worker
+        worker = os.environ.get("PYTEST_XDIST_WORKER")
+        root, ext = os.path.splitext(path)
+        if worker:
+            path = f"{root}.{worker}{ext}"
+        atexit.register(_PROFILER.write_json if ext == ".json" else _PROFILER.write_folded, path)
+    return _PROFILER
+
+
+_PROFILER = None
+
+
+def _cached_text(cache, stage, key, compute):
+    """Text result of a stage, from the cache or computed and stored."""
+    entry = cache.get(stage, key)
+    if entry is not None:
+        try:
+            return entry.decode("utf-8")
+        except UnicodeDecodeError:
+            pass
+    text = compute()
+    cache.put(stage, key, text.encode("utf-8"))
+    return text
+
+
+def _ast_key(cache, stage, ast, *parts):
+    """Cache key of a stage whose input is an AST, None if it cannot be pickled."""
+    try:
+        return cache.key(stage, pickle.dumps(ast, protocol=4), *parts)
+    except Exception:
+        return None
 
 
 class Tokenizer:
     def __init__(self, input_string):
-        self.input_stream = InputStream(input_string)
-        self.lexer = OPLangLexer(self.input_stream)
+        self.scanner = TokenScanner(input_string)
+        self.input_stream = self.scanner.input_stream
+        self.lexer = self.scanner.lexer
 
     def get_tokens(self):
         tokens = []
-        token = self.lexer.nextToken()
-        while token.type != Token.EOF:
-            tokens.append(token.text)
-            try:
-                token = self.lexer.nextToken()
-            except Exception as e:
-                tokens.append(str(e))
+        for record in self.scanner:
+            if isinstance(record, ErrorRecord):
+                tokens.append(str(record.error))
                 return tokens
-        return tokens + ["EOF"]
+            tokens.append("EOF" if record.type == Token.EOF else self.scanner.text(record))
+        return tokens
 
     def get_tokens_as_string(self):
-        tokens = []
-        try:
-            while True:
-                token = self.lexer.nextToken()
-                if token.type == Token.EOF:
-                    tokens.append("EOF")
-                    break
-                tokens.append(token.text)
-        except Exception as e:
-            if tokens:  # If we already have some tokens, append error
-                tokens.append(str(e))
-            else:  # If no tokens yet, just return error
-                return str(e)
-        return ",".join(tokens)
+        # a lexical error ends the list, so an error on the first token is
+        # returned on its own
+        return ",".join(self.get_tokens())
 
 
 class Parser:
@@ -62,7 +114,7 @@ class Parser:
 
     def parse(self):
         try:
-            self.parser.program()  # Assuming 'program' is the entry point of your grammar
+            parse_two_stage(self.parser)  # SLL first, full LL only if that fails
             return "success"
         except Exception as e:
             return str(e)
@@ -81,9 +133,24 @@ class ASTGenerator:
 
     def generate(self):
         """Generate AST from the input string."""
+        cache = _compile_cache()
+        if cache is None:
+            return self._generate()
+        key = cache.key("ast", self.input_string)
+        entry = cache.get("ast", key)
+        ast = decode_ast(entry) if entry is not None else None
+        if ast is None:
+            ast = self._generate()
+            try:
+                cache.put("ast", key, encode_ast(ast))
+            except (TypeError, RecursionError):
+                pass
+        return ast
+
+    def _generate(self):
         try:
             # Parse the program starting from the entry point
-            parse_tree = self.parser.program()
+            parse_tree = parse_two_stage(self.parser)
 
             # Generate AST using the visitor
             ast = self.ast_generator.visit(parse_tree)
@@ -102,112 +169,212 @@ class Checker:
 
     def check_from_ast(self):
         """Perform static checking on the AST."""
+        cache = _compile_cache()
+        key = _ast_key(cache, "check", self.ast) if cache is not None else None
+        if key is None:
+            return self._check_ast()
+        return _cached_text(cache, "check", key, self._check_ast)
+
+    def _check_ast(self):
         try:
-            self.checker.check_program(self.ast)
+            self._run_checker()
             return "Static checking passed"
         except Exception as e:
             return str(e)
 
+    def _run_checker(self):
+        # OPLANG_CHECK_WORKERS=N checks class bodies on a pool of N processes
+        workers = int(os.environ.get("OPLANG_CHECK_WORKERS", "0"))
+        profiler = _profiler()
+        if profiler is None:
+            return self._run_checker_on(self.checker, workers)
+        checker = self.checker.profiled(profiler)
+        with profiler.phase("check"):
+            return self._run_checker_on(checker, workers)
+
+    def _run_checker_on(self, checker, workers):
+        if workers > 0:
+            return checker.check_program_parallel(self.ast, workers)
+        return checker.check_program(self.ast)
+
     def check_from_source(self):
         """Perform static checking on the source code."""
+        cache = _compile_cache()
+        if cache is None:
+            return self._check_source()
+        return _cached_text(cache, "check-source", cache.key("check-source", self.source), self._check_source)
+
+    def _check_source(self):
         try:
             ast_gen = ASTGenerator(self.source)
             self.ast = ast_gen.generate()
             if isinstance(self.ast, str):  # If AST generation failed
                 return self.ast
             
-            self.checker.check_program(self.ast)
+            self._run_checker()
             return "Static checking passed"
         except Exception as e:
             return str(e)
 
 
+def _jvm_worker():
+    """Return the session-wide JVM worker, or None when it is disabled."""
+    global _JVM_WORKER
+    if os.environ.get("OPLANG_JVM_WORKER", "1") == "0":
+        return None
+    if _JVM_WORKER is None:
+        _JVM_WORKER = JvmWorker()
+        atexit.register(_JVM_WORKER.shutdown)
+    return _JVM_WORKER
+
+
+_JVM_WORKER = None
+
+
 class CodeGenerator:
     """Class to generate and run code from AST."""
 
-    def __init__(self):
+    def __init__(self, backend=None):
         from src.codegen.codegen import CodeGenerator as CodeGen
-        self.codegen = CodeGen()
+        self.CodeGen = CodeGen
+        # "jasmin" assembles the generated .j files, "class" writes .class files directly
+        self.backend = backend or os.environ.get("OPLANG_BACKEND", "jasmin")
+        # Holds io.class and jasmin.jar; generated files go to a private temp dir
         self.runtime_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "src", "runtime")
 
     def generate_and_run(self, ast):
         """Generate code from AST and run it, return output"""
+        return self.generate_and_run_all([ast])[0]
+
+    def generate_and_run_all(self, asts):
+        """Generate code for many ASTs, assemble them in one batch, run each"""
+        out_dirs = [tempfile.mkdtemp(prefix="oplang-") for _ in asts]
         try:
-            # Change to runtime directory and generate code from AST
-            original_dir = os.getcwd()
-            os.chdir(self.runtime_dir)
-            try:
-                self.codegen.visit(ast)
-            finally:
-                os.chdir(original_dir)
-            
-            # Find all generated .j files
-            j_files = glob.glob(os.path.join(self.runtime_dir, "*.j"))
-            
-            if not j_files:
-                return "Error: No .j files generated"
+            results = [None] * len(asts)
+            groups = []
+            cache = _compile_cache()
+            keys = [None] * len(asts)
+            for i, (ast, out_dir) in enumerate(zip(asts, out_dirs)):
+                if cache is not None:
+                    # A hit brings back the assembled classes: skip codegen and jasmin
+                    keys[i] = _ast_key(cache, "codegen", ast, self.backend)
+                    entry = cache.get("codegen", keys[i]) if keys[i] else None
+                    files = unpack_files(entry) if entry is not None else None
+                    if files is not None:
+                        self._write_files(out_dir, {
+                            name: data for name, data in files.items() if name.endswith(".class")
+                        })
+                        continue
+                try:
+                    # Generate code from AST into this compilation's own directory
+                    self.codegen = self.CodeGen(self.backend, out_dir)
+                    profiler = _profiler()
+                    if profiler is None:
+                        self.codegen.visit(ast)
+                    else:
+                        self.codegen.profiled(profiler)
+                        with profiler.phase("codegen"):
+                            self.codegen.visit(ast)
+                except Exception as e:
+                    results[i] = f"Code generation error: {str(e)}"
+                    continue
+                
+                # Find all generated .j files (the class backend needs no assembly)
+                if self.backend != "class":
+                    j_files = sorted(glob.glob(os.path.join(out_dir, "*.j")))
+                    if not j_files:
+                        results[i] = "Error: No .j files generated"
+                        continue
+                    groups.append((i, out_dir, j_files))
             
-            # Assemble all .j files to .class
             try:
-                for j_file in j_files:
-                    result = subprocess.run(
-                        ["java", "-jar", "jasmin.jar", os.path.basename(j_file)],
-                        cwd=self.runtime_dir,
-                        capture_output=True,
-                        text=True,
-                        timeout=10
-                    )
-                    
-                    if result.returncode != 0:
-                        return f"Assembly error for {os.path.basename(j_file)}: {result.stderr}"
-                
-                # Find the class with main method
-                # In OPLang, any class can have a static main() method
-                class_files = glob.glob(os.path.join(self.runtime_dir, "*.class"))
-                main_class = None
-                
-                # Try to find a class with main method
-                # For now, try running the first class found, or look for a specific pattern
-                # This is a simplified approach - in practice, you might need to check which class has main
-                if class_files:
-                    # Try to find main class by checking class files
-                    # For simplicity, we'll try the first class file
-                    # In a real implementation, you might need to inspect the class files
-                    # or maintain a list of classes with main methods
-                    
-                    # Get class name from .class file (remove .class extension)
-                    for class_file in class_files:
-                        class_name = os.path.basename(class_file).replace(".class", "")
-                        # Skip io.class
-                        if class_name == "io":
-                            continue
-                        main_class = class_name
-                        break
-                
-                if not main_class:
-                    return "Error: No main class found"
-                
-                # Run program
-                result = subprocess.run(
-                    ["java", main_class],
-                    cwd=self.runtime_dir,
-                    capture_output=True,
-                    text=True,
-                    timeout=10
-                )
+                worker = _jvm_worker()
+                # Assemble the .j files of every compilation at once
+                errors = assemble_batch([(out_dir, j_files) for _, out_dir, j_files in groups], worker)
+                for i, _, j_files in groups:
+                    for j_file in j_files:
+                        if errors[j_file]:
+                            results[i] = f"Assembly error for {os.path.basename(j_file)}: " + "\n".join(errors[j_file])
+                            break
                 
-                if result.returncode != 0:
-                    return f"Runtime error: {result.stderr}"
-                
-                return result.stdout.strip()
-                
-            except subprocess.TimeoutExpired:
-                return "Timeout"
+                for i, (ast, out_dir) in enumerate(zip(asts, out_dirs)):
+                    if results[i] is None:
+                        if keys[i] is not None:
+                            cache.put("codegen", keys[i], pack_files({
+                                **self._read_files(out_dir, ".j"),
+                                **self._read_files(out_dir, ".class"),
+                            }))
+                        results[i] = self._run(worker, out_dir, ast)
             except FileNotFoundError:
-                return "Java not found"
+                results = [r if r is not None else "Java not found" for r in results]
+            except subprocess.TimeoutExpired:
+                results = [r if r is not None else "Timeout" for r in results]
+            return results
                 
         except Exception as e:
-            return f"Code generation error: {str(e)}"
+            return [f"Code generation error: {str(e)}"] * len(asts)
+        finally:
+            for out_dir in out_dirs:
+                shutil.rmtree(out_dir, ignore_errors=True)
+
+    @staticmethod
+    def _read_files(out_dir, suffix):
+        files = {}
+        for path in glob.glob(os.path.join(out_dir, "*" + suffix)):
+            with open(path, "rb") as file:
+                files[os.path.basename(path)] = file.read()
+        return files
+
+    @staticmethod
+    def _write_files(out_dir, files):
+        for name, data in files.items():
+            with open(os.path.join(out_dir, name), "wb") as file:
+                file.write(data)
+
+    def _find_main_class(self, out_dir, ast):
+        """Find the class declaring static main(), else the first generated class."""
+        # In OPLang, any class can have a static main() method
+        generated = set(
+            os.path.basename(f)[:-len(".class")] for f in glob.glob(os.path.join(out_dir, "*.class"))
+        )
+        for class_decl in getattr(ast, "class_decls", []):
+            for member in class_decl.members:
+                if isinstance(member, MethodDecl) and member.is_static and member.name == "main":
+                    if class_decl.name in generated:
+                        return class_decl.name
+        return min(generated) if generated else None
+
+    def _run(self, worker, out_dir, ast):
+        """Run one assembled program, in the JVM worker when there is one."""
+        main_class = self._find_main_class(out_dir, ast)
+        if not main_class:
+            return "Error: No main class found"
+        class_path = [out_dir, self.runtime_dir]
+
+        try:
+            if worker is not None:
+                try:
+                    ok, output = worker.run(main_class, class_path, timeout=10)
+                    if not ok:
+                        return f"Runtime error: {output}"
+                    return output.strip()
+                except JvmWorkerError:
+                    pass  # Fall back to a fresh JVM below
+            
+            result = subprocess.run(
+                ["java", "-cp", os.pathsep.join(class_path), main_class],
+                capture_output=True,
+                text=True,
+                timeout=10
+            )
+        except subprocess.TimeoutExpired:
+            return "Timeout"
+        
+        if result.returncode != 0:
+            return f"Runtime error: {result.stderr}"
+        
+        return result.stdout.strip()
+
     def generate_for_source(self, source):
         """Generate code from source code and return output"""
         try: